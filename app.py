@@ -1,16 +1,36 @@
-from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, session, jsonify, Response, stream_with_context
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import LoginManager, UserMixin, login_user, login_required, logout_user, current_user
 from flask_mail import Mail
-from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy import and_, text
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import joinedload
 from werkzeug.utils import secure_filename
-from datetime import datetime
+from datetime import datetime, timedelta
 import os
 import uuid
+import hashlib
 import logging
 from config import Config
 from utils.paystack_service import PaystackService
 from utils.email_service import EmailService
+from utils.password_service import PasswordService, PasswordServiceBusy
+from utils.announcement_service import AnnouncementService
+from utils.purge_service import PurgeService
+from utils.counter_service import adjust_counters, get_admin_counters
+from utils.rollup_service import record_application, record_payment, course_report, coupon_report, daily_series
+from utils.export_service import EXPORTS, build_export_query, stream_rows, iter_csv_gzip, iter_xlsx
+from utils.bulk_service import parse_ids, bulk_update, bulk_delete
+from utils.job_service import enqueue
+from utils.search_service import search
+from utils.cache_service import LocalCache, invalidate_after_commit, invalidate_on_change
+from utils.invalidation_bus import init_invalidation_bus
+from utils.tracing import init_tracing
+from utils.structured_logging import init_logging
+from utils.compression_service import init_compression
+from utils.asset_service import init_assets, add_preload
+from utils.api_service import (COURSE_FIELDS, APPLICATION_FIELDS, select_fields, load_fields, serialize,
+                               encode_cursor, decode_cursor, page_limit, paginate, json_response, error_response)
 
 app = Flask(__name__)
 app.config.from_object(Config)
@@ -27,39 +47,394 @@ os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 def allowed_file(filename):
     return '.' in filename and filename.rsplit('.', 1)[1].lower() in ALLOWED_EXTENSIONS
 
+def is_pending_admin(user):
+    return user.role == 'admin' and not user.admin_approved and user.deleted_at is None
+
+def pending_admin_condition():
+    """is_pending_admin as SQL, matching the pending_admins counter"""
+    return and_(User.role == 'admin', User.admin_approved.is_(False), User.deleted_at.is_(None))
+
+def mark_payment_completed(application):
+    """Mark an application paid and update the admin counters and daily stats (the caller commits)"""
+    if application.payment_status == 'completed':
+        return
+    adjust_counters(
+        pending_payments=-1 if application.payment_status == 'pending' else 0,
+        total_revenue=application.final_price
+    )
+    application.payment_status = 'completed'
+    application.paid_at = datetime.utcnow()
+    record_payment(application)
+    invalidate_dashboard(application.user_id)
+
+def mark_payment_failed(application):
+    """Mark an application's payment failed and update the admin counters and daily stats (the caller commits)"""
+    adjust_counters(
+        pending_payments=-1 if application.payment_status == 'pending' else 0,
+        total_revenue=-application.final_price if application.payment_status == 'completed' else 0
+    )
+    if application.payment_status == 'completed' and application.paid_at:
+        record_payment(application, sign=-1)
+    application.payment_status = 'failed'
+    invalidate_dashboard(application.user_id)
+
+def payment_idempotency_key(application, coupon):
+    """Identifies an initialization by application, amount and coupon"""
+    key = f"{application.id}:{application.final_price:.2f}:{coupon.id if coupon else ''}"
+    return hashlib.sha256(key.encode()).hexdigest()
+
+def find_payment(reference):
+    """
+    Find (and lock) the application a Paystack reference was issued for
+
+    Looks in the reference history first, so payments made with an earlier
+    reference of the application are still matched.
+
+    Returns:
+        tuple: (Application or None, PaymentReference or None)
+    """
+    payment_ref = PaymentReference.query.filter_by(reference=reference).first()
+    query = Application.query.with_for_update()
+    if payment_ref:
+        return query.filter_by(id=payment_ref.application_id).first(), payment_ref
+    # References issued before the history table existed
+    return query.filter_by(payment_reference=reference).first(), None
+
+def apply_payment_reference(application, payment_ref, reference):
+    """Make a successfully paid reference the application's own, with the price it charged"""
+    if payment_ref:
+        payment_ref.status = 'completed'
+    if application.payment_status == 'completed':
+        if application.payment_reference != reference:
+            app.logger.warning("Application %s paid again with reference %s", application.id, reference)
+        return
+    application.payment_reference = reference
+    if payment_ref:
+        application.final_price = payment_ref.amount
+        application.discount_amount = payment_ref.discount_amount
+        application.coupon_id = payment_ref.coupon_id
+
+def fail_payment_reference(application, payment_ref, reference):
+    """Record a failed verification; the application only fails if it was its current reference"""
+    if payment_ref and payment_ref.status == 'pending':
+        payment_ref.status = 'failed'
+    if application.payment_reference == reference and application.payment_status != 'completed':
+        mark_payment_failed(application)
+
+def record_coupon_usage(application):
+    """Count a newly paid application's coupon as used (the caller commits)"""
+    if not application.coupon_id:
+        return
+    coupon = Coupon.query.get(application.coupon_id)
+    if coupon:
+        coupon.used_count += 1
+        db.session.add(CouponUsage(
+            coupon_id=coupon.id,
+            user_id=application.user_id,
+            application_id=application.id,
+            discount_amount=application.discount_amount
+        ))
+
+def quote_coupon(course, code, user_id=None):
+    """
+    Price of a course with a coupon applied
+    
+    Args:
+        course (Course): Course being paid for
+        code (str): Coupon code, already upper-cased
+        user_id (int): Checks the per-user limit for this user, if given
+    
+    Returns:
+        dict: The coupon and the resulting discount and final price
+    
+    Raises:
+        ValueError: With a message for the user if the coupon can't be used
+    """
+    coupon = Coupon.query.filter_by(code=code, is_active=True).first()
+    if not coupon:
+        raise ValueError('Invalid coupon code')
+    
+    # Check if coupon is still valid
+    now = datetime.utcnow()
+    if coupon.valid_until and coupon.valid_until < now:
+        raise ValueError('Coupon has expired')
+    
+    if coupon.valid_from > now:
+        raise ValueError('Coupon is not yet valid')
+    
+    # Check minimum amount
+    if course.price < coupon.min_amount:
+        raise ValueError(f'Minimum order amount of ₦{coupon.min_amount:,.2f} required')
+    
+    # Check usage limits
+    if coupon.usage_limit and coupon.used_count >= coupon.usage_limit:
+        raise ValueError('Coupon usage limit reached')
+    
+    # Check user usage limit
+    if user_id is not None:
+        user_usage_count = CouponUsage.query.filter_by(coupon_id=coupon.id, user_id=user_id).count()
+        if user_usage_count >= coupon.user_limit:
+            raise ValueError('You have already used this coupon')
+    
+    # Calculate discount
+    if coupon.discount_type == 'percentage':
+        discount_amount = (course.price * coupon.discount_value) / 100
+        if coupon.max_discount:
+            discount_amount = min(discount_amount, coupon.max_discount)
+    else:  # fixed
+        discount_amount = min(coupon.discount_value, course.price)
+    
+    return {
+        'id': coupon.id,
+        'code': coupon.code,
+        'description': coupon.description,
+        'discount_type': coupon.discount_type,
+        'discount_value': coupon.discount_value,
+        'discount_amount': discount_amount,
+        'original_price': course.price,
+        'final_price': course.price - discount_amount
+    }
+
+def find_open_application(user_id, course_id):
+    """The user's unpaid application for a course, if any"""
+    return Application.query.filter(
+        Application.user_id == user_id,
+        Application.course_id == course_id,
+        Application.payment_status.in_(OPEN_PAYMENT_STATUSES)
+    ).order_by(Application.id.desc()).first()
+
+def create_open_application(user_id, course):
+    """
+    Return the user's open application for a course, creating it if there is none
+
+    On Postgres a transaction-scoped advisory lock per user and course
+    serializes creators; once it is held, an open application committed by
+    a request we waited on is visible, so it is looked up before inserting.
+    That is what keeps a partitioned application table (which cannot have
+    the uq_application_open index) free of duplicates. Where the index
+    exists the insert is also ``ON CONFLICT DO NOTHING RETURNING id``, so
+    a racing insert without the lock (SQLite) yields that row instead.
+    The caller commits.
+
+    Returns:
+        tuple: (Application, bool) - the application and whether it was just created
+    """
+    values = {
+        'user_id': user_id,
+        'course_id': course.id,
+        'status': 'pending',
+        'payment_status': 'pending',
+        'applied_at': datetime.utcnow(),
+        'original_price': course.price,
+        'discount_amount': 0,
+        'final_price': course.price
+    }
+    dialect = db.engine.dialect.name
+    if dialect == 'postgresql':
+        db.session.execute(text("SELECT pg_advisory_xact_lock(:user_id, :course_id)"),
+                           {'user_id': user_id, 'course_id': course.id})
+    
+    existing = find_open_application(user_id, course.id)
+    if existing is not None:
+        return existing, False
+    
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        application_id = db.session.execute(
+            insert(Application).values(**values).on_conflict_do_nothing().returning(Application.id)
+        ).scalar()
+    else:
+        application = Application(**values)
+        db.session.add(application)
+        db.session.flush()
+        application_id = application.id
+    
+    if application_id is None:
+        return find_open_application(user_id, course.id), False
+    
+    application = db.session.get(Application, application_id)
+    adjust_counters(pending_payments=1)
+    record_application(application)
+    invalidate_dashboard(user_id)
+    return application, True
+
+def invalidate_dashboard(user_id):
+    """Drop a user's cached dashboard once the current transaction commits"""
+    invalidate_after_commit(db.session, dashboard_cache, user_id)
+
+def student_dashboard_rows(user_id):
+    """
+    A user's applications for the dashboard, newest first, as plain dicts
+    
+    One query: the course and coupon are joined in rather than loaded per
+    row. The result is cached per user until one of their applications
+    changes (see invalidate_dashboard) or STUDENT_DASHBOARD_CACHE_TTL passes.
+    """
+    rows = dashboard_cache.get(user_id)
+    if rows is not None:
+        return rows
+    version = dashboard_cache.version
+    
+    applications = Application.query.options(
+        joinedload(Application.course).load_only(Course.id, Course.title, Course.duration, Course.image_url),
+        joinedload(Application.coupon).load_only(Coupon.id, Coupon.code)
+    ).filter(
+        Application.user_id == user_id,
+        Application.payment_status != 'abandoned'
+    ).order_by(Application.applied_at.desc(), Application.id.desc()).all()
+    
+    rows = [{
+        'id': application.id,
+        'course_id': application.course.id,
+        'course_title': application.course.title,
+        'course_duration': application.course.duration,
+        'course_image_url': application.course.image_url,
+        'status': application.status,
+        'payment_status': application.payment_status,
+        'payment_reference': application.payment_reference,
+        'applied_at': application.applied_at,
+        'paid_at': application.paid_at,
+        'original_price': application.original_price,
+        'discount_amount': application.discount_amount or 0,
+        'final_price': application.final_price,
+        'coupon_code': application.coupon.code if application.coupon else None
+    } for application in applications]
+    dashboard_cache.set(user_id, rows, version)
+    return rows
+
+def get_bulk_request():
+    """
+    Read the action and selected ids of a bulk admin request (JSON or form)
+
+    Raises:
+        ValueError: If ids is not a list of positive integers (see parse_ids)
+    """
+    data = request.get_json(silent=True)
+    if isinstance(data, dict):
+        return data.get('action'), parse_ids(data.get('ids'))
+    # Form posts, and JSON bodies that aren't an object (no action, no ids: a 400)
+    return request.form.get('action'), parse_ids(request.form.getlist('ids'))
+
 # Initialize extensions
 login_manager = LoginManager()
 mail = Mail()
 email_service = None  # Will be initialized after mail is initialized
+password_service = None  # Will be initialized inside the app context
+announcement_service = None  # Will be initialized after email service
+purge_service = None  # Will be initialized inside the app context
 
 # Import models and db
-from models import db, User, Course, Application, ContactMessage, Coupon, CouponUsage
+from models import db, User, Course, Application, ContactMessage, Coupon, CouponUsage, Announcement, PaymentReference, OPEN_PAYMENT_STATUSES
 
 # Initialize extensions with app
 db.init_app(app)
 login_manager.init_app(app)
 mail.init_app(app)
+init_compression(app)
+init_logging(app)
+init_tracing(app)
+init_assets(app)
 
 # Initialize email service after mail is initialized
 with app.app_context():
     email_service = EmailService(mail)
+    password_service = PasswordService()
+    announcement_service = AnnouncementService(mail, email_service.templates)
+    purge_service = PurgeService()
+    dashboard_cache = LocalCache('student_dashboard', ttl=app.config['STUDENT_DASHBOARD_CACHE_TTL'])
+    # Dashboards show course titles and images and coupon codes
+    invalidate_on_change(Course, dashboard_cache)
+    invalidate_on_change(Coupon, dashboard_cache)
+    course_grid_cache = LocalCache('course_grid', ttl=app.config['COURSE_GRID_CACHE_TTL'], maxsize=100)
+    invalidate_on_change(Course, course_grid_cache)
+    init_invalidation_bus(app, db.engine)
 
 login_manager.login_view = 'login'
 login_manager.login_message = 'Please log in to access this page.'
 
+@app.context_processor
+def inject_admin_counters():
+    """Badge counts for admin pages, read from the counters row"""
+    if current_user.is_authenticated and current_user.role == 'admin':
+        return {'admin_counters': get_admin_counters()}
+    return {}
+
 @login_manager.user_loader
 def load_user(user_id):
-    return User.query.get(int(user_id))
+    # Deleted users are logged out on their next request
+    return User.query.filter_by(id=int(user_id), deleted_at=None).first()
 
 # Routes
 @app.route('/')
 def index():
-    courses = Course.query.all()
-    return render_template('index.html', courses=courses)
+    q = request.args.get('q', '').strip()
+    courses, next_page = course_grid_page(q)
+    return render_template('index.html', courses=courses, q=q, next_page=next_page)
+
+# Course columns the grid cards show
+COURSE_CARD_FIELDS = ('id', 'title', 'description', 'duration', 'price', 'image_url')
+
+def course_grid_page(q):
+    """
+    One page of the course grid, from ?cursor= (or ?page= when searching)
+    
+    Returns:
+        tuple: (courses, query args of the next page or None on the last page)
+    """
+    per_page = app.config['COURSES_PER_PAGE']
+    if q:
+        page = max(1, request.args.get('page', 1, type=int))
+        result = search('courses', q, page=page, per_page=per_page)
+        return result['items'], ({'q': q, 'page': page + 1} if result['has_more'] else None)
+    
+    try:
+        after = decode_cursor(request.args.get('cursor')) or 0
+    except ValueError:
+        after = 0
+    # Pages are cached as plain dicts until a course changes (in any worker)
+    cached = course_grid_cache.get(after)
+    if cached is None:
+        version = course_grid_cache.version
+        rows = Course.query.filter(Course.id > after).order_by(Course.id).limit(per_page + 1).all()
+        cached = ([{field: getattr(course, field) for field in COURSE_CARD_FIELDS} for course in rows[:per_page]],
+                  len(rows) > per_page)
+        course_grid_cache.set(after, cached, version)
+    courses, has_more = cached
+    return courses, ({'cursor': encode_cursor(courses[-1]['id'])} if has_more else None)
+
+@app.route('/courses/cards')
+def course_cards():
+    """Course cards of the next grid page, appended by main.js as the visitor scrolls"""
+    courses, next_page = course_grid_page(request.args.get('q', '').strip())
+    response = app.make_response(render_template('partials/course_cards.html', courses=courses))
+    if next_page:
+        response.headers['X-Next-Page'] = url_for('course_cards', **next_page)
+    return response
+
+@app.route('/sw.js')
+def service_worker():
+    """Service worker script, served from the root so it can control every page"""
+    worker = app.extensions['service_worker']
+    response = app.make_response(render_template(
+        'sw.js',
+        version=worker['version'],
+        precache=[url_for('static', filename=path) for path in worker['precache']],
+        offline_url=url_for('offline')
+    ))
+    response.mimetype = 'application/javascript'
+    # Browsers must check for a new worker on every visit
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+@app.route('/offline')
+def offline():
+    """Page the service worker shows when a page isn't cached and the network is down"""
+    return render_template('offline.html')
 
 @app.route('/course/<int:course_id>')
 def course_detail(course_id):
     course = Course.query.get_or_404(course_id)
+    add_preload(course.image_url, 'image')
     return render_template('course_detail.html', course=course)
 
 @app.route('/apply/<int:course_id>', methods=['GET', 'POST'])
@@ -68,34 +443,29 @@ def apply_course(course_id):
     course = Course.query.get_or_404(course_id)
     
     if request.method == 'POST':
-        # Create application
-        application = Application(
-            user_id=current_user.id,
-            course_id=course_id,
-            status='pending',
-            applied_at=datetime.utcnow(),
-            original_price=course.price,
-            discount_amount=0,
-            final_price=course.price
-        )
-        db.session.add(application)
+        # Create application (or find the one an earlier submission created)
+        application, created = create_open_application(current_user.id, course)
         db.session.commit()
         
+        if not created:
+            flash('You have already applied for this course. Complete your payment below.', 'info')
+            return redirect(url_for('payment', application_id=application.id))
+        
         # Send course application email to user
         try:
             email_service.send_course_application_email(current_user, course, application)
             flash('Application submitted successfully! You will receive a confirmation email shortly.', 'success')
         except Exception as e:
-            app.logger.error(f"Error sending course application email: {str(e)}")
+            app.logger.error("Error sending course application email: %s", e)
             flash('Application submitted successfully!', 'success')
         
         # Send notification email to admin
         try:
-            admin_users = User.query.filter_by(role='admin', admin_approved=True).all()
+            admin_users = User.query.filter_by(role='admin', admin_approved=True, deleted_at=None).all()
             for admin in admin_users:
                 email_service.send_admin_notification_email(admin.email, current_user, course, application)
         except Exception as e:
-            app.logger.error(f"Error sending admin notification email: {str(e)}")
+            app.logger.error("Error sending admin notification email: %s", e)
         
         return redirect(url_for('payment', application_id=application.id))
     
@@ -117,31 +487,30 @@ def payment_course(course_id):
     """Create application and redirect to payment for a specific course"""
     course = Course.query.get_or_404(course_id)
     
-    # Check if user already has a pending application for this course
-    existing_app = Application.query.filter_by(
-        user_id=current_user.id, 
-        course_id=course_id,
-        payment_status='pending'
-    ).first()
-    
-    if existing_app:
-        return redirect(url_for('payment', application_id=existing_app.id))
-    
-    # Create new application
-    application = Application(
-        user_id=current_user.id,
-        course_id=course_id,
-        status='pending',
-        applied_at=datetime.utcnow(),
-        original_price=course.price,
-        discount_amount=0,
-        final_price=course.price
-    )
-    db.session.add(application)
+    application, _ = create_open_application(current_user.id, course)
     db.session.commit()
     
     return redirect(url_for('payment', application_id=application.id))
 
+@app.route('/dashboard')
+@login_required
+def student_dashboard():
+    """The current user's applications, payment status and receipts"""
+    applications = student_dashboard_rows(current_user.id)
+    paid = [application for application in applications if application['payment_status'] == 'completed']
+    return render_template('dashboard.html', applications=applications,
+                           paid_count=len(paid),
+                           total_paid=sum(application['final_price'] for application in paid),
+                           total_saved=sum(application['discount_amount'] for application in paid))
+
+@app.route('/dashboard/receipt/<int:application_id>')
+@login_required
+def payment_receipt(application_id):
+    application = Application.query.options(
+        joinedload(Application.course), joinedload(Application.coupon)
+    ).filter_by(id=application_id, user_id=current_user.id, payment_status='completed').first_or_404()
+    return render_template('receipt.html', application=application)
+
 @app.route('/contact', methods=['GET', 'POST'])
 def contact():
     if request.method == 'POST':
@@ -158,13 +527,14 @@ def contact():
             created_at=datetime.utcnow()
         )
         db.session.add(contact_msg)
+        adjust_counters(unread_messages=1)
         db.session.commit()
         
         # Send email notification
         try:
             email_service.send_contact_notification(contact_msg)
         except Exception as e:
-            app.logger.error(f"Error sending contact notification email: {str(e)}")
+            app.logger.error("Error sending contact notification email: %s", e)
         
         flash('Message sent successfully! We will get back to you soon.', 'success')
         return redirect(url_for('contact'))
@@ -176,9 +546,18 @@ def login():
     if request.method == 'POST':
         email = request.form['email']
         password = request.form['password']
-        user = User.query.filter_by(email=email).first()
+        user = User.query.filter_by(email=email, deleted_at=None).first()
+        
+        try:
+            password_ok = user is not None and password_service.verify_and_update(user, password)
+        except PasswordServiceBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('login.html'), 503
         
-        if user and check_password_hash(user.password_hash, password):
+        if password_ok:
+            # Persist an upgraded password hash, if any
+            db.session.commit()
+            
             # Check if admin user is approved
             if user.role == 'admin' and not user.admin_approved:
                 flash('Your admin account is pending approval. Please contact a super admin.', 'warning')
@@ -204,14 +583,22 @@ def register():
             flash('Email already registered.', 'error')
             return render_template('register.html')
         
+        try:
+            password_hash = password_service.hash_password(password)
+        except PasswordServiceBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('register.html'), 503
+        
         user = User(
             name=name,
             email=email,
-            password_hash=generate_password_hash(password),
+            password_hash=password_hash,
             role=role,
             admin_approved=True if role != 'admin' else False  # Auto-approve non-admin roles
         )
         db.session.add(user)
+        if is_pending_admin(user):
+            adjust_counters(pending_admins=1)
         db.session.commit()
         
         if role == 'admin':
@@ -232,12 +619,11 @@ def logout():
 def forgot_password():
     if request.method == 'POST':
         email = request.form['email']
-        user = User.query.filter_by(email=email).first()
+        user = User.query.filter_by(email=email, deleted_at=None).first()
         
         if user:
-            # Generate reset token
+            # Generate a signed reset token (no database write)
             reset_token = user.generate_reset_token()
-            db.session.commit()
             
             # Send password reset email
             try:
@@ -248,8 +634,7 @@ def forgot_password():
                     reset_url = f"{app.config['BASE_URL']}/reset-password?token={reset_token}"
                     flash(f'Email service unavailable. Use this link to reset: {reset_url}', 'warning')
             except Exception as e:
-                # Log the error for debugging
-                print(f"Email sending error: {str(e)}")
+                app.logger.error("Email sending error: %s", e)
                 # For debugging: show the reset link directly
                 reset_url = f"{app.config['BASE_URL']}/reset-password?token={reset_token}"
                 flash(f'Email service temporarily unavailable. Use this link to reset: {reset_url}', 'warning')
@@ -269,9 +654,9 @@ def reset_password():
         flash('Invalid or missing reset token.', 'error')
         return redirect(url_for('forgot_password'))
     
-    user = User.query.filter_by(reset_token=token).first()
+    user = User.verify_reset_token(token)
     
-    if not user or not user.is_reset_token_valid(token):
+    if not user:
         flash('Invalid or expired reset token. Please request a new password reset.', 'error')
         return redirect(url_for('forgot_password'))
     
@@ -288,8 +673,11 @@ def reset_password():
             return render_template('reset_password.html')
         
         # Update password
-        user.password_hash = generate_password_hash(password)
-        user.clear_reset_token()
+        try:
+            user.password_hash = password_service.hash_password(password)
+        except PasswordServiceBusy:
+            flash('The server is busy right now. Please try again in a moment.', 'warning')
+            return render_template('reset_password.html'), 503
         db.session.commit()
         
         flash('Your password has been reset successfully. Please log in with your new password.', 'success')
@@ -305,16 +693,22 @@ def admin_dashboard():
         flash('Access denied.', 'error')
         return redirect(url_for('index'))
     
-    courses = Course.query.all()
-    applications = Application.query.all()
-    messages = ContactMessage.query.all()
-    users = User.query.all()
+    # Totals come from counts and the admin counters, not whole tables, and
+    # the recent lists only look at the latest (partitions of) rows
+    since = datetime.utcnow() - timedelta(days=app.config['ADMIN_RECENT_DAYS'])
+    recent_applications = Application.query.options(
+        joinedload(Application.user), joinedload(Application.course)
+    ).filter(Application.applied_at >= since).order_by(Application.applied_at.desc()).limit(5).all()
+    recent_messages = ContactMessage.query.filter(
+        ContactMessage.created_at >= since
+    ).order_by(ContactMessage.created_at.desc()).limit(5).all()
     
     return render_template('admin/dashboard.html', 
-                         courses=courses, 
-                         applications=applications, 
-                         messages=messages,
-                         users=users)
+                         course_count=Course.query.count(), 
+                         application_count=Application.query.count(), 
+                         user_count=User.query.filter_by(deleted_at=None).count(),
+                         applications=recent_applications,
+                         messages=recent_messages)
 
 @app.route('/admin/courses')
 @login_required
@@ -420,6 +814,76 @@ def delete_course(course_id):
     flash('Course deleted successfully!', 'success')
     return redirect(url_for('admin_courses'))
 
+@app.route('/admin/courses/<int:course_id>/announce', methods=['GET', 'POST'])
+@login_required
+def announce_course(course_id):
+    if current_user.role != 'admin':
+        flash('Access denied.', 'error')
+        return redirect(url_for('index'))
+    
+    course = Course.query.get_or_404(course_id)
+    
+    if request.method == 'POST':
+        subject = request.form['subject'].strip()
+        message = request.form['message'].strip()
+        
+        if not subject or not message:
+            flash('Subject and message are required.', 'error')
+        else:
+            announcement = Announcement(
+                course_id=course.id,
+                subject=subject,
+                message=message,
+                created_by=current_user.id
+            )
+            db.session.add(announcement)
+            db.session.flush()
+            # Sent by the job worker; queued in the same transaction so it can't be lost
+            enqueue('announcement.send', announcement_id=announcement.id)
+            db.session.commit()
+            
+            flash('Announcement queued! Emails are being sent in the background.', 'success')
+            return redirect(url_for('announce_course', course_id=course.id))
+    
+    announcements = Announcement.query.filter_by(course_id=course.id).order_by(Announcement.created_at.desc()).all()
+    return render_template('admin/announce_course.html',
+                         course=course,
+                         announcements=announcements,
+                         can_resume=announcement_service.can_resume)
+
+@app.route('/admin/announcements/<int:announcement_id>/progress')
+@login_required
+def announcement_progress(announcement_id):
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    announcement = Announcement.query.get_or_404(announcement_id)
+    return jsonify({
+        'success': True,
+        'status': announcement.status,
+        'total_recipients': announcement.total_recipients,
+        'sent_count': announcement.sent_count,
+        'failed_count': announcement.failed_count,
+        'progress': announcement.progress
+    })
+
+@app.route('/admin/announcements/<int:announcement_id>/resume', methods=['POST'])
+@login_required
+def resume_announcement(announcement_id):
+    if current_user.role != 'admin':
+        flash('Access denied.', 'error')
+        return redirect(url_for('index'))
+    
+    announcement = Announcement.query.get_or_404(announcement_id)
+    
+    if announcement_service.can_resume(announcement):
+        enqueue('announcement.send', announcement_id=announcement.id)
+        db.session.commit()
+        flash('Announcement resumed from where it stopped.', 'success')
+    else:
+        flash('This announcement is already running or has finished.', 'info')
+    return redirect(url_for('announce_course', course_id=announcement.course_id))
+
 @app.route('/admin/messages')
 @login_required
 def admin_messages():
@@ -427,8 +891,21 @@ def admin_messages():
         flash('Access denied.', 'error')
         return redirect(url_for('index'))
     
-    messages = ContactMessage.query.order_by(ContactMessage.created_at.desc()).all()
-    return render_template('admin/messages.html', messages=messages)
+    # Search covers every message; otherwise recent messages by default,
+    # so only the latest partitions are read
+    q = request.args.get('q', '').strip()
+    show_all = request.args.get('all') == '1'
+    results = None
+    if q:
+        results = search('messages', q, page=request.args.get('page', 1, type=int))
+        messages = results['items']
+    else:
+        query = ContactMessage.query
+        if not show_all:
+            query = query.filter(ContactMessage.created_at >= datetime.utcnow() - timedelta(days=app.config['ADMIN_RECENT_DAYS']))
+        messages = query.order_by(ContactMessage.created_at.desc()).all()
+    return render_template('admin/messages.html', messages=messages, show_all=show_all,
+                           recent_days=app.config['ADMIN_RECENT_DAYS'], q=q, results=results)
 
 @app.route('/admin/messages/<int:message_id>/mark-read', methods=['POST'])
 @login_required
@@ -438,6 +915,8 @@ def mark_message_read(message_id):
         return redirect(url_for('index'))
     
     message = ContactMessage.query.get_or_404(message_id)
+    if not message.is_read:
+        adjust_counters(unread_messages=-1)
     message.is_read = True
     db.session.commit()
     
@@ -451,12 +930,45 @@ def delete_message(message_id):
         return redirect(url_for('index'))
     
     message = ContactMessage.query.get_or_404(message_id)
+    if not message.is_read:
+        adjust_counters(unread_messages=-1)
     db.session.delete(message)
     db.session.commit()
     
     flash('Message deleted successfully!', 'success')
     return redirect(url_for('admin_messages'))
 
+@app.route('/admin/messages/bulk', methods=['POST'])
+@login_required
+def bulk_messages():
+    """Mark read, mark unread or delete many messages at once"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    try:
+        action, ids = get_bulk_request()
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid message ids'}), 400
+    
+    if not ids:
+        return jsonify({'success': False, 'message': 'No messages selected'}), 400
+    
+    # The counters move by the rows whose read state actually changes
+    if action == 'mark_read':
+        affected = bulk_update(ContactMessage, ids, is_read=True,
+                               counted=(ContactMessage.is_read.is_(False), {'unread_messages': -1}))
+    elif action == 'mark_unread':
+        affected = bulk_update(ContactMessage, ids, is_read=False,
+                               counted=(ContactMessage.is_read.isnot(False), {'unread_messages': 1}))
+    elif action == 'delete':
+        affected = bulk_delete(ContactMessage, ids,
+                               counted=(ContactMessage.is_read.is_(False), {'unread_messages': -1}))
+    else:
+        return jsonify({'success': False, 'message': 'Unknown action'}), 400
+    
+    app.logger.info("Admin %s bulk %s on %s messages", current_user.id, action, affected)
+    return jsonify({'success': True, 'action': action, 'requested': len(ids), 'affected': affected})
+
 @app.route('/admin/users')
 @login_required
 def admin_users():
@@ -464,8 +976,14 @@ def admin_users():
         flash('Access denied.', 'error')
         return redirect(url_for('index'))
     
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('admin/users.html', users=users)
+    q = request.args.get('q', '').strip()
+    results = None
+    if q:
+        results = search('users', q, page=request.args.get('page', 1, type=int))
+        users = results['items']
+    else:
+        users = User.query.filter_by(deleted_at=None).order_by(User.created_at.desc()).all()
+    return render_template('admin/users.html', users=users, q=q, results=results)
 
 @app.route('/admin/users/<int:user_id>/edit', methods=['GET', 'POST'])
 @login_required
@@ -477,13 +995,20 @@ def edit_user(user_id):
     user = User.query.get_or_404(user_id)
     
     if request.method == 'POST':
+        was_pending = is_pending_admin(user)
         user.name = request.form['name']
         user.email = request.form['email']
         user.role = request.form['role']
+        adjust_counters(pending_admins=int(is_pending_admin(user)) - int(was_pending))
         
         # Only update password if provided
         if request.form['password']:
-            user.password_hash = generate_password_hash(request.form['password'])
+            try:
+                user.password_hash = password_service.hash_password(request.form['password'])
+            except PasswordServiceBusy:
+                db.session.rollback()
+                flash('The server is busy right now. Please try again in a moment.', 'warning')
+                return render_template('admin/edit_user.html', user=user), 503
         
         db.session.commit()
         flash('User updated successfully!', 'success')
@@ -505,16 +1030,53 @@ def delete_user(user_id):
         flash('You cannot delete your own account.', 'error')
         return redirect(url_for('admin_users'))
     
-    # Delete user's applications first
-    Application.query.filter_by(user_id=user_id).delete()
-    
-    # Delete user
-    db.session.delete(user)
+    # Mark the user deleted (locks them out immediately) and leave removing
+    # their applications and coupon usage to the users.purge job
+    if is_pending_admin(user):
+        adjust_counters(pending_admins=-1)
+    user.deleted_at = datetime.utcnow()
+    enqueue('users.purge')
     db.session.commit()
     
     flash('User deleted successfully!', 'success')
     return redirect(url_for('admin_users'))
 
+@app.route('/admin/users/bulk', methods=['POST'])
+@login_required
+def bulk_users():
+    """Activate, deactivate or delete many users at once"""
+    if current_user.role != 'admin':
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    try:
+        action, ids = get_bulk_request()
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid user ids'}), 400
+    
+    # Admins can never act on their own account
+    ids = [user_id for user_id in ids if user_id != current_user.id]
+    if not ids:
+        return jsonify({'success': False, 'message': 'No users selected'}), 400
+    
+    if action == 'activate':
+        # Like toggle_user_status: only inactive accounts become students,
+        # selected admins keep their role
+        affected = bulk_update(User, ids, User.role == 'inactive', role='student')
+    elif action == 'deactivate':
+        affected = bulk_update(User, ids, role='inactive',
+                               counted=(pending_admin_condition(), {'pending_admins': -1}))
+    elif action == 'delete':
+        # Same as delete_user: soft delete now, purge in the users.purge job
+        affected = bulk_update(User, ids, deleted_at=datetime.utcnow(),
+                               counted=(pending_admin_condition(), {'pending_admins': -1}))
+        enqueue('users.purge')
+        db.session.commit()
+    else:
+        return jsonify({'success': False, 'message': 'Unknown action'}), 400
+    
+    app.logger.info("Admin %s bulk %s on %s users", current_user.id, action, affected)
+    return jsonify({'success': True, 'action': action, 'requested': len(ids), 'affected': affected})
+
 @app.route('/admin/users/<int:user_id>/toggle-status', methods=['POST'])
 @login_required
 def toggle_user_status(user_id):
@@ -531,6 +1093,8 @@ def toggle_user_status(user_id):
     
     # Toggle user status (you can add an 'active' field to User model if needed)
     # For now, we'll just toggle the role between 'student' and 'inactive'
+    if is_pending_admin(user):
+        adjust_counters(pending_admins=-1)
     if user.role == 'inactive':
         user.role = 'student'
         message = 'User activated successfully!'
@@ -549,7 +1113,7 @@ def pending_admins():
         flash('Access denied.', 'error')
         return redirect(url_for('index'))
     
-    pending_admins = User.query.filter_by(role='admin', admin_approved=False).order_by(User.created_at.desc()).all()
+    pending_admins = User.query.filter_by(role='admin', admin_approved=False, deleted_at=None).order_by(User.created_at.desc()).all()
     return render_template('admin/pending_admins.html', pending_admins=pending_admins)
 
 @app.route('/admin/approve-admin/<int:user_id>', methods=['POST'])
@@ -565,6 +1129,8 @@ def approve_admin(user_id):
         flash('User is not an admin.', 'error')
         return redirect(url_for('pending_admins'))
     
+    if is_pending_admin(user):
+        adjust_counters(pending_admins=-1)
     user.admin_approved = True
     db.session.commit()
     
@@ -584,6 +1150,9 @@ def reject_admin(user_id):
         flash('User is not an admin.', 'error')
         return redirect(url_for('pending_admins'))
     
+    if is_pending_admin(user):
+        adjust_counters(pending_admins=-1)
+    
     # Change role to student and delete the user
     user.role = 'student'
     user.admin_approved = True  # Set to True so they can login as student
@@ -592,6 +1161,80 @@ def reject_admin(user_id):
     flash(f'Admin application for {user.name} has been rejected. User can now login as a student.', 'success')
     return redirect(url_for('pending_admins'))
 
+@app.route('/admin/exports/<kind>.<any(csv, xlsx):fmt>')
+@login_required
+def admin_export(kind, fmt):
+    """Stream an admin report as gzipped CSV or XLSX"""
+    if current_user.role != 'admin' or not current_user.admin_approved:
+        flash('Access denied.', 'error')
+        return redirect(url_for('index'))
+    
+    if kind not in EXPORTS:
+        flash('Unknown export.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    
+    try:
+        start = request.args.get('start')
+        end = request.args.get('end')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else None
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else None
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'error')
+        return redirect(url_for('admin_dashboard'))
+    
+    stmt = build_export_query(kind, start_date, end_date, request.args.get('status') or None)
+    headers = EXPORTS[kind]['headers']
+    filename = f"{kind}-{datetime.utcnow().strftime('%Y%m%d_%H%M%S')}"
+    
+    if fmt == 'csv':
+        body = iter_csv_gzip(headers, stream_rows(stmt))
+        mimetype = 'application/gzip'
+        filename += '.csv.gz'
+    else:
+        body = iter_xlsx(headers, stream_rows(stmt))
+        mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+        filename += '.xlsx'
+    
+    app.logger.info("Admin %s exporting %s as %s", current_user.id, kind, fmt)
+    return Response(
+        stream_with_context(body),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename="{filename}"'}
+    )
+
+@app.route('/admin/reports')
+@login_required
+def admin_reports():
+    """Revenue and enrollment per course and coupon, read from the daily rollups"""
+    if current_user.role != 'admin' or not current_user.admin_approved:
+        flash('Access denied.', 'error')
+        return redirect(url_for('index'))
+    
+    try:
+        end = request.args.get('end')
+        end_date = datetime.strptime(end, '%Y-%m-%d').date() if end else datetime.utcnow().date()
+        start = request.args.get('start')
+        start_date = datetime.strptime(start, '%Y-%m-%d').date() if start else end_date - timedelta(days=29)
+    except ValueError:
+        flash('Dates must be in YYYY-MM-DD format.', 'error')
+        return redirect(url_for('admin_reports'))
+    
+    courses = course_report(start_date, end_date)
+    totals = {
+        'applications': sum(row.applications for row in courses),
+        'paid_count': sum(row.paid_count for row in courses),
+        'gross': sum(row.gross for row in courses),
+        'discount': sum(row.discount for row in courses),
+        'net': sum(row.net for row in courses),
+    }
+    return render_template('admin/reports.html',
+                         start_date=start_date,
+                         end_date=end_date,
+                         courses=courses,
+                         coupons=coupon_report(start_date, end_date),
+                         days=daily_series(start_date, end_date),
+                         totals=totals)
+
 # Coupon Management Routes
 @app.route('/admin/coupons')
 @login_required
@@ -729,6 +1372,34 @@ def toggle_coupon_status(coupon_id):
     flash(f'Coupon "{coupon.code}" {status} successfully!', 'success')
     return redirect(url_for('admin_coupons'))
 
+@app.route('/admin/coupons/bulk', methods=['POST'])
+@login_required
+def bulk_coupons():
+    """Activate, deactivate or delete many coupons at once"""
+    if current_user.role != 'admin' or not current_user.admin_approved:
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    try:
+        action, ids = get_bulk_request()
+    except (TypeError, ValueError):
+        return jsonify({'success': False, 'message': 'Invalid coupon ids'}), 400
+    
+    if not ids:
+        return jsonify({'success': False, 'message': 'No coupons selected'}), 400
+    
+    if action == 'activate':
+        affected = bulk_update(Coupon, ids, is_active=True)
+    elif action == 'deactivate':
+        affected = bulk_update(Coupon, ids, is_active=False)
+    elif action == 'delete':
+        # Mirrors the ORM cascade from Coupon.usages
+        affected = bulk_delete(Coupon, ids, dependents=[(CouponUsage, CouponUsage.coupon_id)])
+    else:
+        return jsonify({'success': False, 'message': 'Unknown action'}), 400
+    
+    app.logger.info("Admin %s bulk %s on %s coupons", current_user.id, action, affected)
+    return jsonify({'success': True, 'action': action, 'requested': len(ids), 'affected': affected})
+
 # Coupon Validation API
 @app.route('/api/validate-coupon', methods=['POST'])
 @login_required
@@ -745,71 +1416,149 @@ def validate_coupon():
         # Get course
         course = Course.query.get_or_404(course_id)
         
-        # Find coupon
-        coupon = Coupon.query.filter_by(code=code, is_active=True).first()
-        if not coupon:
-            return jsonify({'success': False, 'message': 'Invalid coupon code'}), 400
-        
-        # Check if coupon is still valid
-        now = datetime.utcnow()
-        if coupon.valid_until and coupon.valid_until < now:
-            return jsonify({'success': False, 'message': 'Coupon has expired'}), 400
-        
-        if coupon.valid_from > now:
-            return jsonify({'success': False, 'message': 'Coupon is not yet valid'}), 400
-        
-        # Check minimum amount
-        if course.price < coupon.min_amount:
-            return jsonify({'success': False, 'message': f'Minimum order amount of ₦{coupon.min_amount:,.2f} required'}), 400
-        
-        # Check usage limits
-        if coupon.usage_limit and coupon.used_count >= coupon.usage_limit:
-            return jsonify({'success': False, 'message': 'Coupon usage limit reached'}), 400
+        try:
+            quote = quote_coupon(course, code, current_user.id)
+        except ValueError as e:
+            return jsonify({'success': False, 'message': str(e)}), 400
         
-        # Check user usage limit
-        user_usage_count = CouponUsage.query.filter_by(coupon_id=coupon.id, user_id=current_user.id).count()
-        if user_usage_count >= coupon.user_limit:
-            return jsonify({'success': False, 'message': 'You have already used this coupon'}), 400
-        
-        # Calculate discount
-        if coupon.discount_type == 'percentage':
-            discount_amount = (course.price * coupon.discount_value) / 100
-            if coupon.max_discount:
-                discount_amount = min(discount_amount, coupon.max_discount)
-        else:  # fixed
-            discount_amount = min(coupon.discount_value, course.price)
-        
-        final_price = course.price - discount_amount
-        
-        return jsonify({
-            'success': True,
-            'coupon': {
-                'id': coupon.id,
-                'code': coupon.code,
-                'description': coupon.description,
-                'discount_type': coupon.discount_type,
-                'discount_value': coupon.discount_value,
-                'discount_amount': discount_amount,
-                'original_price': course.price,
-                'final_price': final_price
-            }
-        })
+        return jsonify({'success': True, 'coupon': quote})
         
     except Exception as e:
-        app.logger.error(f"Error validating coupon: {str(e)}")
+        app.logger.error("Error validating coupon: %s", e)
         return jsonify({'success': False, 'message': 'Error validating coupon'}), 500
 
+@app.route('/api/search/<any(courses, users, messages):kind>')
+def search_api(kind):
+    """Ranked search results as JSON; users and messages are admin only"""
+    if kind != 'courses' and not (current_user.is_authenticated and current_user.role == 'admin'):
+        return jsonify({'success': False, 'message': 'Access denied'}), 403
+    
+    q = request.args.get('q', '').strip()
+    if not q:
+        return jsonify({'success': False, 'message': 'Search query is required'}), 400
+    
+    results = search(kind, q, page=request.args.get('page', 1, type=int),
+                     per_page=request.args.get('per_page', type=int))
+    if kind == 'courses':
+        items = [{'id': course.id, 'title': course.title, 'description': course.description,
+                  'duration': course.duration, 'price': course.price, 'image_url': course.image_url,
+                  'url': url_for('course_detail', course_id=course.id)} for course in results['items']]
+    elif kind == 'users':
+        items = [{'id': user.id, 'name': user.name, 'email': user.email, 'role': user.role,
+                  'created_at': user.created_at.isoformat() if user.created_at else None}
+                 for user in results['items']]
+    else:
+        items = [{'id': message.id, 'name': message.name, 'email': message.email,
+                  'subject': message.subject, 'is_read': message.is_read,
+                  'created_at': message.created_at.isoformat() if message.created_at else None}
+                 for message in results['items']]
+    
+    return jsonify({'success': True, 'query': q, 'results': items, 'page': results['page'],
+                    'per_page': results['per_page'], 'has_more': results['has_more']})
+
+# JSON API (v1): read-only, with ?fields=a,b selection and ?cursor=&limit= pagination
+@app.route('/api/v1/courses')
+def api_courses():
+    """Courses in id order"""
+    try:
+        names = select_fields(request.args.get('fields'), COURSE_FIELDS)
+        after = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    limit = page_limit(request.args.get('limit', type=int))
+    query = Course.query.options(load_fields(COURSE_FIELDS, names)).order_by(Course.id)
+    if after is not None:
+        query = query.filter(Course.id > after)
+    return json_response(paginate(query.limit(limit + 1).all(), limit, COURSE_FIELDS, names), public=True)
+
+@app.route('/api/v1/courses/<int:course_id>')
+def api_course(course_id):
+    try:
+        names = select_fields(request.args.get('fields'), COURSE_FIELDS)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    course = Course.query.options(load_fields(COURSE_FIELDS, names)).filter_by(id=course_id).first()
+    if course is None:
+        return error_response('Course not found', 404)
+    return json_response({'data': serialize(course, COURSE_FIELDS, names)}, public=True)
+
+@app.route('/api/v1/courses/<int:course_id>/pricing')
+def api_course_pricing(course_id):
+    """Price of a course, with ?coupon=CODE applied if given"""
+    course = db.session.get(Course, course_id)
+    if course is None:
+        return error_response('Course not found', 404)
+    
+    pricing = {'course_id': course.id, 'original_price': course.price, 'discount_amount': 0,
+               'final_price': course.price, 'coupon': None}
+    code = request.args.get('coupon', '').upper().strip()
+    if code:
+        user_id = current_user.id if current_user.is_authenticated else None
+        try:
+            quote = quote_coupon(course, code, user_id)
+        except ValueError as e:
+            return error_response(str(e), 400)
+        pricing.update(discount_amount=quote['discount_amount'], final_price=quote['final_price'],
+                       coupon={'code': quote['code'], 'description': quote['description'],
+                               'discount_type': quote['discount_type'], 'discount_value': quote['discount_value']})
+    return json_response({'data': pricing}, public=not code)
+
+def my_applications_query(names):
+    """The current user's applications, loading only what the selected fields need"""
+    query = Application.query.options(load_fields(APPLICATION_FIELDS, names)).filter(
+        Application.user_id == current_user.id,
+        Application.payment_status != 'abandoned'
+    )
+    if 'course' in names:
+        query = query.options(joinedload(Application.course).load_only(Course.id, Course.title))
+    return query
+
+@app.route('/api/v1/me/applications')
+def api_my_applications():
+    """The current user's applications, newest first"""
+    if not current_user.is_authenticated:
+        return error_response('Authentication required', 401)
+    try:
+        names = select_fields(request.args.get('fields'), APPLICATION_FIELDS)
+        before = decode_cursor(request.args.get('cursor'))
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    limit = page_limit(request.args.get('limit', type=int))
+    query = my_applications_query(names).order_by(Application.id.desc())
+    if before is not None:
+        query = query.filter(Application.id < before)
+    return json_response(paginate(query.limit(limit + 1).all(), limit, APPLICATION_FIELDS, names))
+
+@app.route('/api/v1/me/applications/<int:application_id>')
+def api_my_application(application_id):
+    if not current_user.is_authenticated:
+        return error_response('Authentication required', 401)
+    try:
+        names = select_fields(request.args.get('fields'), APPLICATION_FIELDS)
+    except ValueError as e:
+        return error_response(str(e), 400)
+    
+    application = my_applications_query(names).filter(Application.id == application_id).first()
+    if application is None:
+        return error_response('Application not found', 404)
+    return json_response({'data': serialize(application, APPLICATION_FIELDS, names)})
+
 # Paystack Payment Routes
 @app.route('/payment/initialize', methods=['POST'])
 @login_required
 def initialize_payment():
-    """Initialize Paystack payment"""
+    """Initialize Paystack payment, reusing a pending one for the same amount and coupon"""
     try:
         application_id = request.form.get('application_id')
         if not application_id:
             return jsonify({'success': False, 'message': 'Application ID is required'}), 400
         
-        application = Application.query.get_or_404(application_id)
+        # Lock the application so concurrent initializations (double clicks,
+        # refreshes) run one at a time and later ones reuse the first
+        application = Application.query.filter_by(id=application_id).with_for_update().first_or_404()
         
         # Check if user owns this application
         if application.user_id != current_user.id:
@@ -859,9 +1608,32 @@ def initialize_payment():
         application.original_price = application.course.price
         application.discount_amount = discount_amount
         application.final_price = final_price
-        if coupon:
-            application.coupon_id = coupon.id
-        db.session.commit()
+        application.coupon_id = coupon.id if coupon else None
+        invalidate_dashboard(application.user_id)
+        if application.payment_status != 'pending':
+            adjust_counters(pending_payments=1)
+            application.payment_status = 'pending'
+        
+        # Same application, amount and coupon as a still-valid earlier
+        # initialization: send the user back to it without calling Paystack
+        idempotency_key = payment_idempotency_key(application, coupon)
+        payment_ref = PaymentReference.query.filter(
+            PaymentReference.application_id == application.id,
+            PaymentReference.idempotency_key == idempotency_key,
+            PaymentReference.status == 'pending',
+            PaymentReference.authorization_url.isnot(None),
+            PaymentReference.expires_at > datetime.utcnow()
+        ).order_by(PaymentReference.created_at.desc()).first()
+        
+        if payment_ref:
+            application.payment_reference = payment_ref.reference
+            db.session.commit()
+            return jsonify({
+                'success': True,
+                'authorization_url': payment_ref.authorization_url,
+                'reference': payment_ref.reference,
+                'reused': True
+            })
         
         # Generate unique reference
         reference = f"PAY_{uuid.uuid4().hex[:10].upper()}"
@@ -885,22 +1657,39 @@ def initialize_payment():
             metadata=metadata
         )
         
+        # Keep every reference, so a payment made with any of them can be verified
+        payment_ref = PaymentReference(
+            application_id=application.id,
+            reference=reference,
+            idempotency_key=idempotency_key,
+            amount=final_price,
+            discount_amount=discount_amount,
+            coupon_id=application.coupon_id,
+            status='pending' if result['success'] else 'failed'
+        )
+        db.session.add(payment_ref)
+        
         if result['success']:
+            payment_ref.authorization_url = result['data']['authorization_url']
+            payment_ref.access_code = result['data'].get('access_code')
+            payment_ref.expires_at = datetime.utcnow() + timedelta(seconds=app.config['PAYMENT_AUTHORIZATION_TTL'])
+            
             # Update application with payment reference
             application.payment_reference = reference
-            application.payment_status = 'pending'
             db.session.commit()
             
             return jsonify({
                 'success': True,
-                'authorization_url': result['data']['authorization_url'],
+                'authorization_url': payment_ref.authorization_url,
                 'reference': reference
             })
         else:
+            db.session.commit()
             return jsonify({'success': False, 'message': result['message']}), 400
             
     except Exception as e:
-        app.logger.error(f"Error initializing payment: {str(e)}")
+        db.session.rollback()
+        app.logger.error("Error initializing payment: %s", e)
         return jsonify({'success': False, 'message': f'An error occurred: {str(e)}'}), 500
 
 @app.route('/payment/verify/<reference>')
@@ -909,7 +1698,7 @@ def verify_payment(reference):
     """Verify Paystack payment"""
     try:
         # Find application by payment reference
-        application = Application.query.filter_by(payment_reference=reference).first()
+        application, payment_ref = find_payment(reference)
         if not application:
             flash('Payment reference not found.', 'error')
             return redirect(url_for('index'))
@@ -927,46 +1716,37 @@ def verify_payment(reference):
         
         if result['success']:
             # Update application status
-            application.payment_status = 'completed'
-            application.paid_at = datetime.utcnow()
+            already_paid = application.payment_status == 'completed'
+            apply_payment_reference(application, payment_ref, reference)
+            mark_payment_completed(application)
             
             # Record coupon usage if applicable
-            if application.coupon_id:
-                coupon = Coupon.query.get(application.coupon_id)
-                if coupon:
-                    # Update coupon usage count
-                    coupon.used_count += 1
-                    
-                    # Create coupon usage record
-                    coupon_usage = CouponUsage(
-                        coupon_id=coupon.id,
-                        user_id=application.user_id,
-                        application_id=application.id,
-                        discount_amount=application.discount_amount
-                    )
-                    db.session.add(coupon_usage)
+            if not already_paid:
+                record_coupon_usage(application)
             
             db.session.commit()
             
             # Send payment confirmation email
-            try:
-                user = User.query.get(application.user_id)
-                course = Course.query.get(application.course_id)
-                email_service.send_payment_confirmation_email(user, course, application)
-            except Exception as e:
-                app.logger.error(f"Error sending payment confirmation email: {str(e)}")
+            if not already_paid:
+                try:
+                    user = User.query.get(application.user_id)
+                    course = Course.query.get(application.course_id)
+                    email_service.send_payment_confirmation_email(user, course, application)
+                except Exception as e:
+                    app.logger.error("Error sending payment confirmation email: %s", e)
             
             flash('Payment successful! Your application has been submitted. You will receive a confirmation email shortly.', 'success')
             return redirect(url_for('course_detail', course_id=application.course_id))
         else:
-            application.payment_status = 'failed'
+            fail_payment_reference(application, payment_ref, reference)
             db.session.commit()
             
             flash('Payment verification failed. Please try again.', 'error')
             return redirect(url_for('payment', application_id=application.id))
             
     except Exception as e:
-        app.logger.error(f"Error verifying payment: {str(e)}")
+        db.session.rollback()
+        app.logger.error("Error verifying payment: %s", e)
         flash('An error occurred during payment verification.', 'error')
         return redirect(url_for('index'))
 
@@ -979,7 +1759,7 @@ def payment_callback():
             return jsonify({'success': False, 'message': 'Reference not provided'}), 400
         
         # Find application by payment reference
-        application = Application.query.filter_by(payment_reference=reference).first()
+        application, payment_ref = find_payment(reference)
         if not application:
             return jsonify({'success': False, 'message': 'Application not found'}), 404
         
@@ -991,27 +1771,30 @@ def payment_callback():
         
         if result['success']:
             # Update application status
-            application.payment_status = 'completed'
-            application.paid_at = datetime.utcnow()
+            already_paid = application.payment_status == 'completed'
+            apply_payment_reference(application, payment_ref, reference)
+            mark_payment_completed(application)
             db.session.commit()
             
             # Send payment confirmation email
-            try:
-                user = User.query.get(application.user_id)
-                course = Course.query.get(application.course_id)
-                email_service.send_payment_confirmation_email(user, course, application)
-            except Exception as e:
-                app.logger.error(f"Error sending payment confirmation email: {str(e)}")
+            if not already_paid:
+                try:
+                    user = User.query.get(application.user_id)
+                    course = Course.query.get(application.course_id)
+                    email_service.send_payment_confirmation_email(user, course, application)
+                except Exception as e:
+                    app.logger.error("Error sending payment confirmation email: %s", e)
             
             return jsonify({'success': True, 'message': 'Payment verified successfully'})
         else:
-            application.payment_status = 'failed'
+            fail_payment_reference(application, payment_ref, reference)
             db.session.commit()
             
             return jsonify({'success': False, 'message': 'Payment verification failed'})
             
     except Exception as e:
-        app.logger.error(f"Error in payment callback: {str(e)}")
+        db.session.rollback()
+        app.logger.error("Error in payment callback: %s", e)
         return jsonify({'success': False, 'message': 'An error occurred'}), 500
 
 if __name__ == '__main__':
@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Backfill Daily Rollups
+Rebuilds the daily course and coupon stats from the application table.
+
+Usage:
+    python backfill_rollups.py                       # everything
+    python backfill_rollups.py 2025-01-01            # from a day to today
+    python backfill_rollups.py 2025-01-01 2025-01-31 # a closed range
+"""
+
+import sys
+from datetime import datetime
+from app import app
+from utils.rollup_service import backfill
+
+def backfill_rollups(start=None, end=None):
+    """Rebuild the daily stats between two days (inclusive)"""
+    with app.app_context():
+        days = backfill(start, end)
+        print(f"✅ Rebuilt {days} days of stats")
+
+if __name__ == '__main__':
+    dates = [datetime.strptime(arg, '%Y-%m-%d').date() for arg in sys.argv[1:3]]
+    backfill_rollups(*dates)
@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Compression Benchmark
+Renders the course list and the admin user list, then measures how many
+bytes Jinja whitespace trimming, minification, gzip and Brotli save and what
+each costs in CPU time.
+
+Usage:
+    python benchmarks/bench_compression.py [--courses 60] [--users 2000] [--repeat 20]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_compression.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from app import app, db  # noqa: E402
+from models import User, Course  # noqa: E402
+from utils.compression_service import minify_html, GzipEncoder, BrotliEncoder, brotli  # noqa: E402
+
+ADMIN_EMAIL = 'bench-admin@smiict.com'
+
+
+def seed(courses, users):
+    with app.app_context():
+        db.create_all()
+        if User.query.filter_by(email=ADMIN_EMAIL).first():
+            return
+        db.session.add(User(name='Bench Admin', email=ADMIN_EMAIL, password_hash='x',
+                            role='admin', admin_approved=True))
+        for i in range(courses):
+            db.session.add(Course(title=f'Course {i}', description='Practical skills for the modern workplace. ' * 6,
+                                  duration='12 weeks', price=45000 + i))
+        for i in range(users):
+            db.session.add(User(name=f'Student {i}', email=f'student{i}@example.com', password_hash='x',
+                                role='student', admin_approved=True))
+        db.session.commit()
+
+
+def render(path, trim):
+    """Fetch a page uncompressed and unminified, with or without Jinja trimming"""
+    app.config['COMPRESS_RESPONSES'] = False
+    app.config['HTML_MINIFY'] = False
+    app.jinja_env.trim_blocks = trim
+    app.jinja_env.lstrip_blocks = trim
+    app.jinja_env.cache.clear()
+    client = app.test_client()
+    with app.app_context():
+        admin_id = User.query.filter_by(email=ADMIN_EMAIL).first().id
+    with client.session_transaction() as sess:
+        sess['_user_id'] = str(admin_id)
+        sess['_fresh'] = True
+    return client.get(path).get_data(as_text=True)
+
+
+def timed(fn, repeat):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return result, (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--courses', type=int, default=60, help='Courses on the home page')
+    parser.add_argument('--users', type=int, default=2000, help='Users in the database')
+    parser.add_argument('--repeat', type=int, default=20, help='Runs per measurement')
+    args = parser.parse_args()
+
+    seed(args.courses, args.users)
+    encoders = [(f'gzip-{level}', lambda level=level: GzipEncoder(level)) for level in (1, 6, 9)]
+    if brotli is not None:
+        encoders += [(f'br-{quality}', lambda quality=quality: BrotliEncoder(quality)) for quality in (1, 5, 11)]
+    else:
+        print("Brotli is not installed, only gzip is measured")
+
+    for path in ('/', '/admin/users'):
+        plain = render(path, trim=False)
+        trimmed = render(path, trim=True)
+        minified, minify_ms = timed(lambda: minify_html(trimmed), args.repeat)
+
+        print(f"\n{path}")
+        print(f"{'step':>22} {'bytes':>10} {'saved':>8} {'ms':>8}")
+        print(f"{'rendered':>22} {len(plain.encode()):>10}")
+        print(f"{'trim_blocks':>22} {len(trimmed.encode()):>10} {1 - len(trimmed) / len(plain):>7.1%}")
+        print(f"{'minified':>22} {len(minified.encode()):>10} {1 - len(minified) / len(plain):>7.1%} {minify_ms:>8.2f}")
+        for label, page in (('', trimmed), (' + minified', minified)):
+            body = page.encode('utf-8')
+            for name, make in encoders:
+                compressed, ms = timed(lambda: make().compress(body), args.repeat)
+                print(f"{name + label:>22} {len(compressed):>10} {1 - len(compressed) / len(plain.encode()):>7.1%} "
+                      f"{ms:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
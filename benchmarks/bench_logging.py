@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Logging Overhead Benchmark
+Measures what logging adds to request latency when the log sink is slow,
+comparing handlers that write on the request thread with the queued pipeline.
+
+Usage:
+    python benchmarks/bench_logging.py [--clients 8] [--requests 500] [--lines 5] [--sink-ms 1]
+"""
+
+import argparse
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_logging.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from app import app  # noqa: E402
+from utils.structured_logging import JsonFormatter, NonBlockingQueueHandler, ContextFilter  # noqa: E402
+
+bench_logger = logging.getLogger('bench')
+
+
+class SlowSink(logging.Handler):
+    """Formats records and waits as long as a write to a busy disk or socket would"""
+
+    def __init__(self, delay):
+        super().__init__()
+        self.delay = delay
+        self.written = 0
+        self.setFormatter(JsonFormatter())
+
+    def emit(self, record):
+        self.format(record)
+        time.sleep(self.delay)
+        self.written += 1
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def configure(mode, sink):
+    """Point the bench logger at the sink directly, through the queue, or nowhere"""
+    bench_logger.handlers.clear()
+    bench_logger.propagate = False
+    bench_logger.setLevel(logging.INFO)
+    if mode == 'off':
+        bench_logger.setLevel(logging.WARNING)
+        return None, None
+    if mode == 'sync':
+        sink.addFilter(ContextFilter())
+        bench_logger.addHandler(sink)
+        return None, None
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=app.config['LOG_QUEUE_SIZE']))
+    queue_handler.addFilter(ContextFilter())
+    bench_logger.addHandler(queue_handler)
+    listener = logging.handlers.QueueListener(queue_handler.queue, sink)
+    listener.start()
+    return listener, queue_handler
+
+
+def run(mode, clients, requests_per_client, sink_delay):
+    """Run one round of requests and return latency stats"""
+    sink = SlowSink(sink_delay)
+    listener, queue_handler = configure(mode, sink)
+    latencies = []
+    lock = threading.Lock()
+
+    def client_worker():
+        client = app.test_client()
+        samples = []
+        for _ in range(requests_per_client):
+            started = time.perf_counter()
+            client.get('/_bench/log')
+            samples.append((time.perf_counter() - started) * 1000)
+        with lock:
+            latencies.extend(samples)
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=client_worker) for _ in range(clients)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    if listener:
+        listener.stop()
+
+    return {
+        'rps': len(latencies) / elapsed,
+        'p50': percentile(latencies, 50),
+        'p99': percentile(latencies, 99),
+        'written': sink.written,
+        'dropped': queue_handler.dropped if queue_handler else 0,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--clients', type=int, default=8, help='Concurrent clients')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per client')
+    parser.add_argument('--lines', type=int, default=5, help='Info records logged per request')
+    parser.add_argument('--sink-ms', type=float, default=1, help='Time the sink takes per record')
+    args = parser.parse_args()
+
+    @app.route('/_bench/log')
+    def bench_log():
+        for line in range(args.lines):
+            bench_logger.info("Bench request line %s of %s", line + 1, args.lines)
+        return 'ok'
+
+    print(f"Logging overhead: {args.clients} clients x {args.requests} requests, "
+          f"{args.lines} lines per request, sink {args.sink_ms:.1f}ms per record")
+    print(f"{'mode':>6} {'req/s':>10} {'p50':>10} {'p99':>10} {'written':>9} {'dropped':>9}")
+    for mode in ('off', 'sync', 'queue'):
+        stats = run(mode, args.clients, args.requests, args.sink_ms / 1000)
+        print(f"{mode:>6} {stats['rps']:>10.1f} {stats['p50']:>8.2f}ms {stats['p99']:>8.2f}ms "
+              f"{stats['written']:>9} {stats['dropped']:>9}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Login Storm Benchmark
+Measures login throughput and the latency of non-login pages while many
+clients log in at once, with and without bounded password hashing.
+
+Usage:
+    python benchmarks/bench_login_storm.py [--logins 16] [--seconds 10]
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'bench_login.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite:///{DB_PATH}')
+
+from app import app, db  # noqa: E402
+from models import User  # noqa: E402
+from utils.password_service import PasswordService  # noqa: E402
+import app as app_module  # noqa: E402
+
+BENCH_EMAIL = 'bench@smiict.com'
+BENCH_PASSWORD = 'bench-password'
+
+
+def percentile(samples, pct):
+    if not samples:
+        return 0.0
+    samples = sorted(samples)
+    index = min(len(samples) - 1, int(round(pct / 100 * (len(samples) - 1))))
+    return samples[index]
+
+
+def run_storm(concurrency, login_threads, seconds):
+    """Run one storm with the given hashing concurrency and return its stats"""
+    with app.app_context():
+        app.config['PASSWORD_HASH_CONCURRENCY'] = concurrency
+        app.config['PASSWORD_HASH_TIMEOUT'] = seconds
+        app_module.password_service = PasswordService()
+
+    stop = threading.Event()
+    login_count = [0]
+    lock = threading.Lock()
+    page_latencies = []
+
+    def login_worker():
+        client = app.test_client()
+        while not stop.is_set():
+            client.post('/login', data={'email': BENCH_EMAIL, 'password': BENCH_PASSWORD})
+            client.get('/logout')
+            with lock:
+                login_count[0] += 1
+
+    def page_worker():
+        client = app.test_client()
+        while not stop.is_set():
+            started = time.perf_counter()
+            client.get('/contact')
+            page_latencies.append((time.perf_counter() - started) * 1000)
+            time.sleep(0.01)
+
+    threads = [threading.Thread(target=login_worker) for _ in range(login_threads)]
+    threads.append(threading.Thread(target=page_worker))
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+
+    return {
+        'logins_per_sec': login_count[0] / seconds,
+        'p50': percentile(page_latencies, 50),
+        'p95': percentile(page_latencies, 95),
+        'p99': percentile(page_latencies, 99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--logins', type=int, default=16, help='Concurrent login clients')
+    parser.add_argument('--seconds', type=float, default=10, help='Duration of each storm')
+    args = parser.parse_args()
+
+    with app.app_context():
+        db.create_all()
+        if not User.query.filter_by(email=BENCH_EMAIL).first():
+            db.session.add(User(
+                name='Bench User',
+                email=BENCH_EMAIL,
+                password_hash=app_module.password_service.hash_password(BENCH_PASSWORD),
+                role='student',
+                admin_approved=True
+            ))
+            db.session.commit()
+
+    cpus = os.cpu_count() or 1
+    print(f"Login storm: {args.logins} login clients, {args.seconds:.0f}s per run, {cpus} CPUs")
+    print(f"Hash method: {app.config['PASSWORD_HASH_METHOD']}")
+    print(f"{'hash slots':>12} {'logins/s':>10} {'/contact p50':>14} {'p95':>10} {'p99':>10}")
+    for concurrency in sorted({args.logins, max(1, cpus // 2), 1}, reverse=True):
+        stats = run_storm(concurrency, args.logins, args.seconds)
+        print(f"{concurrency:>12} {stats['logins_per_sec']:>10.1f} "
+              f"{stats['p50']:>12.1f}ms {stats['p95']:>8.1f}ms {stats['p99']:>8.1f}ms")
+
+
+if __name__ == '__main__':
+    main()
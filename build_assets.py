@@ -0,0 +1,433 @@
+#!/usr/bin/env python3
+"""
+Asset build for SMIICT Institute Course Platform
+Subsets the Inter and Font Awesome fonts to what the templates use and writes
+fingerprinted WOFF2 files, a fonts/icons stylesheet and a manifest to
+static/build/, which base.html serves instead of the Google Fonts and cdnjs CSS.
+
+It also extracts the critical CSS of every template that marks its fold with
+{# below the fold #}: the rules from our stylesheets that the navigation and
+the content above the marker use. base.html inlines it and loads the full
+stylesheets without blocking. The build fails if any page's critical CSS is
+over budget; --check runs only that check, without writing anything.
+
+Subsetting needs fonttools and brotli (pip install fonttools brotli); without
+them only the critical CSS is built. The source fonts are downloaded once into
+.asset-cache/, or can be given as local files.
+
+Usage:
+    python build_assets.py [--fontawesome fontawesome-free-6.0.0.tgz] [--inter Inter-3.19.zip]
+    python build_assets.py --check [--budget 14336]
+"""
+
+import argparse
+import hashlib
+import io
+import json
+import os
+import re
+import shutil
+import sys
+import tarfile
+import zipfile
+
+import requests
+
+from utils.asset_service import PAGE_STYLESHEETS
+
+try:
+    from fontTools import subset
+except ImportError:
+    subset = None
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+TEMPLATE_DIR = os.path.join(ROOT, 'templates')
+STATIC_DIR = os.path.join(ROOT, 'static')
+BUILD_DIR = os.path.join(STATIC_DIR, 'build')
+CACHE_DIR = os.path.join(ROOT, '.asset-cache')
+
+FONTAWESOME_URL = 'https://registry.npmjs.org/@fortawesome/fontawesome-free/-/fontawesome-free-6.0.0.tgz'
+INTER_URL = 'https://github.com/rsms/inter/releases/download/v3.19/Inter-3.19.zip'
+
+# Tailwind font-weight classes and the Inter style file for each weight
+WEIGHT_CLASSES = {
+    'font-thin': 100, 'font-extralight': 200, 'font-light': 300, 'font-normal': 400,
+    'font-medium': 500, 'font-semibold': 600, 'font-bold': 700, 'font-extrabold': 800, 'font-black': 900,
+}
+INTER_STYLES = {
+    100: 'Thin', 200: 'ExtraLight', 300: 'Light', 400: 'Regular', 500: 'Medium',
+    600: 'SemiBold', 700: 'Bold', 800: 'ExtraBold', 900: 'Black',
+}
+# Weights preloaded on every page; the rest load when first used
+PRELOAD_WEIGHTS = (400, 600)
+
+# Latin text plus the punctuation and currency signs course pages use
+TEXT_UNICODES = list(range(0x20, 0x7F)) + list(range(0xA0, 0x180)) + list(range(0x2010, 0x2030)) + \
+    [0x20A6, 0x20AC, 0x2122, 0x2212]
+
+# Font Awesome helper classes and the CSS each one needs
+ICON_UTILITIES = {
+    'fa-fw': '.fa-fw{text-align:center;width:1.25em}',
+    'fa-xs': '.fa-xs{font-size:.75em;line-height:.0833em;vertical-align:.125em}',
+    'fa-sm': '.fa-sm{font-size:.875em;line-height:.0714em;vertical-align:.0536em}',
+    'fa-lg': '.fa-lg{font-size:1.25em;line-height:.05em;vertical-align:-.075em}',
+    'fa-spin': '.fa-spin{animation:fa-spin 2s linear infinite}'
+               '@keyframes fa-spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}',
+    'fa-pulse': '.fa-pulse{animation:fa-spin 1s steps(8) infinite}'
+                '@keyframes fa-spin{0%{transform:rotate(0)}to{transform:rotate(1turn)}}',
+}
+ICON_UTILITIES.update({f'fa-{n}x': f'.fa-{n}x{{font-size:{n}em}}' for n in range(1, 11)})
+
+# Critical CSS has to fit in the first round trip with the HTML around it
+CRITICAL_CSS_BUDGET = 14 * 1024
+FOLD_MARKER = '{# below the fold #}'
+CONTENT_BLOCK = '{% block content %}'
+
+ICON_CLASS = re.compile(r'\bfa-[a-z0-9-]+\b')
+STYLE_CLASS = re.compile(r'\bfa([srb])\b')
+CSS_WEIGHT = re.compile(r'font-weight:\s*(\d{3}|bold|normal)')
+
+CSS_COMMENT = re.compile(r'/\*.*?\*/', re.DOTALL)
+JINJA_TAG = re.compile(r'{[{%#].*?[}%#]}', re.DOTALL)
+CLASS_ATTRIBUTE = re.compile(r'\bclass="([^"]*)"')
+ID_ATTRIBUTE = re.compile(r'\bid="([^"{]+)"')
+HTML_TAG = re.compile(r'<([a-zA-Z][a-zA-Z0-9]*)')
+PSEUDO_OR_ATTRIBUTE = re.compile(r'::?[\w-]+(\([^)]*\))?|\[[^\]]*\]')
+SIMPLE_SELECTOR = re.compile(r'([.#]?)(-?[_a-zA-Z][\w-]*)')
+CSS_URL = re.compile(r'url\([\'"]?([^\'")]+)[\'"]?\)')
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.avif', '.gif', '.svg')
+
+
+def scan_sources():
+    """
+    Find the icons, icon styles, font weights and characters the site uses
+
+    Returns:
+        tuple: (icon class names, icon styles, weights, extra unicodes)
+    """
+    icons, styles, weights, chars = set(), set(), {400, 700}, set()
+    paths = []
+    for folder in (TEMPLATE_DIR, os.path.join(STATIC_DIR, 'js'), os.path.join(STATIC_DIR, 'css')):
+        for dirpath, dirnames, filenames in os.walk(folder):
+            # Emails are read in mail clients, which never see our fonts
+            dirnames[:] = [name for name in dirnames if name != 'emails']
+            paths += [os.path.join(dirpath, name) for name in filenames if name.endswith(('.html', '.js', '.css'))]
+
+    for path in paths:
+        with open(path, encoding='utf-8') as f:
+            source = f.read()
+        icons.update(ICON_CLASS.findall(source))
+        styles.update(STYLE_CLASS.findall(source))
+        for name, weight in WEIGHT_CLASSES.items():
+            if re.search(rf'\b{name}\b', source):
+                weights.add(weight)
+        for value in CSS_WEIGHT.findall(source):
+            weights.add({'bold': 700, 'normal': 400}.get(value) or int(value))
+        if path.endswith('.html'):
+            chars.update(ord(char) for char in source if ord(char) > 0x7F)
+    return icons, styles or {'s'}, sorted(weights), chars
+
+
+def fetch(url, local=None):
+    """Return the bytes of a source archive, downloading it into the cache once"""
+    if local:
+        with open(local, 'rb') as f:
+            return f.read()
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, url.rsplit('/', 1)[-1])
+    if not os.path.exists(path):
+        print(f"Downloading {url}")
+        response = requests.get(url, timeout=60)
+        response.raise_for_status()
+        with open(path, 'wb') as f:
+            f.write(response.content)
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_fontawesome(archive):
+    """Return (icons.json metadata, {style letter: font bytes}) from the npm package"""
+    with tarfile.open(fileobj=io.BytesIO(archive)) as tar:
+        def member(name):
+            return tar.extractfile(f'package/{name}').read()
+        metadata = json.loads(member('metadata/icons.json'))
+        fonts = {
+            's': member('webfonts/fa-solid-900.ttf'),
+            'r': member('webfonts/fa-regular-400.ttf'),
+            'b': member('webfonts/fa-brands-400.ttf'),
+        }
+    return metadata, fonts
+
+
+def read_inter(archive, weight):
+    """Return the font bytes for one weight from the Inter release zip"""
+    wanted = f'Inter-{INTER_STYLES[weight]}'
+    with zipfile.ZipFile(io.BytesIO(archive)) as bundle:
+        names = bundle.namelist()
+        for extension in ('.woff2', '.otf', '.ttf'):
+            for name in names:
+                if os.path.basename(name) == wanted + extension:
+                    return bundle.read(name)
+    raise SystemExit(f"Inter {INTER_STYLES[weight]} not found in the archive")
+
+
+def icon_codepoints(icons, metadata):
+    """Map each used icon class to its codepoint, resolving Font Awesome 5 aliases"""
+    by_name = {}
+    for name, icon in metadata.items():
+        by_name[name] = icon['unicode']
+        for alias in (icon.get('aliases') or {}).get('names', []):
+            by_name.setdefault(alias, icon['unicode'])
+
+    codepoints, missing = {}, []
+    for icon_class in sorted(icons - set(ICON_UTILITIES)):
+        name = icon_class[3:]
+        if name in by_name:
+            codepoints[icon_class] = by_name[name]
+        else:
+            missing.append(icon_class)
+    if missing:
+        print(f"⚠️  No Font Awesome glyph for: {', '.join(missing)}")
+    return codepoints
+
+
+def subset_font(data, unicodes):
+    """Subset a font to the given codepoints and return it as WOFF2"""
+    options = subset.Options()
+    options.flavor = 'woff2'
+    options.desubroutinize = True
+    font = subset.load_font(io.BytesIO(data), options)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=unicodes)
+    subsetter.subset(font)
+    out = io.BytesIO()
+    subset.save_font(font, out, options)
+    return out.getvalue()
+
+
+def write_fingerprinted(name, data):
+    """Write a build file with a content hash in its name and return the static-relative path"""
+    stem, extension = os.path.splitext(name)
+    digest = hashlib.sha256(data).hexdigest()[:10]
+    filename = f'{stem}.{digest}{extension}'
+    with open(os.path.join(BUILD_DIR, filename), 'wb') as f:
+        f.write(data)
+    return f'build/{filename}'
+
+
+def parse_css(source):
+    """
+    Split a stylesheet into its top-level rules
+
+    Args:
+        source (str): CSS text
+
+    Returns:
+        list: (prelude, body) pairs; at-rule bodies are left unparsed
+    """
+    source = CSS_COMMENT.sub('', source)
+    rules, depth, start, body_start = [], 0, 0, 0
+    for index, char in enumerate(source):
+        if char == '{':
+            if depth == 0:
+                prelude, body_start = source[start:index].strip(), index + 1
+            depth += 1
+        elif char == '}':
+            depth -= 1
+            if depth == 0:
+                rules.append((prelude, source[body_start:index].strip()))
+                start = index + 1
+    return rules
+
+
+def compact(declarations):
+    return re.sub(r'\s*([:;,])\s*', r'\1', ' '.join(declarations.split())).rstrip(';')
+
+
+def used_tokens(markup):
+    """Collect the classes, ids and tags a piece of template markup uses"""
+    markup = JINJA_TAG.sub(' ', markup)
+    classes = {name for value in CLASS_ATTRIBUTE.findall(markup) for name in value.split()}
+    return {
+        'classes': classes,
+        'ids': set(ID_ATTRIBUTE.findall(markup)),
+        'tags': {tag.lower() for tag in HTML_TAG.findall(markup)} | {'html', 'body'},
+    }
+
+
+def selector_matches(selector, used):
+    """True if every class, id and tag in the selector appears in the page"""
+    kinds = {'.': 'classes', '#': 'ids', '': 'tags'}
+    for prefix, name in SIMPLE_SELECTOR.findall(PSEUDO_OR_ATTRIBUTE.sub('', selector)):
+        if name not in used[kinds[prefix]]:
+            return False
+    return True
+
+
+def critical_rules(rules, used):
+    """Keep the rules (and the parts of selector lists) that apply above the fold"""
+    kept = []
+    for prelude, body in rules:
+        if prelude.startswith(('@media', '@supports')):
+            inner = critical_rules(parse_css(body), used)
+            if inner:
+                kept.append(f"{' '.join(prelude.split())}{{{''.join(inner)}}}")
+        elif not prelude.startswith('@'):
+            selectors = [' '.join(part.split()) for part in prelude.split(',') if selector_matches(part, used)]
+            if selectors:
+                kept.append(f"{','.join(selectors)}{{{compact(body)}}}")
+    return kept
+
+
+def extract_critical_css(template_name, stylesheets):
+    """
+    Build the critical CSS of a template with a fold marker
+
+    Args:
+        template_name (str): Template path relative to templates/
+        stylesheets (list): Parsed rules of each page stylesheet
+
+    Returns:
+        tuple: (critical CSS, images it references) or None without a marker
+    """
+    with open(os.path.join(TEMPLATE_DIR, template_name), encoding='utf-8') as f:
+        source = f.read()
+    if FOLD_MARKER not in source:
+        return None
+    with open(os.path.join(TEMPLATE_DIR, 'base.html'), encoding='utf-8') as f:
+        base = f.read()
+
+    above = source.split(FOLD_MARKER)[0]
+    above = above.split(CONTENT_BLOCK, 1)[-1]
+    used = used_tokens(base.split(CONTENT_BLOCK)[0] + above)
+
+    rules = [rule for sheet in stylesheets for rule in sheet]
+    css = ''.join(critical_rules(rules, used))
+    # Keyframes only come along when a kept rule animates with them
+    for prelude, body in rules:
+        if prelude.startswith('@keyframes') and re.search(rf'\b{re.escape(prelude.split()[1])}\b', css):
+            css += f"{prelude}{{{compact(body)}}}"
+    images = [url for url in CSS_URL.findall(css) if url.lower().endswith(IMAGE_EXTENSIONS)]
+    return css, images
+
+
+def build_critical_css(files, budget, write=True):
+    """
+    Extract and check the critical CSS of every template with a fold marker
+
+    Args:
+        files (dict): Manifest files, updated with each critical stylesheet
+        budget (int): Largest allowed critical CSS in bytes
+        write (bool): Write the stylesheets, or only check their size
+
+    Returns:
+        tuple: ({template: {'css': path, 'preload': [image]}}, templates over budget)
+    """
+    stylesheets = []
+    for path in PAGE_STYLESHEETS:
+        with open(os.path.join(STATIC_DIR, path), encoding='utf-8') as f:
+            stylesheets.append(parse_css(f.read()))
+
+    critical, over_budget = {}, []
+    for dirpath, dirnames, filenames in os.walk(TEMPLATE_DIR):
+        dirnames[:] = [name for name in dirnames if name != 'emails']
+        for filename in sorted(filenames):
+            template_name = os.path.relpath(os.path.join(dirpath, filename), TEMPLATE_DIR).replace(os.sep, '/')
+            result = extract_critical_css(template_name, stylesheets)
+            if result is None:
+                continue
+            css, images = result
+            size = len(css.encode('utf-8'))
+            print(f"{template_name}: {size / 1024:.1f} KB critical CSS (budget {budget / 1024:.1f} KB)")
+            if size > budget:
+                over_budget.append(template_name)
+            if write:
+                name = f"critical-{template_name.replace('/', '-').rsplit('.', 1)[0]}.css"
+                files[name] = write_fingerprinted(name, css.encode('utf-8'))
+                critical[template_name] = {'css': files[name], 'preload': images}
+    return critical, over_budget
+
+
+def build_fonts(args, files, preload):
+    """Subset the fonts and write them with the fonts/icons stylesheet"""
+    icons, styles, weights, chars = scan_sources()
+    print(f"Found {len(icons)} icon classes and font weights {', '.join(map(str, weights))}")
+
+    metadata, icon_fonts = read_fontawesome(fetch(FONTAWESOME_URL, args.fontawesome))
+    inter = fetch(INTER_URL, args.inter)
+    codepoints = icon_codepoints(icons, metadata)
+    css = []
+    text_unicodes = sorted(set(TEXT_UNICODES) | chars)
+
+    for weight in weights:
+        path = write_fingerprinted(f'inter-{weight}.woff2', subset_font(read_inter(inter, weight), text_unicodes))
+        files[f'inter-{weight}.woff2'] = path
+        if weight in PRELOAD_WEIGHTS:
+            preload.append(path)
+        css.append(f'@font-face{{font-family:"Inter";font-style:normal;font-weight:{weight};'
+                   f'font-display:swap;src:url({os.path.basename(path)}) format("woff2")}}')
+
+    # Icons are blocked briefly instead of swapped: a fallback font would
+    # draw their private-use codepoints as empty boxes
+    icon_styles = {'s': ('fa-solid-900', 900, 'Font Awesome 6 Free'),
+                   'r': ('fa-regular-400', 400, 'Font Awesome 6 Free'),
+                   'b': ('fa-brands-400', 400, 'Font Awesome 6 Brands')}
+    for style in sorted(styles):
+        name, weight, family = icon_styles[style]
+        glyphs = [int(codepoint, 16) for codepoint in codepoints.values()]
+        path = write_fingerprinted(f'{name}.woff2', subset_font(icon_fonts[style], glyphs))
+        files[f'{name}.woff2'] = path
+        preload.append(path)
+        css.append(f'@font-face{{font-family:"{family}";font-style:normal;font-weight:{weight};'
+                   f'font-display:block;src:url({os.path.basename(path)}) format("woff2")}}')
+        css.append(f'.fa{style}{{font-family:"{family}";font-weight:{weight}}}')
+
+    css.append('.fa,.fas,.far,.fab{-moz-osx-font-smoothing:grayscale;-webkit-font-smoothing:antialiased;'
+               'display:inline-block;font-style:normal;font-variant:normal;line-height:1;text-rendering:auto}')
+    css.extend(rule for name, rule in ICON_UTILITIES.items() if name in icons)
+    css.extend(f'.{icon_class}:before{{content:"\\{codepoint}"}}' for icon_class, codepoint in sorted(codepoints.items()))
+
+    files['fonts.css'] = write_fingerprinted('fonts.css', '\n'.join(css).encode('utf-8'))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--fontawesome', help='Local fontawesome-free npm tarball')
+    parser.add_argument('--inter', help='Local Inter release zip')
+    parser.add_argument('--budget', type=int, default=CRITICAL_CSS_BUDGET, help='Critical CSS budget in bytes')
+    parser.add_argument('--check', action='store_true', help='Only check critical CSS sizes')
+    args = parser.parse_args()
+
+    if args.check:
+        _, over_budget = build_critical_css({}, args.budget, write=False)
+        if over_budget:
+            print(f"❌ Critical CSS over budget: {', '.join(over_budget)}")
+            sys.exit(1)
+        print("✅ Critical CSS is within budget")
+        return
+
+    shutil.rmtree(BUILD_DIR, ignore_errors=True)
+    os.makedirs(BUILD_DIR)
+    files, preload = {}, []
+
+    if subset is None:
+        print("⚠️  fonttools is not installed (pip install fonttools brotli), fonts stay on their CDNs")
+    else:
+        build_fonts(args, files, preload)
+
+    critical, over_budget = build_critical_css(files, args.budget)
+    if over_budget:
+        shutil.rmtree(BUILD_DIR)
+        print(f"❌ Critical CSS over budget: {', '.join(over_budget)}")
+        sys.exit(1)
+
+    with open(os.path.join(BUILD_DIR, 'manifest.json'), 'w', encoding='utf-8') as f:
+        json.dump({'files': files, 'preload': preload, 'critical': critical}, f, indent=2)
+
+    total = sum(os.path.getsize(os.path.join(STATIC_DIR, path)) for path in files.values())
+    print(f"✅ Wrote {len(files)} files ({total / 1024:.1f} KB) to static/build/")
+    print("🎉 Restart the app to serve the built assets")
+
+
+if __name__ == '__main__':
+    main()
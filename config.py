@@ -13,7 +13,10 @@ class Config:
     DB_USER = os.getenv('DB_USER', 'postgres')
     DB_PASSWORD = os.getenv('DB_PASSWORD', 'password')
     
-    SQLALCHEMY_DATABASE_URI = f'postgresql+psycopg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?sslmode=require'
+    SQLALCHEMY_DATABASE_URI = os.getenv(
+        'DATABASE_URL',
+        f'postgresql+psycopg://{DB_USER}:{DB_PASSWORD}@{DB_HOST}:{DB_PORT}/{DB_NAME}?sslmode=require'
+    )
     SQLALCHEMY_TRACK_MODIFICATIONS = False
     
     # Email configuration
@@ -27,10 +30,105 @@ class Config:
     CONTACT_EMAIL = os.getenv('CONTACT_EMAIL', 'contact@smiict.com')
     CONTACT_PHONE = os.getenv('CONTACT_PHONE', '+234-XXX-XXXX')
     
+    # Compiled email template cache (defaults to the system temp directory)
+    EMAIL_TEMPLATE_CACHE_DIR = os.getenv('EMAIL_TEMPLATE_CACHE_DIR')
+    
+    # Course announcement mailer
+    ANNOUNCEMENT_BATCH_SIZE = int(os.getenv('ANNOUNCEMENT_BATCH_SIZE', 500))  # Recipients per progress checkpoint
+    ANNOUNCEMENT_RATE_LIMIT = float(os.getenv('ANNOUNCEMENT_RATE_LIMIT', 10))  # Max emails per second (0 = no cap)
+    ANNOUNCEMENT_SMTP_CONNECTIONS = int(os.getenv('ANNOUNCEMENT_SMTP_CONNECTIONS', 2))  # Pooled SMTP connections
+    
+    # Bulk admin actions
+    BULK_ACTION_CHUNK_SIZE = int(os.getenv('BULK_ACTION_CHUNK_SIZE', 1000))  # Rows per transaction
+    
+    # Chunked data backfills in migrations
+    BACKFILL_BATCH_SIZE = int(os.getenv('BACKFILL_BATCH_SIZE', 1000))  # Rows per transaction
+    BACKFILL_SLEEP = float(os.getenv('BACKFILL_SLEEP', 0.1))  # Seconds to pause between chunks
+    BACKFILL_MAX_REPLICATION_LAG = float(os.getenv('BACKFILL_MAX_REPLICATION_LAG', 10))  # Pause while replicas are further behind (seconds)
+    
+    # Background purge of deleted users
+    USER_PURGE_BATCH_SIZE = int(os.getenv('USER_PURGE_BATCH_SIZE', 500))  # Dependent rows removed per transaction
+    USER_PURGE_PAUSE = float(os.getenv('USER_PURGE_PAUSE', 0.05))  # Seconds to sleep between batches
+    
+    # Monthly partitions (Postgres) and archival of old rows
+    PARTITION_MONTHS_AHEAD = int(os.getenv('PARTITION_MONTHS_AHEAD', 3))  # Future monthly partitions to keep ready
+    ARCHIVE_AFTER_MONTHS = int(os.getenv('ARCHIVE_AFTER_MONTHS', 12))  # Archive abandoned applications and read messages older than this
+    ARCHIVE_DIR = os.getenv('ARCHIVE_DIR', 'archive')  # Where archived rows are written as .jsonl.gz
+    ADMIN_RECENT_DAYS = int(os.getenv('ADMIN_RECENT_DAYS', 90))  # Window of the admin dashboard and message list
+    
+    # Search
+    SEARCH_PER_PAGE = int(os.getenv('SEARCH_PER_PAGE', 20))
+    SEARCH_MAX_CANDIDATES = int(os.getenv('SEARCH_MAX_CANDIDATES', 1000))  # Newest matches ranked per search on Postgres (older matches of a common word are left out)
+    
+    # Home page course grid
+    COURSES_PER_PAGE = int(os.getenv('COURSES_PER_PAGE', 12))  # Cards rendered with the page and per scroll fetch
+    COURSE_GRID_CACHE_TTL = int(os.getenv('COURSE_GRID_CACHE_TTL', 3600))  # Seconds a grid page is cached (course edits drop it at once)
+    
+    # JSON API
+    API_PAGE_SIZE = int(os.getenv('API_PAGE_SIZE', 20))
+    API_MAX_PAGE_SIZE = int(os.getenv('API_MAX_PAGE_SIZE', 100))
+    
+    # Student dashboard
+    STUDENT_DASHBOARD_CACHE_TTL = int(os.getenv('STUDENT_DASHBOARD_CACHE_TTL', 300))  # Seconds a user's application list is cached
+    
+    # Cache invalidation between worker processes and nodes
+    CACHE_BUS = os.getenv('CACHE_BUS', 'auto')  # auto (Postgres LISTEN/NOTIFY, or local without Postgres), postgres, redis, local or none
+    CACHE_BUS_REDIS_URL = os.getenv('CACHE_BUS_REDIS_URL', 'redis://localhost:6379/0')  # Any Redis-compatible server
+    CACHE_BUS_CHANNEL = os.getenv('CACHE_BUS_CHANNEL', 'cache_invalidation')
+    
+    # Tracing
+    TRACING_EXPORTER = os.getenv('TRACING_EXPORTER', 'none')  # none, memory, file or otlp
+    TRACING_SAMPLE_RATE = float(os.getenv('TRACING_SAMPLE_RATE', 0.05))  # Share of new traces recorded
+    TRACING_FILE = os.getenv('TRACING_FILE', 'traces.jsonl')  # Used by the file exporter
+    OTEL_EXPORTER_OTLP_ENDPOINT = os.getenv('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318')
+    OTEL_EXPORTER_OTLP_HEADERS = os.getenv('OTEL_EXPORTER_OTLP_HEADERS', '')  # key=value,key=value
+    OTEL_SERVICE_NAME = os.getenv('OTEL_SERVICE_NAME', 'smiict-web')
+    
+    # Logging configuration (records are written by a background thread)
+    LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+    LOG_FORMAT = os.getenv('LOG_FORMAT', 'json')  # json or text
+    LOG_FILE = os.getenv('LOG_FILE', '')  # Also write to this file when set
+    LOG_QUEUE_SIZE = int(os.getenv('LOG_QUEUE_SIZE', 10000))  # Records beyond this are dropped, not waited on
+    LOG_SAMPLED_LOGGERS = os.getenv('LOG_SAMPLED_LOGGERS', '')  # Comma-separated logger names whose info logs are sampled
+    LOG_SAMPLE_RATE = float(os.getenv('LOG_SAMPLE_RATE', 1.0))  # Share of requests whose sampled info logs are kept
+    
+    # Response compression and HTML minification
+    COMPRESS_RESPONSES = os.getenv('COMPRESS_RESPONSES', 'True').lower() == 'true'
+    COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', 1024))  # Smaller bodies are sent as is
+    COMPRESS_MIMETYPES = os.getenv('COMPRESS_MIMETYPES', 'text/html,application/json,text/css,text/plain,application/javascript').split(',')
+    GZIP_LEVEL = int(os.getenv('GZIP_LEVEL', 6))  # 1-9
+    BROTLI_QUALITY = int(os.getenv('BROTLI_QUALITY', 5))  # 0-11, used when the Brotli package is installed
+    JINJA_TRIM_BLOCKS = os.getenv('JINJA_TRIM_BLOCKS', 'True').lower() == 'true'  # Drop the whitespace around {% %} tags
+    HTML_MINIFY = os.getenv('HTML_MINIFY', 'False').lower() == 'true'  # Also collapse whitespace after rendering (costs more CPU than gzip)
+    PRELOAD_LINK_HEADERS = os.getenv('PRELOAD_LINK_HEADERS', 'True').lower() == 'true'  # Link headers a proxy can send as 103 Early Hints
+    
+    # Service worker (offline catalog and static asset caching)
+    SERVICE_WORKER = os.getenv('SERVICE_WORKER', 'True').lower() == 'true'  # False unregisters installed workers
+    ASSET_VERSION = os.getenv('ASSET_VERSION', '')  # Release id; a new value purges the workers' caches
+    
+    # Background jobs (worker.py)
+    JOB_WORKER_THREADS = int(os.getenv('JOB_WORKER_THREADS', 4))  # Jobs run at once per worker process
+    JOB_POLL_INTERVAL = float(os.getenv('JOB_POLL_INTERVAL', 1.0))  # Seconds between checks when no job is due
+    JOB_MAX_ATTEMPTS = int(os.getenv('JOB_MAX_ATTEMPTS', 5))  # Runs before a failing job is given up as dead
+    JOB_RETRY_BASE_DELAY = float(os.getenv('JOB_RETRY_BASE_DELAY', 30))  # Seconds before the first retry, doubled for each one after
+    JOB_RETRY_MAX_DELAY = float(os.getenv('JOB_RETRY_MAX_DELAY', 3600))
+    JOB_LOCK_TIMEOUT = float(os.getenv('JOB_LOCK_TIMEOUT', 300))  # Running jobs without a heartbeat for this long are requeued
+    JOB_RETENTION_DAYS = int(os.getenv('JOB_RETENTION_DAYS', 14))  # Finished jobs are deleted after this
+    PAYMENT_CHECK_WINDOW = int(os.getenv('PAYMENT_CHECK_WINDOW', 3600))  # Expired pending payments are re-verified for this many seconds
+    
     # Base URL for email links
     BASE_URL = os.getenv('BASE_URL', 'http://127.0.0.1:5000')
     
     # Paystack configuration
     PAYSTACK_SECRET_KEY = os.getenv('PAYSTACK_SECRET_KEY', '')
     PAYSTACK_PUBLIC_KEY = os.getenv('PAYSTACK_PUBLIC_KEY', '')
-    PAYSTACK_WEBHOOK_SECRET = os.getenv('PAYSTACK_WEBHOOK_SECRET', '')
\ No newline at end of file
+    PAYSTACK_WEBHOOK_SECRET = os.getenv('PAYSTACK_WEBHOOK_SECRET', '')
+    PAYMENT_AUTHORIZATION_TTL = int(os.getenv('PAYMENT_AUTHORIZATION_TTL', 1800))  # Seconds a pending authorization URL is reused
+    
+    # Password hashing configuration
+    # Werkzeug method string ('scrypt:32768:8:1', 'pbkdf2:sha256:600000') or
+    # 'argon2[:time_cost:memory_cost:parallelism]' when argon2-cffi is installed
+    PASSWORD_HASH_METHOD = os.getenv('PASSWORD_HASH_METHOD', 'scrypt:32768:8:1')
+    PASSWORD_HASH_CONCURRENCY = int(os.getenv('PASSWORD_HASH_CONCURRENCY', 2))  # Max hashes running at once
+    PASSWORD_HASH_TIMEOUT = float(os.getenv('PASSWORD_HASH_TIMEOUT', 10))  # Seconds to wait for a free slot
+    PASSWORD_RESET_TOKEN_MAX_AGE = int(os.getenv('PASSWORD_RESET_TOKEN_MAX_AGE', 3600))  # Reset link lifetime in seconds
@@ -5,9 +5,8 @@ Run this script after setting up the database to create your first admin user.
 ONLY affects admin users - preserves all courses and other data.
 """
 
-from app import app, db
+from app import app, db, password_service
 from models import User
-from werkzeug.security import generate_password_hash
 
 def create_admin():
     with app.app_context():
@@ -30,7 +29,7 @@ def create_admin():
         admin = User(
             name='System Admin',
             email='admin@smiit.com',
-            password_hash=generate_password_hash('admin123'),
+            password_hash=password_service.hash_password('admin123'),
             role='admin',
             admin_approved=True
         )
@@ -55,4 +54,4 @@ def create_admin():
         print(f"  - Contact Messages: {contact_count}")
 
 if __name__ == '__main__':
-    create_admin()
\ No newline at end of file
+    create_admin()
\ No newline at end of file
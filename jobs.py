@@ -0,0 +1,83 @@
+"""
+Background Jobs
+The jobs worker.py runs: periodic maintenance that used to be run by hand or
+from cron, and payment checks for checkouts whose callback never arrived.
+Queue one from the app with utils.job_service.enqueue(name, **kwargs).
+"""
+
+from datetime import datetime, timedelta
+from flask import current_app
+import logging
+
+from app import db, purge_service, announcement_service, email_service, find_payment, apply_payment_reference, mark_payment_completed, record_coupon_usage
+from models import User, Course, PaymentReference
+from utils.counter_service import reconcile_counters
+from utils.job_service import job, enqueue
+from utils.paystack_service import PaystackService
+from maintain_partitions import maintain_partitions
+
+logger = logging.getLogger(__name__)
+
+@job('users.purge', schedule='0 * * * *')
+def purge_users():
+    """Remove users that were deleted but not purged, e.g. because the server restarted mid-purge"""
+    purge_service.run()
+
+@job('announcement.send')
+def send_announcement(announcement_id):
+    """Send (or resume) a course announcement; progress is kept on the announcement itself"""
+    announcement_service.run(announcement_id)
+
+@job('counters.reconcile', schedule='*/15 * * * *')
+def reconcile_admin_counters():
+    """Correct drift in the admin badge counters"""
+    reconcile_counters()
+
+@job('partitions.maintain', schedule='15 2 * * *', max_attempts=3)
+def maintain():
+    """Create upcoming partitions and archive old rows"""
+    maintain_partitions()
+
+@job('payments.check_pending', schedule='*/10 * * * *')
+def check_pending_payments():
+    """
+    Queue a verification of every reference that expired unpaid within PAYMENT_CHECK_WINDOW
+
+    Covers students who paid but closed the tab before Paystack redirected
+    them back, when the webhook did not get through either.
+    """
+    now = datetime.utcnow()
+    window = timedelta(seconds=current_app.config['PAYMENT_CHECK_WINDOW'])
+    references = db.session.execute(
+        db.select(PaymentReference.reference).where(
+            PaymentReference.status == 'pending',
+            PaymentReference.expires_at <= now,
+            PaymentReference.expires_at > now - window
+        )
+    ).scalars().all()
+    for reference in references:
+        enqueue('payments.verify', reference=reference)
+    logger.info("Queued verification of %s pending payments", len(references))
+
+@job('payments.verify')
+def verify_payment(reference):
+    """Complete the application a reference was issued for if Paystack reports it paid"""
+    application, payment_ref = find_payment(reference)
+    if not application or application.payment_status == 'completed':
+        return
+    if not PaystackService().verify_transaction(reference)['success']:
+        # Unpaid or abandoned; the reference stays pending and is checked again
+        return
+
+    apply_payment_reference(application, payment_ref, reference)
+    mark_payment_completed(application)
+    record_coupon_usage(application)
+    db.session.commit()
+    logger.info("Completed payment of application %s from reference %s", application.id, reference)
+
+    try:
+        user = User.query.get(application.user_id)
+        course = Course.query.get(application.course_id)
+        email_service.send_payment_confirmation_email(user, course, application)
+    except Exception as e:
+        logger.error("Error sending payment confirmation email: %s", e)
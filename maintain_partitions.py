@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Partition Maintenance
+Creates upcoming monthly partitions and archives old abandoned applications
+and read messages to gzipped files. Meant to run daily from cron.
+"""
+
+from datetime import datetime
+from app import app
+from utils.partition_service import PARTITIONED_TABLES, ensure_partitions, archive_month, archivable_months, add_months, month_start
+from utils.counter_service import reconcile_counters
+
+def maintain_partitions():
+    """Create future partitions, then archive months older than ARCHIVE_AFTER_MONTHS"""
+    with app.app_context():
+        cutoff = add_months(month_start(datetime.utcnow()), -app.config['ARCHIVE_AFTER_MONTHS'])
+        archived = 0
+        for table in PARTITIONED_TABLES:
+            created = ensure_partitions(table)
+            print(f"✅ {table}: {len(created)} partitions ensured")
+            
+            for month in archivable_months(table, cutoff):
+                count = archive_month(table, month)
+                archived += count
+                if count:
+                    print(f"✅ {table}: archived {count} rows from {month:%Y-%m}")
+        
+        if archived:
+            # Archived applications no longer count as pending payments
+            reconcile_counters()
+        print(f"🎉 Maintenance finished, {archived} rows archived")
+
+if __name__ == '__main__':
+    maintain_partitions()
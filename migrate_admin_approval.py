@@ -1,28 +1,28 @@
 from app import app, db
 from sqlalchemy import text
+from utils.backfill_runner import Backfill
 
 def migrate_admin_approval():
     with app.app_context():
-        conn = db.engine.connect()
-        trans = conn.begin()
         try:
-            # Add admin_approved column
+            # Add admin_approved column (a constant default doesn't rewrite the table)
             print("Adding admin_approval column...")
-            conn.execute(text("ALTER TABLE \"user\" ADD COLUMN admin_approved BOOLEAN DEFAULT FALSE"))
+            db.session.execute(text("ALTER TABLE \"user\" ADD COLUMN IF NOT EXISTS admin_approved BOOLEAN DEFAULT FALSE"))
+            db.session.commit()
             print("✅ admin_approval column added")
             
-            # Set existing admins as approved
+            # Set existing admins as approved, in resumable chunks
             print("Setting existing admins as approved...")
-            conn.execute(text("UPDATE \"user\" SET admin_approved = TRUE WHERE role = 'admin'"))
+            Backfill(
+                'user-admin-approved', '"user"',
+                "admin_approved = TRUE", "role = 'admin'"
+            ).run()
             print("✅ Existing admins set as approved")
             
-            trans.commit()
             print("🎉 Migration completed successfully!")
         except Exception as e:
-            trans.rollback()
+            db.session.rollback()
             print(f"❌ Migration failed: {e}")
-        finally:
-            conn.close()
 
 if __name__ == '__main__':
     migrate_admin_approval()
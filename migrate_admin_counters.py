@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Creates the admin_counter table and seeds it from the existing data
+"""
+
+from app import app, db
+from models import AdminCounter
+from utils.counter_service import reconcile_counters
+
+def migrate_admin_counters():
+    """Create the admin_counter table if it doesn't exist and fill in the counters"""
+    with app.app_context():
+        try:
+            print("Creating admin_counter table...")
+            AdminCounter.__table__.create(db.engine, checkfirst=True)
+            print("✅ admin_counter table ready")
+            
+            print("Seeding counters...")
+            counter = reconcile_counters()
+            print(f"✅ {counter.unread_messages} unread messages, {counter.pending_admins} pending admins, "
+                  f"{counter.pending_payments} pending payments, ₦{counter.total_revenue:,.2f} revenue")
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_admin_counters()
@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Creates the announcement table used by the course announcement mailer
+"""
+
+from app import app, db
+from models import Announcement
+
+def migrate_announcements():
+    """Create the announcement table if it doesn't exist"""
+    with app.app_context():
+        try:
+            print("Creating announcement table...")
+            Announcement.__table__.create(db.engine, checkfirst=True)
+            print("✅ announcement table ready")
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_announcements()
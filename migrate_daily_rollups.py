@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Creates the daily course and coupon stats tables and fills them from history
+"""
+
+from app import app, db
+from models import DailyCourseStats, DailyCouponStats
+from utils.rollup_service import backfill
+
+def migrate_daily_rollups():
+    """Create the rollup tables if they don't exist and backfill them"""
+    with app.app_context():
+        try:
+            print("Creating daily_course_stats and daily_coupon_stats tables...")
+            DailyCourseStats.__table__.create(db.engine, checkfirst=True)
+            DailyCouponStats.__table__.create(db.engine, checkfirst=True)
+            print("✅ Rollup tables ready")
+            
+            print("Backfilling from existing applications...")
+            days = backfill()
+            print(f"✅ Backfilled {days} days")
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_daily_rollups()
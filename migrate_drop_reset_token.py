@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Drops the stored password reset token columns, which are replaced by
+signed, stateless reset tokens
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_drop_reset_token():
+    """Drop reset_token (and its unique index) and reset_token_expires from the user table"""
+    with app.app_context():
+        try:
+            # Dropping the column also drops its unique constraint and index
+            print("Dropping reset_token column...")
+            db.session.execute(text("""
+                ALTER TABLE "user"
+                DROP COLUMN IF EXISTS reset_token
+            """))
+            print("✅ reset_token column dropped")
+            
+            print("Dropping reset_token_expires column...")
+            db.session.execute(text("""
+                ALTER TABLE "user"
+                DROP COLUMN IF EXISTS reset_token_expires
+            """))
+            print("✅ reset_token_expires column dropped")
+            
+            db.session.commit()
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    migrate_drop_reset_token()
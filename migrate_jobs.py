@@ -0,0 +1,25 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Creates the job and job_schedule tables used by the background worker
+"""
+
+from app import app, db
+from models import Job, JobSchedule
+
+def migrate_jobs():
+    """Create the job tables if they don't exist"""
+    with app.app_context():
+        try:
+            print("Creating job tables...")
+            Job.__table__.create(db.engine, checkfirst=True)
+            JobSchedule.__table__.create(db.engine, checkfirst=True)
+            print("✅ job and job_schedule tables ready")
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_jobs()
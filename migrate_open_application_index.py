@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Allows at most one open (unpaid) application per user and course
+"""
+
+from sqlalchemy import text
+from app import app, db
+from utils.counter_service import reconcile_counters
+from utils.partition_service import is_partitioned
+
+OPEN_CONDITION = "payment_status IN ('pending', 'failed')"
+
+def migrate_open_application_index():
+    """Retire duplicate open applications and add the partial unique index"""
+    with app.app_context():
+        try:
+            # Keep the newest open application per user and course; older
+            # duplicates (from double submissions) are marked abandoned
+            print("Retiring duplicate open applications...")
+            result = db.session.execute(text(f"""
+                UPDATE application SET payment_status = 'abandoned'
+                WHERE {OPEN_CONDITION}
+                AND id NOT IN (
+                    SELECT MAX(id) FROM application
+                    WHERE {OPEN_CONDITION}
+                    GROUP BY user_id, course_id
+                )
+            """))
+            db.session.commit()
+            print(f"✅ {result.rowcount} duplicate applications marked abandoned")
+
+            if is_partitioned('application'):
+                # A unique index on a partitioned table must include the
+                # partition key; creation is serialized by an advisory lock instead
+                print("⚠️  application is partitioned, skipping uq_application_open")
+            else:
+                print("Creating uq_application_open index...")
+                # CONCURRENTLY cannot run inside a transaction
+                with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                    connection.execute(text(f"""
+                        CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS uq_application_open
+                        ON application (user_id, course_id)
+                        WHERE {OPEN_CONDITION}
+                    """))
+                print("✅ uq_application_open index ready")
+
+            print("Reconciling admin counters...")
+            reconcile_counters()
+            print("✅ Admin counters reconciled")
+            print("🎉 Migration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_open_application_index()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Converts application and contact_message into tables range-partitioned by
+month (Postgres only), without rewriting or long-locking the existing data.
+
+The existing table becomes the "legacy" partition of a new partitioned
+table, covering everything before a boundary month:
+
+1. Backfill NULL partition keys in chunks (utils.backfill_runner) and
+   prove the range with a CHECK constraint (NOT VALID, then validated
+   without blocking writes).
+2. Build the indexes the partitioned table needs on the existing table,
+   CONCURRENTLY, so attaching it later reuses them.
+3. In one short transaction: rename the table to <table>_legacy, create
+   the partitioned table in its place, attach the legacy table and create
+   a default partition.
+
+Monthly partitions from the boundary on are created by
+maintain_partitions.py, which should run from cron.
+
+Partitioned tables can only enforce uniqueness on columns that include
+the partition key, so the primary key becomes (id, <key>), and
+application.payment_reference keeps a plain index. Foreign keys cannot
+point at application.id any more, so coupon_usage.application_id loses
+its constraint. The user purge removes coupon usage explicitly, and
+archiving skips applications that have coupon usage.
+"""
+
+from datetime import datetime, timedelta
+from app import app, db
+from sqlalchemy import text
+from utils.backfill_runner import Backfill
+from utils.partition_service import PARTITIONED_TABLES, add_months, month_start, is_partitioned, ensure_partitions
+
+# Indexes of the partitioned tables: (name suffix, columns, unique)
+INDEXES = {
+    'application': [('id_key', 'id, applied_at', True),
+                    ('user_id_idx', 'user_id', False),
+                    ('payment_reference_idx', 'payment_reference', False),
+                    ('applied_at_idx', 'applied_at', False)],
+    'contact_message': [('id_key', 'id, created_at', True),
+                        ('created_at_idx', 'created_at', False)],
+}
+
+# Foreign keys of the partitioned tables, matching the existing ones
+# exactly so the legacy partition's constraints are reused on attach
+FOREIGN_KEYS = {
+    'application': [('user_id', '"user"', 'ON DELETE CASCADE'),
+                    ('course_id', 'course', ''),
+                    ('coupon_id', 'coupon', '')],
+    'contact_message': [],
+}
+
+def boundary_month():
+    """First month the new partitions cover, leaving at least two days to finish the migration"""
+    boundary = add_months(month_start(datetime.utcnow()), 1)
+    if boundary - datetime.utcnow() < timedelta(days=2):
+        boundary = add_months(boundary, 1)
+    return boundary
+
+def prepare(connection, table, key, boundary):
+    """Steps 1 and 2: run outside a transaction so nothing holds locks for long"""
+    print(f"Backfilling NULL {table}.{key}...")
+    # In resumable chunks, never one table-wide UPDATE
+    Backfill(f'partition-{table}-{key}-{boundary:%Y%m}', table, f"{key} = now()", f"{key} IS NULL").run()
+    
+    print(f"Validating {table}.{key} < {boundary:%Y-%m-%d}...")
+    connection.execute(text(f"""
+        ALTER TABLE {table} DROP CONSTRAINT IF EXISTS {table}_legacy_range,
+        ADD CONSTRAINT {table}_legacy_range
+            CHECK ({key} IS NOT NULL AND {key} < '{boundary:%Y-%m-%d}') NOT VALID
+    """))
+    connection.execute(text(f"ALTER TABLE {table} VALIDATE CONSTRAINT {table}_legacy_range"))
+    # The partitioned parent's primary key makes the key NOT NULL, and ATTACH
+    # PARTITION requires the same on the legacy table (a CHECK doesn't count).
+    # The validated CHECK above lets Postgres set it without scanning the table.
+    connection.execute(text(f"ALTER TABLE {table} ALTER COLUMN {key} SET NOT NULL"))
+    
+    for suffix, columns, unique in INDEXES[table]:
+        name = f"{table}_legacy_{suffix}"
+        print(f"Creating index {name}...")
+        connection.execute(text(
+            f"CREATE {'UNIQUE ' if unique else ''}INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} ({columns})"
+        ))
+        if unique:
+            # Attaching only reuses an index for the primary key if it backs a constraint
+            connection.execute(text(f"""
+                DO $$ BEGIN
+                    IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = '{name}') THEN
+                        ALTER TABLE {table} ADD CONSTRAINT {name} UNIQUE USING INDEX {name};
+                    END IF;
+                END $$
+            """))
+
+def swap(table, key, boundary):
+    """Step 3: replace the table with a partitioned one in a single short transaction"""
+    print(f"Swapping {table} for a partitioned table...")
+    db.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+    db.session.execute(text(f"LOCK TABLE {table} IN ACCESS EXCLUSIVE MODE"))
+    if table == 'application':
+        # A foreign key would keep pointing at the legacy table after the rename
+        db.session.execute(text("ALTER TABLE coupon_usage DROP CONSTRAINT IF EXISTS coupon_usage_application_id_fkey"))
+    
+    db.session.execute(text(f"ALTER TABLE {table} RENAME TO {table}_legacy"))
+    db.session.execute(text(
+        f"CREATE TABLE {table} (LIKE {table}_legacy INCLUDING DEFAULTS) PARTITION BY RANGE ({key})"
+    ))
+    for suffix, columns, unique in INDEXES[table]:
+        if unique:
+            db.session.execute(text(f"ALTER TABLE {table} ADD CONSTRAINT {table}_part_pkey PRIMARY KEY ({columns})"))
+        else:
+            db.session.execute(text(f"CREATE INDEX {table}_part_{suffix} ON {table} ({columns})"))
+    for column, referenced, action in FOREIGN_KEYS[table]:
+        db.session.execute(text(
+            f"ALTER TABLE {table} ADD CONSTRAINT {table}_part_{column}_fkey "
+            f"FOREIGN KEY ({column}) REFERENCES {referenced} (id) {action}"
+        ))
+    
+    db.session.execute(text(
+        f"ALTER TABLE {table} ATTACH PARTITION {table}_legacy "
+        f"FOR VALUES FROM (MINVALUE) TO ('{boundary:%Y-%m-%d}')"
+    ))
+    db.session.execute(text(f"CREATE TABLE {table}_default PARTITION OF {table} DEFAULT"))
+    db.session.execute(text(f"ALTER SEQUENCE {table}_id_seq OWNED BY {table}.id"))
+    db.session.commit()
+
+def migrate_partition_tables():
+    """Partition application by applied_at and contact_message by created_at"""
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("⚠️  Partitioning needs Postgres, skipping")
+            return
+        
+        try:
+            boundary = boundary_month()
+            for table, key in PARTITIONED_TABLES.items():
+                if is_partitioned(table):
+                    print(f"✅ {table} is already partitioned")
+                    continue
+                
+                with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                    prepare(connection, table, key, boundary)
+                swap(table, key, boundary)
+                
+                created = ensure_partitions(table)
+                print(f"✅ {table} partitioned ({len(created)} monthly partitions from {boundary:%Y-%m})")
+            
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    migrate_partition_tables()
@@ -0,0 +1,30 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Widens user.password_hash so scrypt and argon2 hashes fit
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+def migrate_password_hash_length():
+    """Widen the password_hash column to 255 characters"""
+    with app.app_context():
+        try:
+            print("Widening password_hash column...")
+            db.session.execute(text("""
+                ALTER TABLE "user"
+                ALTER COLUMN password_hash TYPE VARCHAR(255)
+            """))
+            print("✅ password_hash column widened")
+
+            db.session.commit()
+            print("🎉 Migration completed successfully!")
+
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    migrate_password_hash_length()
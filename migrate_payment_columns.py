@@ -2,10 +2,15 @@
 """
 Database Migration Script
 Adds payment-related columns to the application table
+
+Safe to run against a live database and to re-run after an interruption:
+the unique index is built concurrently and payment_status is backfilled
+in small chunks.
 """
 
 from app import app, db
 from sqlalchemy import text
+from utils.backfill_runner import Backfill
 
 def migrate_payment_columns():
     """Add payment columns to application table"""
@@ -25,7 +30,7 @@ def migrate_payment_columns():
                 print("Adding payment_reference column...")
                 db.session.execute(text("""
                     ALTER TABLE application 
-                    ADD COLUMN payment_reference VARCHAR(100) UNIQUE
+                    ADD COLUMN payment_reference VARCHAR(100)
                 """))
                 print("✅ payment_reference column added")
             else:
@@ -41,17 +46,36 @@ def migrate_payment_columns():
             else:
                 print("✅ paid_at column already exists")
             
+            # Commit the (instant) column additions before the slow parts
+            db.session.commit()
+            
+            # Build the unique index without blocking writes, then turn it
+            # into the constraint (CONCURRENTLY cannot run in a transaction)
+            print("Creating unique index on payment_reference...")
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                connection.execute(text("""
+                    CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS application_payment_reference_key
+                    ON application (payment_reference)
+                """))
+                connection.execute(text("""
+                    DO $$ BEGIN
+                        IF NOT EXISTS (SELECT 1 FROM pg_constraint WHERE conname = 'application_payment_reference_key') THEN
+                            ALTER TABLE application
+                            ADD CONSTRAINT application_payment_reference_key
+                            UNIQUE USING INDEX application_payment_reference_key;
+                        END IF;
+                    END $$
+                """))
+            print("✅ payment_reference index ready")
+            
             # Update payment_status column if it doesn't have the right values
             print("Updating payment_status column...")
-            db.session.execute(text("""
-                UPDATE application 
-                SET payment_status = 'pending' 
-                WHERE payment_status IS NULL
-            """))
+            Backfill(
+                'application-payment-status-default', 'application',
+                "payment_status = 'pending'", 'payment_status IS NULL'
+            ).run()
             print("✅ payment_status column updated")
             
-            # Commit all changes
-            db.session.commit()
             print("🎉 Migration completed successfully!")
             
         except Exception as e:
@@ -0,0 +1,45 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Creates the payment_reference history table and records the references
+already stored on applications
+"""
+
+from app import app, db
+from models import PaymentReference
+from sqlalchemy import text
+
+def migrate_payment_references():
+    """Create the payment_reference table if it doesn't exist and copy existing references into it"""
+    with app.app_context():
+        try:
+            print("Creating payment_reference table...")
+            PaymentReference.__table__.create(db.engine, checkfirst=True)
+            print("✅ payment_reference table ready")
+            
+            # Existing references get an idempotency key that never matches a
+            # new initialization, so they are verifiable but not reused
+            print("Copying existing payment references...")
+            result = db.session.execute(text("""
+                INSERT INTO payment_reference
+                    (application_id, reference, idempotency_key, amount, discount_amount, coupon_id, status, created_at)
+                SELECT id, payment_reference, 'legacy', final_price, discount_amount, coupon_id,
+                       CASE WHEN payment_status = 'completed' THEN 'completed'
+                            WHEN payment_status = 'failed' THEN 'failed'
+                            ELSE 'pending' END,
+                       COALESCE(paid_at, applied_at)
+                FROM application
+                WHERE payment_reference IS NOT NULL
+                AND payment_reference NOT IN (SELECT reference FROM payment_reference)
+            """))
+            db.session.commit()
+            print(f"✅ {result.rowcount} references copied")
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    migrate_payment_references()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Adds the full-text and trigram search indexes (Postgres only)
+
+- course and contact_message get a search_vector tsvector column, kept up
+  to date by a trigger and backfilled in chunks, with a GIN index.
+- course.title, contact_message.subject, user.name and user.email get
+  pg_trgm GIN indexes for substring and misspelling matches.
+
+Indexes are built CONCURRENTLY; on a partitioned table each partition's
+index is built concurrently and attached to an index on the parent, and
+partitions created later get the index automatically.
+"""
+
+from app import app, db
+from sqlalchemy import text
+from utils.backfill_runner import Backfill
+from utils.partition_service import is_partitioned, partitions
+
+# Weighted text of each row; {row} is NEW. in the trigger and empty in the backfill
+VECTORS = {
+    'course': ("setweight(to_tsvector('english', coalesce({row}title, '')), 'A') || "
+               "setweight(to_tsvector('english', coalesce({row}description, '')), 'B')",
+               'title, description'),
+    'contact_message': ("setweight(to_tsvector('english', coalesce({row}subject, '')), 'A') || "
+                        "setweight(to_tsvector('english', coalesce({row}name, '') || ' ' || coalesce({row}email, '')), 'B') || "
+                        "setweight(to_tsvector('english', coalesce({row}message, '')), 'C')",
+                        'subject, name, email, message'),
+}
+
+# (index name, table, index definition)
+INDEXES = [
+    ('course_search_vector_idx', 'course', 'USING GIN (search_vector)'),
+    ('course_title_trgm_idx', 'course', 'USING GIN (title gin_trgm_ops)'),
+    ('contact_message_search_vector_idx', 'contact_message', 'USING GIN (search_vector)'),
+    ('contact_message_subject_trgm_idx', 'contact_message', 'USING GIN (subject gin_trgm_ops)'),
+    ('user_name_trgm_idx', '"user"', 'USING GIN (name gin_trgm_ops)'),
+    ('user_email_trgm_idx', '"user"', 'USING GIN (email gin_trgm_ops)'),
+]
+
+def add_search_vector(table):
+    """Add the column and the trigger that maintains it"""
+    expression, columns = VECTORS[table]
+    db.session.execute(text("SET LOCAL lock_timeout = '5s'"))
+    db.session.execute(text(f"ALTER TABLE {table} ADD COLUMN IF NOT EXISTS search_vector tsvector"))
+    db.session.execute(text(f"""
+        CREATE OR REPLACE FUNCTION {table}_search_vector() RETURNS trigger AS $$
+        BEGIN
+            NEW.search_vector := {expression.format(row='NEW.')};
+            RETURN NEW;
+        END
+        $$ LANGUAGE plpgsql
+    """))
+    db.session.execute(text(f"DROP TRIGGER IF EXISTS {table}_search_vector ON {table}"))
+    db.session.execute(text(
+        f"CREATE TRIGGER {table}_search_vector BEFORE INSERT OR UPDATE OF {columns} ON {table} "
+        f"FOR EACH ROW EXECUTE FUNCTION {table}_search_vector()"
+    ))
+    db.session.commit()
+
+def create_index(connection, name, table, definition):
+    """CREATE INDEX CONCURRENTLY, one partition at a time on partitioned tables"""
+    if not is_partitioned(table):
+        connection.execute(text(f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON {table} {definition}"))
+        return
+
+    # The parent index stays invalid until every partition's index is attached
+    connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON ONLY {table} {definition}"))
+    for partition in partitions(table):
+        partition_index = f"{partition}_{name[len(table) + 1:]}"
+        connection.execute(text(
+            f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {partition_index} ON {partition} {definition}"
+        ))
+        connection.execute(text(f"ALTER INDEX {name} ATTACH PARTITION {partition_index}"))
+
+def migrate_search_indexes():
+    """Add search columns, backfill them and build the search indexes"""
+    with app.app_context():
+        if db.engine.dialect.name != 'postgresql':
+            print("⚠️  Search indexes need Postgres, skipping (the in-memory search index is used instead)")
+            return
+
+        try:
+            print("Enabling pg_trgm...")
+            db.session.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+            db.session.commit()
+            print("✅ pg_trgm enabled")
+
+            for table, (expression, _) in VECTORS.items():
+                print(f"Adding {table}.search_vector...")
+                add_search_vector(table)
+                Backfill(f'{table}-search-vector', table,
+                         f"search_vector = {expression.format(row='')}",
+                         'search_vector IS NULL').run()
+                print(f"✅ {table}.search_vector ready")
+
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            db.session.commit()
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                for name, table, definition in INDEXES:
+                    print(f"Creating index {name}...")
+                    create_index(connection, name, table, definition)
+                    print(f"✅ {name} ready")
+
+            print("🎉 Migration completed successfully!")
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"❌ Migration failed: {str(e)}")
+            raise
+
+if __name__ == '__main__':
+    migrate_search_indexes()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Database Migration Script
+Adds soft deletion to users and ON DELETE rules to the foreign keys that
+reference them, so deleted users can be purged in the background
+"""
+
+from app import app, db
+from sqlalchemy import text
+
+# (table, column, referenced table, ON DELETE action)
+FOREIGN_KEYS = [
+    ('application', 'user_id', 'user', 'CASCADE'),
+    ('coupon_usage', 'user_id', 'user', 'CASCADE'),
+    ('coupon_usage', 'application_id', 'application', 'CASCADE'),
+    ('coupon', 'created_by', 'user', 'SET NULL'),
+    ('announcement', 'created_by', 'user', 'SET NULL'),
+]
+
+# Foreign key columns the purge (and the cascades) look rows up by
+INDEXES = [
+    ('ix_user_deleted_at', 'user', 'deleted_at'),
+    ('ix_application_user_id', 'application', 'user_id'),
+    ('ix_coupon_usage_user_id', 'coupon_usage', 'user_id'),
+    ('ix_coupon_usage_application_id', 'coupon_usage', 'application_id'),
+    ('ix_coupon_created_by', 'coupon', 'created_by'),
+]
+
+def migrate_user_soft_delete():
+    """Add user.deleted_at, index the foreign keys and set their ON DELETE rules"""
+    with app.app_context():
+        try:
+            print("Adding deleted_at column to user table...")
+            db.session.execute(text("""
+                ALTER TABLE "user"
+                ADD COLUMN IF NOT EXISTS deleted_at TIMESTAMP
+            """))
+            
+            print("Allowing coupons and announcements to outlive their creator...")
+            db.session.execute(text("ALTER TABLE coupon ALTER COLUMN created_by DROP NOT NULL"))
+            db.session.execute(text("ALTER TABLE announcement ALTER COLUMN created_by DROP NOT NULL"))
+            db.session.commit()
+            print("✅ Columns updated")
+            
+            # CREATE INDEX CONCURRENTLY cannot run inside a transaction
+            with db.engine.connect().execution_options(isolation_level='AUTOCOMMIT') as connection:
+                for name, table, column in INDEXES:
+                    print(f"Creating index {name}...")
+                    connection.execute(text(
+                        f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {name} ON "{table}" ({column})'
+                    ))
+            print("✅ Indexes created")
+            
+            # Swap each constraint for one with an ON DELETE rule. NOT VALID
+            # makes the swap instant; validating afterwards scans the table
+            # without blocking writes.
+            for table, column, referenced, action in FOREIGN_KEYS:
+                name = f"{table}_{column}_fkey"
+                print(f"Setting ON DELETE {action} on {name}...")
+                db.session.execute(text(f"""
+                    ALTER TABLE "{table}"
+                    DROP CONSTRAINT IF EXISTS {name},
+                    ADD CONSTRAINT {name} FOREIGN KEY ({column})
+                        REFERENCES "{referenced}" (id) ON DELETE {action} NOT VALID
+                """))
+                db.session.commit()
+                db.session.execute(text(f'ALTER TABLE "{table}" VALIDATE CONSTRAINT {name}'))
+                db.session.commit()
+            print("✅ Foreign keys updated")
+            
+            print("🎉 Migration completed successfully!")
+            
+        except Exception as e:
+            print(f"❌ Migration failed: {str(e)}")
+            db.session.rollback()
+            raise
+
+if __name__ == '__main__':
+    migrate_user_soft_delete()
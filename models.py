@@ -1,7 +1,9 @@
+from flask import current_app
 from flask_sqlalchemy import SQLAlchemy
 from flask_login import UserMixin
-from datetime import datetime, timedelta
-import secrets
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from datetime import datetime
+import hashlib
 
 # Create db instance that will be initialized in app.py
 db = SQLAlchemy()
@@ -10,36 +12,48 @@ class User(UserMixin, db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), unique=True, nullable=False)
-    password_hash = db.Column(db.String(128), nullable=False)
+    password_hash = db.Column(db.String(255), nullable=False)
     role = db.Column(db.String(20), default='student')  # student, staff, admin
     admin_approved = db.Column(db.Boolean, default=False)  # For admin role approval
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    
-    # Password reset fields
-    reset_token = db.Column(db.String(100), unique=True, nullable=True)
-    reset_token_expires = db.Column(db.DateTime, nullable=True)
+    deleted_at = db.Column(db.DateTime, index=True)  # Soft delete: set by admins, the row is purged in the background
     
     # Relationships
-    applications = db.relationship('Application', backref='user', lazy=True)
+    applications = db.relationship('Application', backref='user', lazy=True, passive_deletes=True)
     
-    def generate_reset_token(self):
-        """Generate a secure password reset token"""
-        self.reset_token = secrets.token_urlsafe(32)
-        self.reset_token_expires = datetime.utcnow() + timedelta(hours=1)  # Token expires in 1 hour
-        return self.reset_token
+    @property
+    def is_active(self):
+        """Deleted users can no longer log in, even before they are purged"""
+        return self.deleted_at is None
+    
+    @staticmethod
+    def _reset_serializer():
+        return URLSafeTimedSerializer(current_app.config['SECRET_KEY'], salt='password-reset')
+    
+    def _password_fingerprint(self):
+        """Short digest of the current password hash, so a reset token stops working once the password changes"""
+        return hashlib.sha256(self.password_hash.encode()).hexdigest()[:16]
     
-    def is_reset_token_valid(self, token):
-        """Check if the reset token is valid and not expired"""
-        return (self.reset_token == token and 
-                self.reset_token_expires and 
-                datetime.utcnow() < self.reset_token_expires)
+    def generate_reset_token(self):
+        """Generate a signed password reset token (nothing is stored in the database)"""
+        return self._reset_serializer().dumps({'id': self.id, 'pw': self._password_fingerprint()})
     
-    def clear_reset_token(self):
-        """Clear the reset token after successful password reset"""
-        self.reset_token = None
-        self.reset_token_expires = None
+    @classmethod
+    def verify_reset_token(cls, token):
+        """Return the user a valid, unexpired and unused reset token belongs to, or None"""
+        max_age = current_app.config.get('PASSWORD_RESET_TOKEN_MAX_AGE', 3600)
+        try:
+            data = cls._reset_serializer().loads(token, max_age=max_age)
+        except (SignatureExpired, BadSignature):
+            return None
+        
+        user = db.session.get(cls, data.get('id'))
+        if not user or not user.is_active or user._password_fingerprint() != data.get('pw'):
+            return None
+        return user
 
 class Course(db.Model):
+    # On Postgres a search_vector column is kept up to date by a trigger (migrate_search_indexes.py)
     id = db.Column(db.Integer, primary_key=True)
     title = db.Column(db.String(200), nullable=False)
     description = db.Column(db.Text, nullable=False)
@@ -51,21 +65,35 @@ class Course(db.Model):
     # Relationships
     applications = db.relationship('Application', backref='course', lazy=True)
 
+# Payment states of an application that is still open (not paid for)
+OPEN_PAYMENT_STATUSES = ('pending', 'failed')
+
 class Application(db.Model):
+    # At most one open application per user and course
+    __table_args__ = (
+        db.Index('uq_application_open', 'user_id', 'course_id', unique=True,
+                 postgresql_where=db.text("payment_status IN ('pending', 'failed')"),
+                 sqlite_where=db.text("payment_status IN ('pending', 'failed')")),
+    )
+    
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
     course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
     status = db.Column(db.String(20), default='pending')  # pending, approved, rejected
     applied_at = db.Column(db.DateTime, default=datetime.utcnow)
-    payment_status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    payment_status = db.Column(db.String(20), default='pending')  # pending, completed, failed, abandoned (superseded duplicate)
     payment_reference = db.Column(db.String(100), unique=True)  # Paystack reference
     paid_at = db.Column(db.DateTime)  # When payment was completed
     coupon_id = db.Column(db.Integer, db.ForeignKey('coupon.id'), nullable=True)  # Applied coupon
     original_price = db.Column(db.Float, nullable=False)  # Original course price
     discount_amount = db.Column(db.Float, default=0)  # Discount applied
     final_price = db.Column(db.Float, nullable=False)  # Final price after discount
+    
+    # Relationships
+    coupon = db.relationship('Coupon', lazy=True)
 
 class ContactMessage(db.Model):
+    # On Postgres a search_vector column is kept up to date by a trigger (migrate_search_indexes.py)
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     email = db.Column(db.String(120), nullable=False)
@@ -89,7 +117,7 @@ class Coupon(db.Model):
     valid_from = db.Column(db.DateTime, default=datetime.utcnow)
     valid_until = db.Column(db.DateTime)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
-    created_by = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True, index=True)  # NULL once the creator is deleted
     
     # Relationships
     creator = db.relationship('User', backref='created_coupons', lazy=True)
@@ -98,11 +126,118 @@ class Coupon(db.Model):
 class CouponUsage(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     coupon_id = db.Column(db.Integer, db.ForeignKey('coupon.id'), nullable=False)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
-    application_id = db.Column(db.Integer, db.ForeignKey('application.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='CASCADE'), nullable=False, index=True)
+    application_id = db.Column(db.Integer, db.ForeignKey('application.id', ondelete='CASCADE'), nullable=False, index=True)
     discount_amount = db.Column(db.Float, nullable=False)
     used_at = db.Column(db.DateTime, default=datetime.utcnow)
     
     # Relationships
     user = db.relationship('User', backref='coupon_usages', lazy=True)
     application = db.relationship('Application', backref='coupon_usage', lazy=True)
+
+class Announcement(db.Model):
+    id = db.Column(db.Integer, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id'), nullable=False)
+    subject = db.Column(db.String(200), nullable=False)
+    message = db.Column(db.Text, nullable=False)
+    status = db.Column(db.String(20), default='pending')  # pending, running, completed, failed
+    total_recipients = db.Column(db.Integer)  # Counted when the send starts
+    sent_count = db.Column(db.Integer, default=0)
+    failed_count = db.Column(db.Integer, default=0)
+    last_user_id = db.Column(db.Integer, default=0)  # Resume point: recipients are sent in user id order
+    last_error = db.Column(db.Text)
+    created_by = db.Column(db.Integer, db.ForeignKey('user.id', ondelete='SET NULL'), nullable=True)  # NULL once the creator is deleted
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)  # Doubles as a heartbeat while running
+    completed_at = db.Column(db.DateTime)
+    
+    # Relationships
+    course = db.relationship('Course', backref='announcements', lazy=True)
+    creator = db.relationship('User', backref='announcements', lazy=True)
+    
+    @property
+    def progress(self):
+        """Percentage of recipients processed so far"""
+        if not self.total_recipients:
+            return 100 if self.status == 'completed' else 0
+        return min(100, int((self.sent_count + self.failed_count) * 100 / self.total_recipients))
+
+class AdminCounter(db.Model):
+    """Running totals behind the admin badges and dashboard, kept in a single row (id 1)"""
+    id = db.Column(db.Integer, primary_key=True)
+    unread_messages = db.Column(db.Integer, nullable=False, default=0)
+    pending_admins = db.Column(db.Integer, nullable=False, default=0)  # Admin sign-ups awaiting approval
+    pending_payments = db.Column(db.Integer, nullable=False, default=0)  # Applications with payment_status 'pending'
+    total_revenue = db.Column(db.Float, nullable=False, default=0)  # Sum of final_price over completed payments
+    reconciled_at = db.Column(db.DateTime)  # Last drift correction
+
+class DailyCourseStats(db.Model):
+    """Per-course totals for one day: applications by applied date, payments by paid date"""
+    day = db.Column(db.Date, primary_key=True)
+    course_id = db.Column(db.Integer, db.ForeignKey('course.id', ondelete='CASCADE'), primary_key=True, index=True)
+    applications = db.Column(db.Integer, nullable=False, default=0)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    gross = db.Column(db.Float, nullable=False, default=0)  # Sum of original_price
+    discount = db.Column(db.Float, nullable=False, default=0)  # Sum of discount_amount
+    net = db.Column(db.Float, nullable=False, default=0)  # Sum of final_price (what was charged)
+
+class DailyCouponStats(db.Model):
+    """Per-coupon totals for one day's completed payments"""
+    day = db.Column(db.Date, primary_key=True)
+    coupon_id = db.Column(db.Integer, db.ForeignKey('coupon.id', ondelete='CASCADE'), primary_key=True, index=True)
+    paid_count = db.Column(db.Integer, nullable=False, default=0)
+    gross = db.Column(db.Float, nullable=False, default=0)
+    discount = db.Column(db.Float, nullable=False, default=0)
+    net = db.Column(db.Float, nullable=False, default=0)
+
+class BackfillProgress(db.Model):
+    """Resume point of a chunked data backfill (see utils/backfill_runner.py)"""
+    name = db.Column(db.String(100), primary_key=True)
+    last_id = db.Column(db.BigInteger, nullable=False, default=0)  # Highest key already processed
+    rows_updated = db.Column(db.BigInteger, nullable=False, default=0)
+    started_at = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    completed_at = db.Column(db.DateTime)
+
+class PaymentReference(db.Model):
+    """Every Paystack reference issued for an application, so a payment made with any of them can be matched"""
+    id = db.Column(db.Integer, primary_key=True)
+    application_id = db.Column(db.Integer, nullable=False, index=True)  # No foreign key: application may be partitioned
+    reference = db.Column(db.String(100), unique=True, nullable=False)
+    idempotency_key = db.Column(db.String(64), nullable=False, index=True)  # Application, amount and coupon
+    amount = db.Column(db.Float, nullable=False)  # Final price this reference charges
+    discount_amount = db.Column(db.Float, default=0)
+    coupon_id = db.Column(db.Integer, db.ForeignKey('coupon.id', ondelete='SET NULL'))
+    authorization_url = db.Column(db.String(500))
+    access_code = db.Column(db.String(100))
+    status = db.Column(db.String(20), default='pending')  # pending, completed, failed
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    expires_at = db.Column(db.DateTime)  # After this the authorization URL is not reused
+
+class Job(db.Model):
+    """A background job queued for the worker (see utils/job_service.py)"""
+    __table_args__ = (
+        db.Index('ix_job_status_run_at', 'status', 'run_at'),
+    )
+    id = db.Column(db.BigInteger().with_variant(db.Integer, 'sqlite'), primary_key=True)
+    name = db.Column(db.String(100), nullable=False, index=True)  # Registered job name, e.g. 'users.purge'
+    args = db.Column(db.Text, nullable=False, default='{}')  # Keyword arguments as JSON
+    status = db.Column(db.String(20), nullable=False, default='queued')  # queued, running, succeeded, dead
+    run_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)  # Not claimed before this (retries are pushed back)
+    attempts = db.Column(db.Integer, nullable=False, default=0)
+    max_attempts = db.Column(db.Integer, nullable=False, default=5)
+    last_error = db.Column(db.Text)
+    locked_by = db.Column(db.String(100))  # Worker running it
+    locked_at = db.Column(db.DateTime)  # Heartbeat: refreshed while the job runs
+    traceparent = db.Column(db.String(55))  # Trace of the request that queued it
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    started_at = db.Column(db.DateTime)  # Start of the latest attempt
+    finished_at = db.Column(db.DateTime)
+    duration_ms = db.Column(db.Float)  # Run time of the latest attempt
+
+class JobSchedule(db.Model):
+    """Next run of a periodic job, shared by all workers so each run is queued once"""
+    name = db.Column(db.String(100), primary_key=True)
+    cron = db.Column(db.String(100), nullable=False)
+    next_run_at = db.Column(db.DateTime, nullable=False)
+    last_run_at = db.Column(db.DateTime)
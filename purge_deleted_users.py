@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+"""
+Purge Deleted Users
+Removes users that were deleted but not yet purged, e.g. because the server
+restarted mid-purge. Safe to run from cron.
+"""
+
+from app import app, purge_service
+
+def purge_deleted_users():
+    """Purge every soft-deleted user in the foreground"""
+    with app.app_context():
+        purged = purge_service.run()
+        print(f"✅ Purged {purged} deleted users")
+
+if __name__ == '__main__':
+    purge_deleted_users()
@@ -0,0 +1,18 @@
+#!/usr/bin/env python3
+"""
+Reconcile Admin Counters
+Recomputes the admin badge counters from the tables and corrects any drift.
+Meant to run from cron, e.g. every 15 minutes.
+"""
+
+from app import app
+from utils.counter_service import reconcile_counters
+
+def reconcile_admin_counters():
+    """Correct the admin counters in the foreground"""
+    with app.app_context():
+        counter = reconcile_counters()
+        print(f"✅ Counters reconciled at {counter.reconciled_at:%Y-%m-%d %H:%M:%S}")
+
+if __name__ == '__main__':
+    reconcile_admin_counters()
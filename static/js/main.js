@@ -9,6 +9,8 @@ document.addEventListener('DOMContentLoaded', function() {
     initTooltips();
     initSmoothScrolling();
     initLoadingStates();
+    initBulkActions();
+    initServiceWorker();
 });
 
 // Mobile Navigation
@@ -420,6 +422,79 @@ function makeRequest(url, options = {}) {
         });
 }
 
+// Bulk Admin Actions
+// A container with data-bulk-endpoint holds .bulk-select checkboxes (value = row id),
+// an optional .bulk-select-all checkbox and buttons with data-bulk-action.
+function initBulkActions() {
+    document.querySelectorAll('[data-bulk-endpoint]').forEach(container => {
+        const checkboxes = () => container.querySelectorAll('.bulk-select');
+        const selectAll = container.querySelector('.bulk-select-all');
+        const counter = container.querySelector('.bulk-count');
+        
+        const updateCount = () => {
+            const selected = container.querySelectorAll('.bulk-select:checked').length;
+            if (counter) counter.textContent = selected;
+            container.querySelectorAll('[data-bulk-action]').forEach(button => {
+                button.disabled = selected === 0;
+            });
+        };
+        
+        if (selectAll) {
+            selectAll.addEventListener('change', () => {
+                checkboxes().forEach(checkbox => { checkbox.checked = selectAll.checked; });
+                updateCount();
+            });
+        }
+        checkboxes().forEach(checkbox => checkbox.addEventListener('change', updateCount));
+        
+        container.querySelectorAll('[data-bulk-action]').forEach(button => {
+            button.addEventListener('click', () => {
+                const ids = Array.from(container.querySelectorAll('.bulk-select:checked')).map(cb => parseInt(cb.value, 10));
+                if (!ids.length) return;
+                if (button.dataset.confirm && !confirm(button.dataset.confirm.replace('{count}', ids.length))) return;
+                
+                button.dataset.originalText = button.innerHTML;
+                showLoadingState(button);
+                makeRequest(container.dataset.bulkEndpoint, {
+                    method: 'POST',
+                    body: JSON.stringify({ action: button.dataset.bulkAction, ids: ids })
+                })
+                    .then(data => {
+                        showNotification(`${data.affected} of ${data.requested} updated`, 'success');
+                        setTimeout(() => window.location.reload(), 800);
+                    })
+                    .catch(() => {
+                        hideLoadingState(button);
+                        showNotification('Bulk action failed', 'error');
+                    });
+            });
+        });
+        
+        updateCount();
+    });
+}
+
+// Service Worker
+// base.html sets data-service-worker when the worker is enabled; without it, any
+// worker installed earlier is removed so turning the feature off takes effect.
+function initServiceWorker() {
+    if (!('serviceWorker' in navigator)) {
+        return;
+    }
+    
+    const script = document.body.dataset.serviceWorker;
+    if (!script) {
+        navigator.serviceWorker.getRegistrations()
+            .then(registrations => registrations.forEach(registration => registration.unregister()));
+        return;
+    }
+    
+    window.addEventListener('load', () => {
+        navigator.serviceWorker.register(script, { scope: '/' })
+            .catch(error => console.error('Service worker registration failed:', error));
+    });
+}
+
 // Notification System
 function showNotification(message, type = 'info', duration = 5000) {
     const notification = document.createElement('div');
@@ -451,8 +526,8 @@ function createNotificationContainer() {
 }
 
 // Course Card Interactions
-function initCourseCards() {
-    const courseCards = document.querySelectorAll('.course-card');
+function initCourseCards(root = document) {
+    const courseCards = root.querySelectorAll('.course-card');
     
     courseCards.forEach(card => {
         card.addEventListener('mouseenter', function() {
@@ -465,6 +540,66 @@ function initCourseCards() {
     });
 }
 
+// Course Grid Infinite Scroll
+// #course-grid's data-next is the URL of the next page of cards (an HTML fragment whose
+// X-Next-Page header points at the page after it). #course-grid-more links to the same
+// page for browsers without JavaScript, and is watched to load it before it is reached.
+function initCourseGrid() {
+    const grid = document.getElementById('course-grid');
+    const more = document.getElementById('course-grid-more');
+    if (!grid || !more || !grid.dataset.next) {
+        return;
+    }
+    
+    let loading = false;
+    let observer = null;
+    
+    const loadMore = () => {
+        if (loading || !grid.dataset.next) return;
+        loading = true;
+        fetch(grid.dataset.next, { headers: { 'Accept': 'text/html' } })
+            .then(response => {
+                if (!response.ok) throw new Error(`HTTP error! status: ${response.status}`);
+                grid.dataset.next = response.headers.get('X-Next-Page') || '';
+                return response.text();
+            })
+            .then(html => {
+                const page = document.createElement('template');
+                page.innerHTML = html;
+                initCourseCards(page.content);
+                grid.appendChild(page.content);
+                
+                if (!grid.dataset.next) {
+                    if (observer) observer.disconnect();
+                    more.remove();
+                } else if (observer) {
+                    // Observe again so a sentinel that is still in view loads the next page too
+                    observer.unobserve(more);
+                    observer.observe(more);
+                }
+            })
+            .catch(error => {
+                console.error('Loading more courses failed:', error);
+                showNotification('Could not load more courses', 'error');
+            })
+            .finally(() => {
+                loading = false;
+            });
+    };
+    
+    more.querySelector('a').addEventListener('click', e => {
+        e.preventDefault();
+        loadMore();
+    });
+    
+    if ('IntersectionObserver' in window) {
+        observer = new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) loadMore();
+        }, { rootMargin: '600px 0px' });
+        observer.observe(more);
+    }
+}
+
 // Mobile menu functionality
 function initMobileMenu() {
     const mobileMenuButton = document.getElementById('mobile-menu-button');
@@ -519,6 +654,7 @@ function initMobileMenu() {
 // Initialize course cards when DOM is loaded
 document.addEventListener('DOMContentLoaded', function() {
     initCourseCards();
+    initCourseGrid();
     initMobileMenu();
 });
 
@@ -0,0 +1,91 @@
+// SMIICT Institute Course Platform - Service Worker
+// Rendered by the /sw.js route; VERSION changes on every deploy that changes assets.
+
+const VERSION = {{ version|tojson }};
+const PRECACHE = `static-${VERSION}`;
+const PAGES = `pages-${VERSION}`;
+const IMAGES = `images-${VERSION}`;
+const PRECACHE_URLS = {{ precache|tojson }};
+const OFFLINE_URL = {{ offline_url|tojson }};
+
+const MAX_PAGES = 50;
+const MAX_IMAGES = 100;
+
+// Public catalog pages served stale-while-revalidate. Everything else (sign-in,
+// dashboard, payment, admin and API routes) always goes to the network.
+const CACHED_PAGES = [/^\/$/, /^\/course\/\d+$/, /^\/courses\/cards$/];
+const CACHED_IMAGES = /^\/static\/uploads\//;
+
+self.addEventListener('install', event => {
+    event.waitUntil(
+        caches.open(PRECACHE)
+            .then(cache => cache.addAll([...PRECACHE_URLS, OFFLINE_URL]))
+            .then(() => self.skipWaiting())
+    );
+});
+
+// Drop the caches of every earlier version
+self.addEventListener('activate', event => {
+    const current = [PRECACHE, PAGES, IMAGES];
+    event.waitUntil(
+        caches.keys()
+            .then(names => Promise.all(names.filter(name => !current.includes(name)).map(name => caches.delete(name))))
+            .then(() => self.clients.claim())
+    );
+});
+
+self.addEventListener('fetch', event => {
+    const request = event.request;
+    const url = new URL(request.url);
+    if (url.origin !== self.location.origin) {
+        return;
+    }
+
+    // Signing in or out (or any form post) changes what pages show, so cached
+    // pages from before must not be served again
+    if (request.method !== 'GET' || url.pathname === '/logout') {
+        event.waitUntil(caches.delete(PAGES));
+        return;
+    }
+
+    if (PRECACHE_URLS.includes(url.pathname)) {
+        event.respondWith(caches.match(request).then(cached => cached || fetch(request)));
+    } else if (CACHED_IMAGES.test(url.pathname)) {
+        event.respondWith(staleWhileRevalidate(event, IMAGES, MAX_IMAGES));
+    } else if (CACHED_PAGES.some(pattern => pattern.test(url.pathname))) {
+        event.respondWith(staleWhileRevalidate(event, PAGES, MAX_PAGES));
+    } else if (request.mode === 'navigate') {
+        event.respondWith(fetch(request).catch(() => caches.match(OFFLINE_URL)));
+    }
+});
+
+function staleWhileRevalidate(event, cacheName, maxEntries) {
+    const request = event.request;
+    return caches.open(cacheName).then(cache => cache.match(request).then(cached => {
+        const network = fetch(request).then(response => {
+            if (isCacheable(response)) {
+                cache.put(request, response.clone()).then(() => trimCache(cache, maxEntries));
+            } else if (response.ok) {
+                // The page is now private (e.g. the visitor signed in elsewhere)
+                cache.delete(request);
+            }
+            return response;
+        });
+
+        if (cached) {
+            event.waitUntil(network.catch(() => undefined));
+            return cached;
+        }
+        return network.catch(() => request.mode === 'navigate' ? caches.match(OFFLINE_URL) : Response.error());
+    }));
+}
+
+function isCacheable(response) {
+    const cacheControl = response.headers.get('Cache-Control') || '';
+    return response.ok && response.type === 'basic' && !response.redirected && !/private|no-store/.test(cacheControl);
+}
+
+// Caches keep insertion order, so the oldest entries go first
+function trimCache(cache, maxEntries) {
+    return cache.keys().then(keys => Promise.all(keys.slice(0, Math.max(0, keys.length - maxEntries)).map(key => cache.delete(key))));
+}
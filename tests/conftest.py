@@ -0,0 +1,80 @@
+"""
+Shared fixtures: the app on a throwaway SQLite file database
+
+DATABASE_URL is set before the app is imported, so these never touch the
+configured Postgres database. Each test gets empty tables and caches.
+"""
+
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+DB_PATH = os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ['DATABASE_URL'] = f'sqlite:///{DB_PATH}'
+os.environ.setdefault('MAIL_SUPPRESS_SEND', 'True')
+
+from app import app as flask_app, db  # noqa: E402
+from models import User  # noqa: E402
+from utils.cache_service import caches  # noqa: E402
+
+
+@pytest.fixture
+def app():
+    flask_app.config.update(TESTING=True, MAIL_SUPPRESS_SEND=True)
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+    for cache in caches.values():
+        cache.clear()
+    yield flask_app
+    with flask_app.app_context():
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+def make_user(email='student@example.com', role='student', **values):
+    """Add and commit a user (call inside an app context), returning its id"""
+    values.setdefault('admin_approved', True)
+    user = User(name=values.pop('name', email.split('@')[0]), email=email, password_hash='x', role=role, **values)
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def login(client, user_id):
+    """Sign a test client in as a user without going through the login form"""
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+
+
+@contextmanager
+def count_queries():
+    """
+    Count the SQL statements sent to the database inside the block
+
+    Yields:
+        list: Statements executed so far (its len() is the count)
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    with flask_app.app_context():
+        engine = db.engine
+    event.listen(engine, 'before_cursor_execute', record)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
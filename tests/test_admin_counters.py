@@ -0,0 +1,58 @@
+"""
+The admin counters row is seeded safely and reconciled without holding its lock over table scans
+"""
+
+import re
+
+from models import db, AdminCounter, ContactMessage
+from utils import counter_service
+from utils.counter_service import adjust_counters, get_admin_counters, reconcile_counters, COUNTER_ID
+from conftest import count_queries
+
+
+def add_message():
+    db.session.add(ContactMessage(name='Sender', email='sender@example.com', subject='Hello', message='Hi'))
+
+
+def test_first_increment_when_another_request_seeded_meanwhile(app, monkeypatch):
+    exact_counts = counter_service.exact_counts
+
+    def seeded_elsewhere():
+        # Another request inserts the row (from tables without our message) just before we do
+        db.session.add(AdminCounter(id=COUNTER_ID, unread_messages=0, pending_admins=0,
+                                    pending_payments=0, total_revenue=0))
+        db.session.flush()
+        return exact_counts()
+
+    with app.app_context():
+        add_message()
+        monkeypatch.setattr(counter_service, 'exact_counts', seeded_elsewhere)
+        adjust_counters(unread_messages=1)
+        db.session.commit()
+        monkeypatch.setattr(counter_service, 'exact_counts', exact_counts)
+
+        assert db.session.get(AdminCounter, COUNTER_ID).unread_messages == 1
+
+
+def test_get_admin_counters_seeds_once(app):
+    with app.app_context():
+        add_message()
+        db.session.commit()
+        assert get_admin_counters().unread_messages == 1
+        assert get_admin_counters().unread_messages == 1
+        assert AdminCounter.query.count() == 1
+
+
+def test_reconcile_counts_before_locking(app):
+    with app.app_context():
+        get_admin_counters()
+        add_message()
+        db.session.commit()  # Not counted, so the counters drift
+
+        with count_queries() as statements:
+            counter = reconcile_counters()
+        assert counter.unread_messages == 1
+
+    counts = [i for i, statement in enumerate(statements) if 'count(' in statement.lower()]
+    lock = next(i for i, statement in enumerate(statements) if re.search(r'FROM admin_counter\b', statement))
+    assert counts and lock > max(counts)
@@ -0,0 +1,152 @@
+"""
+Query budgets of the /api/v1 endpoints
+
+Each endpoint must issue the same number of statements whether the
+database holds one row or many, with or without field selection and on
+later cursor pages.
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Course, Application, Coupon, CouponUsage
+from conftest import make_user, login, count_queries
+
+# Statements per request; signed-in requests include loading the session user
+COURSE_LIST_BUDGET = 1
+COURSE_BUDGET = 1
+PRICING_BUDGET = 1
+PRICING_COUPON_BUDGET = 2  # The course and the coupon
+MY_PRICING_COUPON_BUDGET = 4  # Plus the session user and their usage count of the coupon
+MY_APPLICATIONS_BUDGET = 2
+MY_APPLICATION_BUDGET = 2
+
+PAGE_LIMIT = 5
+
+
+@pytest.fixture(params=[1, 25], ids=['1-row', '25-rows'])
+def seeded(request, app):
+    """A student with one application (and use of the SAVE10 coupon) per course, for 1 or 25 courses"""
+    with app.app_context():
+        student_id = make_user()
+        coupon = Coupon(code='SAVE10', description='10% off', discount_type='percentage', discount_value=10,
+                        user_limit=100, valid_from=datetime.utcnow() - timedelta(days=1))
+        db.session.add(coupon)
+        for i in range(request.param):
+            course = Course(title=f'Course {i}', description='About it', duration='6 weeks', price=20000 + i)
+            db.session.add(course)
+            db.session.flush()
+            application = Application(user_id=student_id, course_id=course.id, status='pending',
+                                      payment_status='pending', original_price=course.price,
+                                      discount_amount=0, final_price=course.price)
+            db.session.add(application)
+            db.session.flush()
+            db.session.add(CouponUsage(coupon_id=coupon.id, user_id=student_id, application_id=application.id,
+                                       discount_amount=2000))
+        db.session.commit()
+        first_course = Course.query.order_by(Course.id).first().id
+        first_application = Application.query.order_by(Application.id).first().id
+    return {'rows': request.param, 'student_id': student_id, 'course_id': first_course,
+            'application_id': first_application}
+
+
+def queries_for(client, path):
+    # Warm up so connection setup is not counted
+    client.get(path)
+    with count_queries() as statements:
+        response = client.get(path)
+    assert response.status_code == 200, response.get_data(as_text=True)
+    return len(statements), response.get_json()
+
+
+def all_pages(client, path, budget):
+    """Walk every cursor page of a list endpoint, checking each stays within budget"""
+    data = []
+    while path:
+        count, body = queries_for(client, path)
+        assert count == budget, path
+        data += body['data']
+        path = f"{path.split('&cursor=')[0]}&cursor={body['next_cursor']}" if body['next_cursor'] else None
+    return data
+
+
+@pytest.mark.parametrize('fields', ['', '&fields=title,price'])
+def test_course_list(client, seeded, fields):
+    courses = all_pages(client, f'/api/v1/courses?limit={PAGE_LIMIT}{fields}', COURSE_LIST_BUDGET)
+    assert len(courses) == seeded['rows']
+
+
+@pytest.mark.parametrize('fields', ['', '?fields=title'])
+def test_course(client, seeded, fields):
+    count, body = queries_for(client, f"/api/v1/courses/{seeded['course_id']}{fields}")
+    assert count == COURSE_BUDGET
+    assert body['data']['id'] == seeded['course_id']
+
+
+def test_course_pricing(client, seeded):
+    count, body = queries_for(client, f"/api/v1/courses/{seeded['course_id']}/pricing")
+    assert count == PRICING_BUDGET
+    assert body['data']['coupon'] is None
+
+
+def test_course_pricing_with_coupon(client, seeded):
+    path = f"/api/v1/courses/{seeded['course_id']}/pricing?coupon=save10"
+    count, body = queries_for(client, path)
+    assert count == PRICING_COUPON_BUDGET
+    assert body['data']['coupon']['code'] == 'SAVE10'
+
+    # Signed in, the per-user limit is checked too: one count, however often it was used
+    login(client, seeded['student_id'])
+    count, body = queries_for(client, path)
+    assert count == MY_PRICING_COUPON_BUDGET
+    assert body['data']['discount_amount'] == 2000
+
+
+def test_etag_revalidation(app, client, seeded):
+    path = f"/api/v1/courses/{seeded['course_id']}"
+    response = client.get(path)
+    etag = response.headers['ETag']
+    assert response.status_code == 200
+    assert 'public' in response.headers['Cache-Control']
+
+    with count_queries() as statements:
+        revalidated = client.get(path, headers={'If-None-Match': etag})
+    assert revalidated.status_code == 304
+    assert revalidated.data == b''
+    assert len(statements) == COURSE_BUDGET
+
+    with app.app_context():
+        db.session.get(Course, seeded['course_id']).price = 25000
+        db.session.commit()
+    changed = client.get(path, headers={'If-None-Match': etag})
+    assert changed.status_code == 200
+    assert changed.headers['ETag'] != etag
+    assert changed.get_json()['data']['price'] == 25000
+
+
+def test_private_etag_revalidation(client, seeded):
+    login(client, seeded['student_id'])
+    path = f"/api/v1/me/applications/{seeded['application_id']}"
+    response = client.get(path)
+    assert 'private' in response.headers['Cache-Control']
+    assert 'Cookie' in response.headers['Vary']
+
+    revalidated = client.get(path, headers={'If-None-Match': response.headers['ETag']})
+    assert revalidated.status_code == 304
+
+
+@pytest.mark.parametrize('fields', ['', '&fields=course,payment_status', '&fields=final_price'])
+def test_my_applications(client, seeded, fields):
+    login(client, seeded['student_id'])
+    applications = all_pages(client, f'/api/v1/me/applications?limit={PAGE_LIMIT}{fields}',
+                             MY_APPLICATIONS_BUDGET)
+    assert len(applications) == seeded['rows']
+
+
+@pytest.mark.parametrize('fields', ['', '?fields=course'])
+def test_my_application(client, seeded, fields):
+    login(client, seeded['student_id'])
+    count, body = queries_for(client, f"/api/v1/me/applications/{seeded['application_id']}{fields}")
+    assert count == MY_APPLICATION_BUDGET
+    assert body['data']['id'] == seeded['application_id']
@@ -0,0 +1,96 @@
+"""
+Bulk admin actions only ever touch the rows that were selected
+"""
+
+import pytest
+
+from models import db, ContactMessage
+from utils.counter_service import COUNTERS, exact_counts, get_admin_counters
+from conftest import make_user, login, count_queries
+
+
+@pytest.fixture
+def admin_client(app, client):
+    with app.app_context():
+        admin_id = make_user('admin@example.com', role='admin')
+        for i in range(5):
+            db.session.add(ContactMessage(name=f'Sender {i}', email=f'sender{i}@example.com',
+                                          subject='Hello', message='Hi there'))
+        db.session.commit()
+    login(client, admin_id)
+    return client
+
+
+def message_count(app):
+    with app.app_context():
+        return ContactMessage.query.count()
+
+
+@pytest.mark.parametrize('ids', ['42', [1.9, True], [True], 3, [2, '4x'], [-1]],
+                         ids=['string', 'float-and-bool', 'bool', 'int', 'bad-string', 'negative'])
+def test_json_ids_must_be_a_list_of_integers(app, admin_client, ids):
+    response = admin_client.post('/admin/messages/bulk', json={'action': 'delete', 'ids': ids})
+
+    assert response.status_code == 400
+    assert response.get_json()['message'] == 'Invalid message ids'
+    assert message_count(app) == 5
+
+
+def test_json_ids(app, admin_client):
+    response = admin_client.post('/admin/messages/bulk', json={'action': 'delete', 'ids': [2, 4, 4]})
+
+    assert response.status_code == 200
+    with app.app_context():
+        assert sorted(message.id for message in ContactMessage.query) == [1, 3, 5]
+
+
+def test_form_ids(app, admin_client):
+    response = admin_client.post('/admin/messages/bulk', data={'action': 'mark_read', 'ids': ['1', '3']})
+
+    assert response.status_code == 200
+    with app.app_context():
+        assert sorted(message.id for message in ContactMessage.query.filter_by(is_read=True)) == [1, 3]
+
+
+def counters(app):
+    """The stored admin counters next to the values computed from the tables"""
+    with app.app_context():
+        db.session.expire_all()
+        counter = get_admin_counters()
+        stored = {name: getattr(counter, name) for name in COUNTERS}
+        return stored, exact_counts()
+
+
+def bulk(client, path, action, ids):
+    """Post a bulk action, checking it moves the counters without recounting the tables"""
+    with count_queries() as statements:
+        response = client.post(path, json={'action': action, 'ids': ids})
+    assert not [statement for statement in statements if 'count(' in statement.lower()]
+    return response
+
+
+def test_message_actions_keep_unread_counter(app, admin_client):
+    counters(app)  # Seed the row before any change
+
+    for action, ids in [('mark_read', [1, 2]), ('mark_read', [2, 3]), ('mark_unread', [1, 4]),
+                        ('delete', [1, 3, 5])]:
+        response = bulk(admin_client, '/admin/messages/bulk', action, ids)
+        assert response.status_code == 200
+        stored, exact = counters(app)
+        assert stored == exact, action
+    assert stored['unread_messages'] == 1  # 2 (read) and 4 (unread) are left
+
+
+def test_user_actions_keep_pending_admin_counter(app, admin_client):
+    with app.app_context():
+        pending = [make_user(f'pending{i}@example.com', role='admin', admin_approved=False) for i in range(3)]
+        student = make_user('student@example.com')
+    counters(app)
+
+    for action, ids in [('deactivate', [pending[0], student]), ('activate', [pending[0]]),
+                        ('delete', pending[1:] + [student])]:
+        response = bulk(admin_client, '/admin/users/bulk', action, ids)
+        assert response.status_code == 200
+        stored, exact = counters(app)
+        assert stored == exact, action
+    assert stored['pending_admins'] == 0
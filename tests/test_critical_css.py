@@ -0,0 +1,18 @@
+"""
+Every template with a fold marker keeps its critical CSS within the budget (no browser needed)
+"""
+
+import re
+
+from build_assets import CRITICAL_CSS_BUDGET, build_critical_css
+
+
+def test_critical_css_within_budget(capsys):
+    files = {}
+    critical, over_budget = build_critical_css(files, CRITICAL_CSS_BUDGET, write=False)
+
+    assert over_budget == []
+    assert files == {} and critical == {}  # Only checked, nothing written
+    # One size line per template with a fold marker, e.g. index.html and course_detail.html
+    checked = re.findall(r'^(\S+\.html): [\d.]+ KB critical CSS', capsys.readouterr().out, re.M)
+    assert {'index.html', 'course_detail.html'} <= set(checked)
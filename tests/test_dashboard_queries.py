@@ -0,0 +1,72 @@
+"""
+The student dashboard issues a constant number of queries, whatever the number of applications
+"""
+
+import re
+from datetime import datetime, timedelta
+
+import app as app_module
+from models import db, Course, Coupon, Application
+from conftest import make_user, login, count_queries
+
+
+def seed_applications(count):
+    """A student with count applications, every other one paid with a coupon; returns the student id"""
+    student_id = make_user()
+    coupon = Coupon(code='SAVE10', description='10% off', discount_type='percentage', discount_value=10,
+                    valid_from=datetime.utcnow() - timedelta(days=1),
+                    valid_until=datetime.utcnow() + timedelta(days=30))
+    db.session.add(coupon)
+    for i in range(count):
+        course = Course(title=f'Course {i}', description='About it', duration='6 weeks', price=20000)
+        db.session.add(course)
+        db.session.flush()
+        paid = i % 2 == 0
+        db.session.add(Application(
+            user_id=student_id, course_id=course.id, status='pending',
+            payment_status='completed' if paid else 'pending', paid_at=datetime.utcnow() if paid else None,
+            coupon_id=coupon.id if paid else None, original_price=20000,
+            discount_amount=2000 if paid else 0, final_price=18000 if paid else 20000
+        ))
+    db.session.commit()
+    return student_id
+
+
+def dashboard_queries(client):
+    """Statements issued by a dashboard request that misses the cache"""
+    app_module.dashboard_cache.clear()
+    with count_queries() as statements:
+        response = client.get('/dashboard')
+    assert response.status_code == 200
+    return statements
+
+
+def test_query_count_does_not_grow_with_applications(app):
+    counts = {}
+    for applications in (1, 20):
+        with app.app_context():
+            db.drop_all()
+            db.create_all()
+            student_id = seed_applications(applications)
+        client = app.test_client()
+        login(client, student_id)
+        client.get('/dashboard')  # Warm up the connection
+        statements = dashboard_queries(client)
+        counts[applications] = len(statements)
+        assert b'SAVE10' in client.get('/dashboard').data
+
+    assert counts[1] == counts[20] == 2  # The session user and the applications with course and coupon
+
+
+def test_cache_hit_only_loads_session_user(app, client):
+    with app.app_context():
+        student_id = seed_applications(20)
+    login(client, student_id)
+    client.get('/dashboard')  # Fills the cache
+
+    with count_queries() as statements:
+        response = client.get('/dashboard')
+
+    assert response.status_code == 200
+    assert len(statements) == 1
+    assert re.search(r'FROM "?user"?\s', statements[0])
@@ -0,0 +1,164 @@
+"""
+The job queue: cron schedules, claiming, retries with backoff, dead jobs and recovery
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from models import db, Job, JobSchedule
+from utils.job_service import (JOBS, JobDefinition, CronSchedule, Worker, enqueue, claim_jobs, retry_delay,
+                               requeue_abandoned, sync_schedules, enqueue_due_schedules)
+
+calls = []
+
+
+def record(**kwargs):
+    calls.append(kwargs)
+
+
+def fail(**kwargs):
+    calls.append(kwargs)
+    raise RuntimeError('Paystack is down')
+
+
+@pytest.fixture(autouse=True)
+def test_jobs(monkeypatch):
+    calls.clear()
+    monkeypatch.setitem(JOBS, 'tests.record', JobDefinition('tests.record', record))
+    monkeypatch.setitem(JOBS, 'tests.fail', JobDefinition('tests.fail', fail, max_attempts=3))
+    monkeypatch.setitem(JOBS, 'tests.hourly', JobDefinition('tests.hourly', record, schedule='0 * * * *'))
+
+
+def queue(app, name, **values):
+    """Add a job row directly, returning its id"""
+    with app.app_context():
+        row = enqueue(name)
+        for key, value in values.items():
+            setattr(row, key, value)
+        db.session.commit()
+        return row.id
+
+
+def job_row(app, job_id):
+    with app.app_context():
+        row = db.session.get(Job, job_id)
+        db.session.expunge(row)
+        return row
+
+
+@pytest.mark.parametrize('expression, after, expected', [
+    ('*/15 * * * *', datetime(2026, 3, 10, 10, 7, 30), datetime(2026, 3, 10, 10, 15)),
+    ('*/15 * * * *', datetime(2026, 3, 10, 10, 15), datetime(2026, 3, 10, 10, 30)),
+    ('30 3 * * *', datetime(2026, 3, 10, 3, 30), datetime(2026, 3, 11, 3, 30)),
+    ('0 9 * * 1-5', datetime(2026, 3, 13, 9, 0), datetime(2026, 3, 16, 9, 0)),  # Friday to Monday
+    ('0 0 13 * 5', datetime(2026, 3, 1), datetime(2026, 3, 6)),  # Either day field matches
+    ('@monthly', datetime(2026, 12, 15), datetime(2027, 1, 1)),
+    ('0 0 29 2 *', datetime(2026, 3, 1), datetime(2028, 2, 29)),
+    ('0 8-18/2 * * 7', datetime(2026, 3, 14, 23, 0), datetime(2026, 3, 15, 8, 0)),  # 7 is Sunday
+])
+def test_cron_next_after(expression, after, expected):
+    assert CronSchedule(expression).next_after(after) == expected
+
+
+@pytest.mark.parametrize('expression', ['* * * *', '60 * * * *', '0 0 31 2 *'])
+def test_cron_rejects_bad_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression).next_after(datetime(2026, 1, 1))
+
+
+def test_claim_jobs_takes_due_jobs_oldest_first(app):
+    now = datetime.utcnow()
+    later = queue(app, 'tests.record', run_at=now - timedelta(minutes=1))
+    oldest = queue(app, 'tests.record', run_at=now - timedelta(minutes=5))
+    queue(app, 'tests.record', run_at=now + timedelta(minutes=5))
+    third = queue(app, 'tests.record', run_at=now - timedelta(seconds=1))
+
+    with app.app_context():
+        assert claim_jobs('worker-a', 2) == [oldest, later]
+        assert claim_jobs('worker-b', 5) == [third]
+        assert claim_jobs('worker-c', 5) == []
+
+    claimed = job_row(app, oldest)
+    assert (claimed.status, claimed.locked_by, claimed.attempts) == ('running', 'worker-a', 1)
+
+
+def test_burst_worker_runs_queued_jobs(app):
+    with app.app_context():
+        enqueue('tests.record', course_id=7)
+        enqueue('tests.record', course_id=8)
+        db.session.commit()
+
+    metrics = Worker(app, threads=2, poll_interval=0).run(burst=True)
+
+    assert sorted(call['course_id'] for call in calls) == [7, 8]
+    assert metrics['tests.record']['runs'] == 2
+    with app.app_context():
+        assert {row.status for row in Job.query.filter_by(name='tests.record')} == {'succeeded'}
+
+
+def test_failed_job_is_retried_later(app):
+    job_id = queue(app, 'tests.fail')
+
+    Worker(app, threads=1, poll_interval=0).run(burst=True)
+
+    failed = job_row(app, job_id)
+    assert len(calls) == 1
+    assert (failed.status, failed.attempts) == ('queued', 1)
+    assert failed.last_error == 'RuntimeError: Paystack is down'
+    # JOB_RETRY_BASE_DELAY (30s) halved at most by jitter
+    assert failed.run_at >= datetime.utcnow() + timedelta(seconds=14)
+
+
+def test_job_dies_after_max_attempts(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'JOB_RETRY_BASE_DELAY', 0)
+    job_id = queue(app, 'tests.fail')
+
+    Worker(app, threads=1, poll_interval=0).run(burst=True)
+
+    dead = job_row(app, job_id)
+    assert len(calls) == 3
+    assert (dead.status, dead.attempts) == ('dead', 3)
+    assert dead.finished_at is not None
+
+
+def test_retry_delay_backs_off_up_to_the_cap(app):
+    with app.app_context():
+        for attempts, full in [(1, 30), (2, 60), (3, 120), (8, 3600), (20, 3600)]:
+            delays = [retry_delay(attempts) for _ in range(50)]
+            assert all(full / 2 <= delay <= full for delay in delays), attempts
+
+
+def test_requeue_abandoned(app):
+    stale = datetime.utcnow() - timedelta(minutes=10)
+    abandoned = queue(app, 'tests.record', status='running', attempts=1, locked_by='gone', locked_at=stale)
+    exhausted = queue(app, 'tests.record', status='running', attempts=5, max_attempts=5, locked_by='gone',
+                      locked_at=stale)
+    alive = queue(app, 'tests.record', status='running', attempts=1, locked_by='busy',
+                  locked_at=datetime.utcnow())
+
+    with app.app_context():
+        assert requeue_abandoned(timeout=300) == 2
+
+    assert (job_row(app, abandoned).status, job_row(app, abandoned).locked_by) == ('queued', None)
+    assert job_row(app, exhausted).status == 'dead'
+    assert job_row(app, alive).status == 'running'
+
+
+def test_due_schedule_is_queued_once(app):
+    with app.app_context():
+        sync_schedules()
+        schedule = db.session.get(JobSchedule, 'tests.hourly')
+        assert schedule.next_run_at > datetime.utcnow()
+        due_at = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=1)
+        schedule.next_run_at = due_at
+        db.session.commit()
+
+        assert enqueue_due_schedules() == 1
+        assert enqueue_due_schedules() == 0
+
+        queued = Job.query.filter_by(name='tests.hourly').one()
+        assert queued.run_at == due_at
+        schedule = db.session.get(JobSchedule, 'tests.hourly')
+        assert schedule.last_run_at == due_at
+        assert schedule.next_run_at == CronSchedule('0 * * * *').next_after(datetime.utcnow())
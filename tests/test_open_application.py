@@ -0,0 +1,93 @@
+"""
+Concurrent applications for the same course create one application and one admin notification
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+
+import pytest
+from sqlalchemy import text
+
+import app as app_module
+from models import db, Course, Application
+from conftest import make_user, login
+
+PARALLEL_REQUESTS = 8
+
+
+@pytest.fixture
+def student_and_course(app):
+    with app.app_context():
+        make_user('admin@example.com', role='admin')
+        student_id = make_user('student@example.com')
+        course = Course(title='Python Basics', description='Intro', duration='8 weeks', price=30000)
+        db.session.add(course)
+        db.session.commit()
+        return student_id, course.id
+
+
+@pytest.fixture
+def mocked_emails():
+    email_service = app_module.email_service
+    with mock.patch.object(email_service, 'send_course_application_email') as applicant, \
+            mock.patch.object(email_service, 'send_admin_notification_email') as admin:
+        yield applicant, admin
+
+
+def fire(app, student_id, method, path):
+    """Send the same request from PARALLEL_REQUESTS clients at once"""
+    clients = [app.test_client() for _ in range(PARALLEL_REQUESTS)]
+    for client in clients:
+        login(client, student_id)
+    with ThreadPoolExecutor(PARALLEL_REQUESTS) as pool:
+        responses = list(pool.map(lambda client: client.open(path, method=method), clients))
+    return [response.status_code for response in responses]
+
+
+def test_parallel_apply_creates_one_application(app, student_and_course, mocked_emails):
+    student_id, course_id = student_and_course
+    applicant_email, admin_email = mocked_emails
+
+    statuses = fire(app, student_id, 'POST', f'/apply/{course_id}')
+
+    assert statuses == [302] * PARALLEL_REQUESTS
+    with app.app_context():
+        assert Application.query.count() == 1
+    assert applicant_email.call_count == 1
+    assert admin_email.call_count == 1
+
+
+def test_parallel_payment_course_creates_one_application(app, student_and_course, mocked_emails):
+    student_id, course_id = student_and_course
+    _, admin_email = mocked_emails
+
+    statuses = fire(app, student_id, 'GET', f'/payment/course/{course_id}')
+
+    assert statuses == [302] * PARALLEL_REQUESTS
+    with app.app_context():
+        assert Application.query.count() == 1
+    # Going straight to payment does not notify the admins
+    assert admin_email.call_count == 0
+
+
+def test_serialized_creators_without_unique_index(app, student_and_course, mocked_emails):
+    # A partitioned application table has no uq_application_open, so nothing
+    # conflicts; creators are serialized by the advisory lock instead and each
+    # must find the application the one before it committed
+    student_id, course_id = student_and_course
+    with app.app_context():
+        db.session.execute(text('DROP INDEX uq_application_open'))
+        db.session.commit()
+
+    created = []
+    for _ in range(2):
+        with app.app_context():
+            course = db.session.get(Course, course_id)
+            application, was_created = app_module.create_open_application(student_id, course)
+            db.session.commit()
+            created.append((application.id, was_created))
+
+    assert created[0][1] is True
+    assert created[1] == (created[0][0], False)
+    with app.app_context():
+        assert Application.query.count() == 1
@@ -0,0 +1,37 @@
+"""
+Purging a deleted user removes everything that belongs to them, and nothing else
+"""
+
+from datetime import datetime
+
+from models import db, User, Course, Application, PaymentReference
+from utils.purge_service import PurgeService
+from conftest import make_user
+
+
+def add_application(user_id, course, reference, payment_status='pending'):
+    application = Application(user_id=user_id, course_id=course.id, status='pending', payment_status=payment_status,
+                              original_price=course.price, discount_amount=0, final_price=course.price)
+    db.session.add(application)
+    db.session.flush()
+    db.session.add(PaymentReference(application_id=application.id, reference=reference,
+                                    idempotency_key=reference, amount=course.price))
+    return application
+
+
+def test_purge_removes_payment_references(app):
+    with app.app_context():
+        course = Course(title='Python Basics', description='Intro', duration='8 weeks', price=30000)
+        db.session.add(course)
+        deleted_id = make_user('gone@example.com', deleted_at=datetime.utcnow())
+        kept_id = make_user('kept@example.com')
+        add_application(deleted_id, course, 'REF-GONE-1', payment_status='abandoned')
+        add_application(deleted_id, course, 'REF-GONE-2')
+        add_application(kept_id, course, 'REF-KEPT')
+        db.session.commit()
+
+        assert PurgeService().run() == 1
+
+        assert db.session.get(User, deleted_id) is None
+        assert [application.user_id for application in Application.query] == [kept_id]
+        assert [reference.reference for reference in PaymentReference.query] == ['REF-KEPT']
@@ -0,0 +1,84 @@
+"""
+Announcement sends and user purges are queued as jobs, not run on threads in the web process
+"""
+
+import threading
+
+import pytest
+
+import app as app_module
+import jobs  # noqa: F401  (registers the jobs)
+from models import db, User, Course, Application, Announcement, Job
+from utils.job_service import Worker
+from conftest import make_user, login
+
+
+@pytest.fixture
+def admin_client(app, client):
+    with app.app_context():
+        admin_id = make_user('admin@example.com', role='admin')
+    login(client, admin_id)
+    return client
+
+
+def queued(app, name):
+    with app.app_context():
+        return [(row.args, row.status) for row in Job.query.filter_by(name=name)]
+
+
+def test_delete_user_queues_purge(app, admin_client):
+    with app.app_context():
+        user_id = make_user()
+    threads = threading.active_count()
+
+    admin_client.post(f'/admin/users/{user_id}/delete')
+
+    assert threading.active_count() == threads
+    assert queued(app, 'users.purge') == [('{}', 'queued')]
+    Worker(app, threads=1, poll_interval=0).run(burst=True)
+    with app.app_context():
+        assert db.session.get(User, user_id) is None
+
+
+def test_bulk_delete_queues_purge(app, admin_client):
+    with app.app_context():
+        ids = [make_user(f'student{i}@example.com') for i in range(3)]
+
+    response = admin_client.post('/admin/users/bulk', json={'action': 'delete', 'ids': ids})
+
+    assert response.get_json()['affected'] == 3
+    assert queued(app, 'users.purge') == [('{}', 'queued')]
+
+
+def test_announcement_is_sent_by_the_worker(app, admin_client, monkeypatch):
+    monkeypatch.setattr(app.extensions['mail'], 'suppress', True)
+    monkeypatch.setitem(app.config, 'MAIL_USERNAME', 'courses@example.com')
+    with app.app_context():
+        course = Course(title='Python Basics', description='Intro', duration='8 weeks', price=30000)
+        db.session.add(course)
+        db.session.flush()
+        for i in range(3):
+            student_id = make_user(f'student{i}@example.com')
+            db.session.add(Application(user_id=student_id, course_id=course.id, status='approved',
+                                       payment_status='completed', original_price=30000, discount_amount=0,
+                                       final_price=30000))
+        db.session.commit()
+        course_id = course.id
+
+    admin_client.post(f'/admin/courses/{course_id}/announce',
+                      data={'subject': 'Welcome', 'message': 'Class starts Monday'})
+
+    with app.app_context():
+        announcement = Announcement.query.one()
+        assert announcement.status == 'pending'
+        announcement_id = announcement.id
+    assert queued(app, 'announcement.send') == [(f'{{"announcement_id": {announcement_id}}}', 'queued')]
+
+    with app_module.mail.record_messages() as outbox:
+        Worker(app, threads=1, poll_interval=0).run(burst=True)
+        with app.app_context():
+            announcement = db.session.get(Announcement, announcement_id)
+            assert (announcement.status, announcement.sent_count) == ('completed', 3)
+            # A second run (e.g. a requeued job) finds it finished and sends nothing
+            assert app_module.announcement_service.run(announcement_id) is False
+    assert sorted(message.recipients[0] for message in outbox) == [f'student{i}@example.com' for i in range(3)]
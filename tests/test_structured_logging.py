@@ -0,0 +1,66 @@
+"""
+Records dropped on a full log queue are reported, not lost silently
+"""
+
+import logging
+import queue
+import threading
+
+from utils.structured_logging import NonBlockingQueueHandler, ReportingQueueListener
+
+
+class Collect(logging.Handler):
+    """Keeps records; blocks until released so the queue fills up"""
+
+    def __init__(self):
+        super().__init__()
+        self.records = []
+        self.unblock = threading.Event()
+
+    def emit(self, record):
+        self.unblock.wait(5)
+        self.records.append(record)
+
+
+def warnings_in(handler):
+    return [record.getMessage() for record in handler.records if record.levelno == logging.WARNING]
+
+
+def test_dropped_records_are_reported_on_stop():
+    sink = Collect()
+    queue_handler = NonBlockingQueueHandler(queue.Queue(maxsize=5))
+    listener = ReportingQueueListener(queue_handler, sink, interval=3600)
+    listener.start()
+    logger = logging.getLogger('tests.dropped')
+    logger.propagate = False
+    logger.addHandler(queue_handler)
+    try:
+        for i in range(50):
+            logger.warning('message %s', i)
+        sink.unblock.set()
+    finally:
+        logger.removeHandler(queue_handler)
+        listener.stop()
+
+    assert queue_handler.dropped > 0
+    dropped = queue_handler.dropped
+    assert warnings_in(sink)[-1] == (f'{dropped} log records were dropped because the log queue was full '
+                                     f'({dropped} since start)')
+
+
+def test_report_only_covers_new_drops():
+    sink = Collect()
+    sink.unblock.set()
+    queue_handler = NonBlockingQueueHandler(queue.Queue())
+    listener = ReportingQueueListener(queue_handler, sink)
+
+    queue_handler.dropped = 3
+    listener.report_dropped()
+    listener.report_dropped()
+    queue_handler.dropped = 5
+    listener.report_dropped()
+
+    assert warnings_in(sink) == [
+        '3 log records were dropped because the log queue was full (3 since start)',
+        '2 log records were dropped because the log queue was full (5 since start)',
+    ]
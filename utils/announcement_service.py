@@ -0,0 +1,246 @@
+"""
+Announcement Service for SMIICT Institute Course Platform
+Sends course announcements to every enrolled student in the background
+"""
+
+import queue
+import threading
+import time
+from datetime import datetime, timedelta
+from flask import current_app
+from flask_mail import Message
+from sqlalchemy import select, update, or_
+import logging
+
+from models import db, Announcement, Application, User
+from utils.tracing import tracer, carry_context
+
+logger = logging.getLogger(__name__)
+
+# A running announcement whose heartbeat is older than this is considered
+# abandoned (e.g. the worker process died) and may be resumed.
+STALE_AFTER = timedelta(minutes=5)
+
+
+class RateLimiter:
+    """Spaces calls out so that at most ``rate`` happen per second"""
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate else 0
+        self.next_slot = time.monotonic()
+        self.lock = threading.Lock()
+
+    def wait(self):
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            delay = self.next_slot - now
+            self.next_slot = max(now, self.next_slot) + self.interval
+        if delay > 0:
+            time.sleep(delay)
+
+
+class SmtpPool:
+    """
+    A fixed number of sender threads, each holding one open SMTP connection
+
+    Messages are queued with ``send`` and ``join`` blocks until every queued
+    message has been handed to the server (or has failed).
+    """
+
+    def __init__(self, app, mail, size, rate_limiter):
+        self.app = app
+        self.mail = mail
+        self.rate_limiter = rate_limiter
+        self.queue = queue.Queue(maxsize=size * 10)
+        self.lock = threading.Lock()
+        self.sent = 0
+        self.failed = 0
+        self.last_error = None
+        self.threads = [threading.Thread(target=carry_context(self._worker), daemon=True) for _ in range(size)]
+        for thread in self.threads:
+            thread.start()
+
+    def _worker(self):
+        with self.app.app_context():
+            connection = None
+            while True:
+                msg = self.queue.get()
+                if msg is None:
+                    self._close(connection)
+                    self.queue.task_done()
+                    return
+                try:
+                    self.rate_limiter.wait()
+                    if connection is None:
+                        connection = self.mail.connect().__enter__()
+                    with tracer.span('smtp send course_announcement', kind='client',
+                                     attributes={'messaging.system': 'smtp', 'email.kind': 'course_announcement'}):
+                        connection.send(msg)
+                    with self.lock:
+                        self.sent += 1
+                except Exception as e:
+                    logger.error("Error sending announcement to %s: %s", msg.recipients, e)
+                    with self.lock:
+                        self.failed += 1
+                        self.last_error = str(e)
+                    # Reconnect for the next message in case the connection broke
+                    self._close(connection)
+                    connection = None
+                finally:
+                    self.queue.task_done()
+
+    @staticmethod
+    def _close(connection):
+        if connection is None:
+            return
+        try:
+            connection.__exit__(None, None, None)
+        except Exception:
+            pass
+
+    def send(self, msg):
+        self.queue.put(msg)
+
+    def join(self):
+        self.queue.join()
+
+    def take_counts(self):
+        """Return and reset the sent/failed counters"""
+        with self.lock:
+            counts = (self.sent, self.failed, self.last_error)
+            self.sent = self.failed = 0
+            return counts
+
+    def close(self):
+        for _ in self.threads:
+            self.queue.put(None)
+        for thread in self.threads:
+            thread.join()
+
+
+class AnnouncementService:
+    def __init__(self, mail, templates):
+        self.mail = mail
+        self.templates = templates
+        self.batch_size = current_app.config.get('ANNOUNCEMENT_BATCH_SIZE', 500)
+        self.rate_limit = current_app.config.get('ANNOUNCEMENT_RATE_LIMIT', 10)
+        self.connections = current_app.config.get('ANNOUNCEMENT_SMTP_CONNECTIONS', 2)
+
+    @staticmethod
+    def recipients_query(course_id, after_user_id=0):
+        """Enrolled (paid) students of a course, one row per user, in id order"""
+        enrolled = select(Application.user_id).where(
+            Application.course_id == course_id,
+            Application.payment_status == 'completed'
+        )
+        return (
+            select(User.id, User.name, User.email)
+            .where(User.id.in_(enrolled), User.id > after_user_id, User.deleted_at.is_(None))
+            .order_by(User.id)
+        )
+
+    def can_resume(self, announcement):
+        """Check whether an unfinished announcement may be (re)started"""
+        if announcement.status == 'completed':
+            return False
+        if announcement.status == 'running':
+            return datetime.utcnow() - announcement.updated_at > STALE_AFTER
+        return True
+
+    def run(self, announcement_id):
+        """
+        Send an announcement, continuing after the last recorded recipient
+
+        Run by the announcement.send job. Recipients are read in user id
+        order and progress is committed after every batch, so a crashed send
+        resumes from the last finished batch instead of from zero. Only one
+        run at a time sends a given announcement: a second one (a resume
+        clicked twice, a requeued job) returns unless the first one's
+        heartbeat is stale.
+
+        Args:
+            announcement_id (int): Announcement to send
+
+        Returns:
+            bool: False if it was already being sent or had finished
+        """
+        now = datetime.utcnow()
+        taken = db.session.execute(
+            update(Announcement)
+            .where(Announcement.id == announcement_id, Announcement.status != 'completed',
+                   or_(Announcement.status != 'running', Announcement.updated_at < now - STALE_AFTER))
+            .values(status='running', updated_at=now)
+        ).rowcount
+        db.session.commit()
+        if not taken:
+            logger.info("Announcement %s is already being sent or has finished", announcement_id)
+            return False
+
+        announcement = db.session.get(Announcement, announcement_id)
+        course = announcement.course
+        if announcement.total_recipients is None:
+            announcement.total_recipients = db.session.execute(
+                select(db.func.count()).select_from(self.recipients_query(course.id).subquery())
+            ).scalar()
+        db.session.commit()
+
+        base_url = current_app.config.get('BASE_URL', 'http://localhost:5000')
+        shared = {
+            'course': course,
+            'subject': announcement.subject,
+            'message': announcement.message,
+            'course_url': f"{base_url}/course/{course.id}",
+            'contact_email': current_app.config['CONTACT_EMAIL'],
+            'contact_phone': current_app.config['CONTACT_PHONE']
+        }
+        subject = f"{announcement.subject} - {course.title} | SMIICT Institute"
+        sender = current_app.config['MAIL_USERNAME']
+
+        pool = SmtpPool(current_app._get_current_object(), self.mail, self.connections,
+                        RateLimiter(self.rate_limit))
+        try:
+            # Walk recipients in keyset pages. Each page is streamed with
+            # yield_per and the read is finished before any mail goes out, so
+            # no cursor or snapshot is held open across a rate-limited send.
+            last_user_id = announcement.last_user_id or 0
+            while True:
+                stmt = self.recipients_query(course.id, last_user_id).limit(self.batch_size)
+                batch = db.session.execute(stmt.execution_options(yield_per=self.batch_size)).all()
+                if not batch:
+                    break
+
+                contexts = [{'user_name': row.name} for row in batch]
+                rendered = self.templates.render_batch('course_announcement', contexts, **shared)
+                for row, (html, text) in zip(batch, rendered):
+                    msg = Message(subject=subject, recipients=[row.email], sender=sender)
+                    msg.html, msg.body = html, text
+                    pool.send(msg)
+                pool.join()
+
+                sent, failed, last_error = pool.take_counts()
+                last_user_id = batch[-1].id
+                announcement.sent_count += sent
+                announcement.failed_count += failed
+                announcement.last_user_id = last_user_id
+                if last_error:
+                    announcement.last_error = last_error
+                db.session.commit()
+                logger.info("Announcement %s: %s/%s sent", announcement.id, announcement.sent_count, announcement.total_recipients)
+
+            announcement.status = 'completed'
+            announcement.completed_at = datetime.utcnow()
+            db.session.commit()
+            logger.info("Announcement %s completed: %s sent, %s failed", announcement.id, announcement.sent_count, announcement.failed_count)
+
+        except Exception as e:
+            logger.error("Announcement %s stopped: %s", announcement_id, e)
+            db.session.rollback()
+            announcement = db.session.get(Announcement, announcement_id)
+            announcement.status = 'failed'
+            announcement.last_error = str(e)
+            db.session.commit()
+        finally:
+            pool.close()
+        return True
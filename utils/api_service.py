@@ -0,0 +1,164 @@
+"""
+API Helpers for SMIICT Institute Course Platform
+Field selection, cursor pagination, serialization and ETags for the /api/v1 endpoints
+"""
+
+import base64
+import hashlib
+import json
+from datetime import date, datetime
+from flask import current_app, request, Response
+from sqlalchemy.orm import load_only
+import logging
+
+from models import Course, Application
+
+try:
+    import orjson
+except ImportError:  # orjson is optional, the standard library is used without it
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Fields each resource can return: name -> (column the field needs loaded, getter)
+COURSE_FIELDS = {
+    'id': (Course.id, lambda course: course.id),
+    'title': (Course.title, lambda course: course.title),
+    'description': (Course.description, lambda course: course.description),
+    'duration': (Course.duration, lambda course: course.duration),
+    'price': (Course.price, lambda course: course.price),
+    'image_url': (Course.image_url, lambda course: course.image_url),
+    'created_at': (Course.created_at, lambda course: course.created_at),
+}
+
+APPLICATION_FIELDS = {
+    'id': (Application.id, lambda app: app.id),
+    'course': (Application.course_id, lambda app: {'id': app.course.id, 'title': app.course.title}),
+    'status': (Application.status, lambda app: app.status),
+    'payment_status': (Application.payment_status, lambda app: app.payment_status),
+    'payment_reference': (Application.payment_reference, lambda app: app.payment_reference),
+    'applied_at': (Application.applied_at, lambda app: app.applied_at),
+    'paid_at': (Application.paid_at, lambda app: app.paid_at),
+    'original_price': (Application.original_price, lambda app: app.original_price),
+    'discount_amount': (Application.discount_amount, lambda app: app.discount_amount),
+    'final_price': (Application.final_price, lambda app: app.final_price),
+}
+
+
+def select_fields(spec, available):
+    """
+    Parse a ``fields=id,title`` parameter
+
+    Args:
+        spec (str): Comma separated field names, or empty for all fields
+        available (dict): One of the *_FIELDS maps
+
+    Returns:
+        list: Field names, always including id
+
+    Raises:
+        ValueError: If a field is unknown
+    """
+    if not spec:
+        return list(available)
+    names = [name.strip() for name in spec.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(unknown)}")
+    return ['id'] + [name for name in dict.fromkeys(names) if name != 'id']
+
+
+def load_fields(available, names):
+    """Loader option that fetches only the columns the selected fields need"""
+    return load_only(*{available[name][0] for name in names})
+
+
+def serialize(obj, available, names):
+    return {name: available[name][1](obj) for name in names}
+
+
+def encode_cursor(last_id):
+    """Opaque cursor pointing after the row with this id"""
+    return base64.urlsafe_b64encode(f"id:{last_id}".encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """
+    Id a cursor points after (None without a cursor)
+
+    Raises:
+        ValueError: If the cursor wasn't made by encode_cursor
+    """
+    if not cursor:
+        return None
+    try:
+        value = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+    except (ValueError, UnicodeDecodeError):
+        raise ValueError('Invalid cursor')
+    prefix, _, last_id = value.partition(':')
+    if prefix != 'id' or not last_id.isdigit():
+        raise ValueError('Invalid cursor')
+    return int(last_id)
+
+
+def page_limit(value):
+    """Requested page size, clamped to API_MAX_PAGE_SIZE"""
+    default = current_app.config.get('API_PAGE_SIZE', 20)
+    maximum = current_app.config.get('API_MAX_PAGE_SIZE', 100)
+    return max(1, min(value or default, maximum))
+
+
+def paginate(rows, limit, available, names):
+    """
+    Body of a list response from up to limit + 1 rows
+
+    The extra row only tells whether there is a next page.
+    """
+    page = rows[:limit]
+    return {
+        'data': [serialize(row, available, names) for row in page],
+        'next_cursor': encode_cursor(page[-1].id) if len(rows) > limit else None,
+    }
+
+
+def _default(value):
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+
+def dumps(payload):
+    """Compact JSON bytes (orjson when installed)"""
+    if orjson is not None:
+        return orjson.dumps(payload, default=_default)
+    return json.dumps(payload, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+
+def json_response(payload, status=200, public=False):
+    """
+    JSON response with an ETag of its body
+
+    A request whose If-None-Match matches gets an empty 304 instead, so
+    clients that revalidate don't download unchanged data again.
+
+    Args:
+        payload (dict): Response body
+        status (int): HTTP status
+        public (bool): Whether shared caches may store the response
+    """
+    body = dumps(payload)
+    response = Response(body, status=status, mimetype='application/json')
+    if status == 200:
+        response.set_etag(hashlib.sha1(body).hexdigest())
+        if public:
+            response.cache_control.public = True
+        else:
+            response.cache_control.private = True
+            response.vary.add('Cookie')
+        response.cache_control.no_cache = True
+        response.make_conditional(request)
+    return response
+
+
+def error_response(message, status):
+    return json_response({'success': False, 'message': message}, status=status)
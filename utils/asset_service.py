@@ -0,0 +1,183 @@
+"""
+Asset Service for SMIICT Institute Course Platform
+Serves the fingerprinted fonts, stylesheets and critical CSS written by build_assets.py
+"""
+
+import hashlib
+import json
+import os
+from flask import g, request, session, url_for
+from flask_login import current_user
+from jinja2 import pass_context
+from markupsafe import Markup
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Fingerprinted files never change, so browsers may keep them for a year
+IMMUTABLE_MAX_AGE = 365 * 24 * 3600
+
+# Stylesheets every page loads, relative to the static folder
+PAGE_STYLESHEETS = ('css/main.css', 'css/responsive.css', 'css/components.css', 'css/animations.css')
+
+# Files every page needs, precached by the service worker with the built assets
+PRECACHE = PAGE_STYLESHEETS + ('js/main.js', 'uploads/SMI_logo_png.png')
+
+# Third-party origins base.html loads from; fonts are fetched with CORS
+SCRIPT_CDN = 'https://cdn.tailwindcss.com'
+FONT_CDN = 'https://fonts.gstatic.com'
+
+
+def load_manifest(static_folder):
+    """
+    Read the manifest written by build_assets.py
+
+    Args:
+        static_folder (str): The app's static folder
+
+    Returns:
+        dict: {'files': {name: static path}, 'preload': [static path],
+               'critical': {template: {'css': static path, 'preload': [url]}}},
+              or None when the assets have not been built
+    """
+    path = os.path.join(static_folder, 'build', 'manifest.json')
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def asset_version(app, precache):
+    """
+    Version of the static assets, which names the service worker's caches
+
+    It changes whenever a precached file, the service worker script or
+    ASSET_VERSION (set it to the release on deploy) changes, so a deploy
+    installs a new worker that drops the old caches.
+
+    Args:
+        app (Flask): The application
+        precache (list): Static-relative paths the service worker precaches
+
+    Returns:
+        str: Short hex digest
+    """
+    digest = hashlib.sha256(app.config['ASSET_VERSION'].encode())
+    sources = [os.path.join(app.static_folder, path) for path in precache]
+    sources.append(os.path.join(app.root_path, app.template_folder, 'sw.js'))
+    for path in sources:
+        with open(path, 'rb') as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:12]
+
+
+def add_preload(url, as_):
+    """
+    Hint the browser to fetch a resource the current page needs early
+
+    Args:
+        url (str): Resource URL
+        as_ (str): Resource type (image, script, style, font)
+    """
+    if url:
+        g.setdefault('preloads', []).append((url, as_))
+
+
+def link_header(url, rel, as_=None, crossorigin=False):
+    value = f'<{url}>; rel={rel}'
+    if as_:
+        value += f'; as={as_}'
+    if as_ == 'font':
+        value += '; type="font/woff2"'
+    if crossorigin or as_ == 'font':
+        value += '; crossorigin'
+    return value
+
+
+def init_assets(app):
+    """
+    Expose built assets to templates, cache them for good and send preload hints
+
+    Templates get asset_url(name), which is None until the assets are built
+    (base.html then falls back to the CDNs), font_preloads() and
+    critical_css(), the inlined CSS of the page being rendered.
+
+    Pages for signed-in users are marked Cache-Control: private, and
+    app.extensions['service_worker'] holds the asset version and precache
+    list the service worker script is rendered with.
+
+    HTML responses carry Link preload/preconnect headers for the fonts,
+    stylesheets, main.js and the page's above-the-fold images. WSGI cannot
+    send a 103 Early Hints response itself; a proxy or CDN that supports
+    them (Cloudflare, h2o, nginx with early_hints) turns these headers into
+    one while the page is still rendering.
+
+    Args:
+        app (Flask): The application
+    """
+    manifest = load_manifest(app.static_folder) or {}
+    files = manifest.get('files', {})
+    fingerprinted = set(files.values())
+    critical = {}
+    for template_name, entry in manifest.get('critical', {}).items():
+        with open(os.path.join(app.static_folder, entry['css']), encoding='utf-8') as f:
+            critical[template_name] = (Markup(f.read()), entry['preload'])
+    if fingerprinted:
+        logger.info("Serving %s built assets, critical CSS for %s templates", len(fingerprinted), len(critical))
+    else:
+        logger.info("No built assets found, fonts and icons load from their CDNs")
+
+    def asset_url(name):
+        path = files.get(name)
+        return url_for('static', filename=path) if path else None
+
+    def font_preloads():
+        return [url_for('static', filename=path) for path in manifest.get('preload', [])]
+
+    @pass_context
+    def critical_css(context):
+        g.page_template = context.name
+        entry = critical.get(context.name)
+        return entry[0] if entry else None
+
+    app.jinja_env.globals.update(asset_url=asset_url, font_preloads=font_preloads, critical_css=critical_css,
+                                 page_stylesheets=PAGE_STYLESHEETS)
+    app.extensions['asset_manifest'] = manifest
+    precache = list(PRECACHE) + sorted(path for name, path in files.items() if not name.startswith('critical-'))
+    app.extensions['service_worker'] = {'version': asset_version(app, precache), 'precache': precache}
+
+    @app.after_request
+    def _cache_fingerprinted(response):
+        if request.endpoint == 'static' and (request.view_args or {}).get('filename') in fingerprinted:
+            response.cache_control.no_cache = None
+            response.cache_control.public = True
+            response.cache_control.max_age = IMMUTABLE_MAX_AGE
+            response.cache_control.immutable = True
+        return response
+
+    @app.after_request
+    def _private_pages(response):
+        # Pages showing a signed-in user or a flashed message must not be
+        # kept by shared caches or the service worker
+        if response.mimetype == 'text/html' and (current_user.is_authenticated or session.modified):
+            response.cache_control.public = None
+            response.cache_control.private = True
+        return response
+
+    @app.after_request
+    def _preload_links(response):
+        # Only full pages (rendered through base.html), not HTML fragments
+        if not app.config['PRELOAD_LINK_HEADERS'] or 'page_template' not in g or response.status_code != 200:
+            return response
+        links = [link_header(SCRIPT_CDN, 'preconnect')]
+        if 'fonts.css' not in files:
+            links.append(link_header(FONT_CDN, 'preconnect', crossorigin=True))
+        links += [link_header(url, 'preload', 'font') for url in font_preloads()]
+        links += [link_header(url_for('static', filename=path), 'preload', 'style') for path in PAGE_STYLESHEETS]
+        links.append(link_header(url_for('static', filename='js/main.js'), 'preload', 'script'))
+        page = critical.get(g.get('page_template'))
+        images = [(url, 'image') for url in (page[1] if page else [])]
+        links += [link_header(url, 'preload', as_) for url, as_ in images + g.get('preloads', [])]
+        response.headers.add('Link', ', '.join(links))
+        return response
@@ -0,0 +1,163 @@
+"""
+Backfill Runner for SMIICT Institute Course Platform
+Runs data migrations as small keyset-ordered UPDATE chunks that can be resumed
+"""
+
+import time
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+import logging
+
+from models import db, BackfillProgress
+
+logger = logging.getLogger(__name__)
+
+# Attempts per chunk before giving up (e.g. on lock timeouts)
+CHUNK_ATTEMPTS = 3
+
+
+class Backfill:
+    """
+    An ``UPDATE table SET ... WHERE ...`` applied in chunks of primary key order
+
+    Each chunk covers the next batch_size keys after the last one processed
+    and is committed together with the resume point, so an interrupted
+    backfill picks up at the first unfinished chunk when run again. Between
+    chunks it sleeps, and on Postgres it waits while replicas lag behind.
+
+    Example:
+        Backfill('application-payment-status', 'application',
+                 "payment_status = 'pending'", 'payment_status IS NULL').run()
+    """
+
+    def __init__(self, name, table, assignments, condition='TRUE', params=None, key='id',
+                 batch_size=None, sleep=None, max_lag=None):
+        """
+        Args:
+            name (str): Unique name the resume point is stored under
+            table (str): Table to update (quoted if needed, e.g. '"user"')
+            assignments (str): SQL for the SET clause
+            condition (str): SQL a row must also match to be updated
+            params (dict): Bound parameters used in assignments/condition
+            key (str): Integer primary key column to walk
+            batch_size (int): Keys per chunk (defaults to BACKFILL_BATCH_SIZE)
+            sleep (float): Seconds between chunks (defaults to BACKFILL_SLEEP)
+            max_lag (float): Replication lag in seconds to wait out
+                (defaults to BACKFILL_MAX_REPLICATION_LAG, 0 disables)
+        """
+        self.name = name
+        self.table = table
+        self.assignments = assignments
+        self.condition = condition
+        self.params = params or {}
+        self.key = key
+        self.batch_size = batch_size or current_app.config.get('BACKFILL_BATCH_SIZE', 1000)
+        self.sleep = current_app.config.get('BACKFILL_SLEEP', 0.1) if sleep is None else sleep
+        self.max_lag = current_app.config.get('BACKFILL_MAX_REPLICATION_LAG', 10) if max_lag is None else max_lag
+        self.postgres = db.engine.dialect.name == 'postgresql'
+
+    def _progress(self):
+        BackfillProgress.__table__.create(db.engine, checkfirst=True)
+        progress = db.session.get(BackfillProgress, self.name)
+        if progress is None:
+            progress = BackfillProgress(name=self.name, last_id=0, rows_updated=0)
+            db.session.add(progress)
+            db.session.commit()
+        return progress
+
+    def replication_lag(self):
+        """Largest replay lag of any replica in seconds (0 without replicas or off Postgres)"""
+        if not self.postgres:
+            return 0
+        return db.session.execute(text(
+            "SELECT COALESCE(MAX(EXTRACT(EPOCH FROM replay_lag)), 0) FROM pg_stat_replication"
+        )).scalar() or 0
+
+    def _wait_for_replicas(self):
+        if not self.max_lag:
+            return
+        while True:
+            lag = self.replication_lag()
+            db.session.commit()
+            if lag <= self.max_lag:
+                return
+            logger.info("%s: replicas are %.1fs behind, waiting", self.name, lag)
+            time.sleep(min(lag, 30))
+
+    def _run_chunk(self, progress):
+        """Update the next chunk and move the resume point past it, in one transaction"""
+        upper = db.session.execute(text(
+            f"SELECT MAX({self.key}) FROM (SELECT {self.key} FROM {self.table} "
+            f"WHERE {self.key} > :last ORDER BY {self.key} LIMIT :batch) AS chunk"
+        ), {'last': progress.last_id, 'batch': self.batch_size}).scalar()
+        if upper is None:
+            return None
+
+        if self.postgres:
+            # Give up quickly rather than queue behind (and block) live traffic
+            db.session.execute(text("SET LOCAL lock_timeout = '2s'"))
+        result = db.session.execute(text(
+            f"UPDATE {self.table} SET {self.assignments} "
+            f"WHERE {self.key} > :last AND {self.key} <= :upper AND ({self.condition})"
+        ), {**self.params, 'last': progress.last_id, 'upper': upper})
+        progress.last_id = upper
+        progress.rows_updated += max(result.rowcount, 0)
+        db.session.commit()
+        return upper
+
+    def run(self, report=print):
+        """
+        Run (or resume) the backfill to the end of the table
+
+        Args:
+            report (callable): Receives a progress line after each chunk
+
+        Returns:
+            int: Rows updated over the whole backfill, including earlier runs
+        """
+        progress = self._progress()
+        if progress.completed_at:
+            report(f"{self.name}: already completed ({progress.rows_updated} rows)")
+            return progress.rows_updated
+
+        first_id, last_id = db.session.execute(text(
+            f"SELECT MIN({self.key}), MAX({self.key}) FROM {self.table}"
+        )).one()
+        db.session.commit()
+        if progress.last_id:
+            report(f"{self.name}: resuming after {self.key} {progress.last_id}")
+
+        started = time.monotonic()
+        start_rows = progress.rows_updated
+        while True:
+            for attempt in range(1, CHUNK_ATTEMPTS + 1):
+                try:
+                    upper = self._run_chunk(progress)
+                    break
+                except OperationalError as e:
+                    db.session.rollback()
+                    progress = db.session.get(BackfillProgress, self.name)
+                    if attempt == CHUNK_ATTEMPTS:
+                        raise
+                    logger.warning("%s: chunk failed (%s), retrying", self.name, str(e).splitlines()[0])
+                    time.sleep(attempt)
+            if upper is None:
+                break
+
+            elapsed = time.monotonic() - started
+            rate = (progress.rows_updated - start_rows) / elapsed if elapsed else 0
+            span = (last_id - first_id) or 1
+            done = min(100, (upper - first_id) * 100 / span) if last_id is not None else 100
+            report(f"{self.name}: {done:.0f}% ({self.key} {upper}/{last_id}), "
+                   f"{progress.rows_updated} rows updated, {rate:.0f} rows/s")
+
+            if self.sleep:
+                time.sleep(self.sleep)
+            self._wait_for_replicas()
+
+        progress.completed_at = datetime.utcnow()
+        db.session.commit()
+        report(f"{self.name}: completed, {progress.rows_updated} rows updated")
+        return progress.rows_updated
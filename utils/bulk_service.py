@@ -0,0 +1,145 @@
+"""
+Bulk Admin Operations for SMIICT Institute Course Platform
+Applies one action to many rows with set-based statements in chunked transactions
+"""
+
+from flask import current_app
+from sqlalchemy import Integer, any_, bindparam, delete, false, func, not_, update
+from sqlalchemy.dialects.postgresql import ARRAY
+import logging
+
+from models import db
+from utils.counter_service import adjust_counters
+
+logger = logging.getLogger(__name__)
+
+
+def parse_ids(values):
+    """
+    Turn submitted ids into a sorted list of unique positive integers
+
+    Only a list is accepted, of ints (JSON) or digit strings (form posts):
+    a bare string would otherwise be read digit by digit, and floats or
+    booleans silently truncated, selecting rows nobody asked for.
+
+    Args:
+        values (list): Ids as ints or digit strings (None for no ids)
+
+    Returns:
+        list: Clean ids
+
+    Raises:
+        ValueError: If values is not a list or any id is not a positive integer
+    """
+    if values is None:
+        return []
+    if not isinstance(values, list):
+        raise ValueError(f"ids must be a list, not {type(values).__name__}")
+
+    ids = set()
+    for value in values:
+        if isinstance(value, str) and value.isascii() and value.isdigit():
+            value = int(value)
+        if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+            raise ValueError(f"Invalid id: {value!r}")
+        ids.add(value)
+    return sorted(ids)
+
+
+def id_filter(column, ids):
+    """
+    ``column = ANY(:ids)`` on Postgres (one bound array, one cached plan
+    whatever the selection size), ``column IN (...)`` elsewhere
+    """
+    if db.engine.dialect.name == 'postgresql':
+        return column == any_(bindparam('ids', ids, type_=ARRAY(Integer)))
+    return column.in_(ids)
+
+
+def chunked(ids, size):
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def run_in_chunks(ids, statements):
+    """
+    Run set-based statements over ids, committing once per chunk
+
+    Args:
+        ids (list): Row ids to act on
+        statements (callable): Takes a chunk of ids and returns the
+            statements to execute for it, in order, as (statement, deltas)
+            pairs. Statements on the selected rows carry a dict of admin
+            counter deltas per changed row (often empty) and their rowcounts
+            are reported as affected; supporting statements (such as
+            removing dependent rows) carry None.
+
+    Returns:
+        int: Number of rows affected
+    """
+    chunk_size = current_app.config.get('BULK_ACTION_CHUNK_SIZE', 1000)
+    affected = 0
+    for chunk in chunked(ids, chunk_size):
+        try:
+            changed = 0
+            for stmt, deltas in statements(chunk):
+                result = db.session.execute(stmt.execution_options(synchronize_session=False))
+                if deltas is not None:
+                    rows = max(result.rowcount, 0)
+                    changed += rows
+                    # Same transaction as the change, like the single-row routes
+                    adjust_counters(**{name: delta * rows for name, delta in deltas.items()})
+            db.session.commit()
+            affected += changed
+        except Exception:
+            db.session.rollback()
+            raise
+    return affected
+
+
+def split_counted(conditions, counted):
+    """
+    The (conditions, deltas) pairs a bulk statement is split into
+
+    With counted = (condition, deltas), rows matching condition are changed
+    by one statement that moves the admin counters by deltas per row, and
+    the rest by a second one that leaves them alone.
+    """
+    if counted is None:
+        return [(conditions, {})]
+    condition, deltas = counted
+    return [((*conditions, condition), deltas),
+            ((*conditions, not_(func.coalesce(condition, false()))), {})]
+
+
+def bulk_update(model, ids, *conditions, counted=None, **values):
+    """
+    UPDATE model SET values WHERE id = ANY(:ids), in chunks
+
+    Rows must also match any extra conditions, e.g. ``User.role == 'inactive'``.
+    counted = (condition, deltas) keeps the admin counters in step, e.g.
+    ``(ContactMessage.is_read.is_(False), {'unread_messages': -1})``.
+    """
+    return run_in_chunks(ids, lambda chunk: [
+        (update(model).where(id_filter(model.id, chunk), *where).values(**values), deltas)
+        for where, deltas in split_counted(conditions, counted)
+    ])
+
+
+def bulk_delete(model, ids, dependents=(), counted=None):
+    """
+    DELETE FROM model WHERE id = ANY(:ids), in chunks
+
+    Args:
+        model: Model class to delete from
+        ids (list): Ids to delete
+        dependents (iterable): (model, foreign key column) pairs whose rows
+            referencing the deleted ids are removed first
+        counted (tuple): (condition, deltas) as for bulk_update
+    """
+    return run_in_chunks(ids, lambda chunk: [
+        (delete(dependent).where(id_filter(column, chunk)), None) for dependent, column in dependents
+    ] + [
+        (delete(model).where(id_filter(model.id, chunk), *where), deltas)
+        for where, deltas in split_counted((), counted)
+    ])
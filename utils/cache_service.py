@@ -0,0 +1,157 @@
+"""
+Cache Service for SMIICT Institute Course Platform
+Small in-process caches whose entries are dropped when the data behind them is committed
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy import event
+from sqlalchemy.orm import Session, object_session
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Caches by name, so invalidations can refer to them
+caches = {}
+
+# Called with the (cache name, key) pairs dropped by each commit, e.g. by the
+# invalidation bus to drop them in the other worker processes as well
+publishers = []
+
+# Caches to clear on bulk statements, by model (see invalidate_on_change)
+_bulk_watched = {}
+
+
+class LocalCache:
+    """
+    Thread-safe key/value cache for one worker process
+
+    Entries expire after ttl seconds, and the least recently used entry is
+    evicted once maxsize is reached.
+
+    version goes up with every delete or clear. Read it before loading a
+    value and pass it to set(): if an entry was invalidated in between, the
+    value may already be stale and is not stored.
+    """
+
+    def __init__(self, name, ttl=300, maxsize=1000):
+        self.name = name
+        self.ttl = ttl
+        self.maxsize = maxsize
+        self.version = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        caches[name] = self
+
+    def get(self, key, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            value, expires = entry
+            if expires < time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, version=None):
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            self._entries[key] = (value, time.monotonic() + self.ttl)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self.version += 1
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def invalidate_after_commit(session, cache, key):
+    """
+    Drop a cache entry once the current transaction commits
+
+    Dropping it earlier would let a concurrent request cache the old rows
+    again before the change is visible; after a rollback nothing changed,
+    so the entry stays.
+
+    Args:
+        session: The session making the change (db.session)
+        cache (LocalCache): Cache holding the entry
+        key: Entry to drop (a str or int, so other processes can be told),
+            or None to clear the whole cache
+    """
+    session.info.setdefault('cache_invalidations', set()).add((cache.name, key))
+
+
+def evict(name, key):
+    """Drop an entry (or the whole cache when key is None) of a cache by name"""
+    cache = caches.get(name)
+    if cache is None:
+        return
+    if key is None:
+        cache.clear()
+    else:
+        cache.delete(key)
+
+
+def invalidate_on_change(model, cache, key=None):
+    """
+    Invalidate cache entries whenever rows of a model are committed
+
+    Covers inserts, updates and deletes made through the ORM; bulk UPDATE
+    and DELETE statements on the model clear the whole cache.
+
+    Example:
+        invalidate_on_change(Course, dashboard_cache)  # Any course edit clears it
+        invalidate_on_change(Application, dashboard_cache, key=lambda a: a.user_id)
+
+    Args:
+        model: Mapped class to watch
+        cache (LocalCache): Cache built from its rows
+        key (callable): Entry a changed instance affects; None clears the cache
+    """
+    def changed(mapper, connection, target):
+        session = object_session(target)
+        if session is not None:
+            invalidate_after_commit(session, cache, key(target) if key else None)
+
+    for name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(model, name, changed)
+    _bulk_watched.setdefault(model, []).append(cache)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _invalidate_on_bulk(state):
+    # Bulk UPDATE/DELETE statements (e.g. admin bulk actions) skip the mapper events
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        for cache in _bulk_watched.get(state.bind_mapper.class_, ()):
+            invalidate_after_commit(state.session, cache, None)
+
+
+@event.listens_for(Session, 'after_commit')
+def _invalidate(session):
+    invalidations = session.info.pop('cache_invalidations', None)
+    if not invalidations:
+        return
+    for name, key in invalidations:
+        evict(name, key)
+    for publish in publishers:
+        publish(invalidations)
+
+
+@event.listens_for(Session, 'after_rollback')
+def _discard(session):
+    session.info.pop('cache_invalidations', None)
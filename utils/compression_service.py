@@ -0,0 +1,187 @@
+"""
+Compression Service for SMIICT Institute Course Platform
+Brotli/gzip response compression and whitespace minification of rendered HTML
+"""
+
+import re
+import zlib
+from flask import request
+import logging
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional, responses fall back to gzip without it
+    brotli = None
+
+logger = logging.getLogger(__name__)
+
+# Elements whose contents must be sent exactly as rendered
+PRESERVED_TAGS = re.compile(r'(<(pre|textarea|script|style)\b.*?</\2\s*>)', re.IGNORECASE | re.DOTALL)
+# The same, plus any element styled with Tailwind's whitespace-pre* classes
+# (message and course text). Slower, so only used on pages that have them.
+PRESERVED_TAGS_AND_CLASSES = re.compile(
+    r'(<(pre|textarea|script|style|[a-z0-9]+(?=[^>]*\bwhitespace-pre))\b.*?</\2\s*>)',
+    re.IGNORECASE | re.DOTALL
+)
+LINE_BREAKS = re.compile(r'[ \t]*\n\s*')
+SPACES = re.compile(r'[ \t]{2,}')
+HTML_COMMENT = re.compile(r'<!--(?!\[if).*?-->', re.DOTALL)
+
+
+def minify_html(html):
+    """
+    Collapse the whitespace Jinja leaves between tags
+
+    Runs of whitespace become a single newline (if they held one) or space,
+    so inline text keeps its spacing. pre, textarea, script, style and
+    whitespace-pre elements are left untouched.
+
+    Args:
+        html (str): Rendered page
+
+    Returns:
+        str: The page with redundant whitespace and comments removed
+    """
+    preserved = PRESERVED_TAGS_AND_CLASSES if 'whitespace-pre' in html else PRESERVED_TAGS
+    parts = preserved.split(html)
+    out = []
+    # split() yields text, block, tag name, text, block, tag name, ...
+    for index in range(0, len(parts), 3):
+        text = HTML_COMMENT.sub('', parts[index])
+        text = SPACES.sub(' ', LINE_BREAKS.sub('\n', text))
+        out.append(text)
+        if index + 1 < len(parts):
+            out.append(parts[index + 1])
+    return ''.join(out)
+
+
+class GzipEncoder:
+    encoding = 'gzip'
+
+    def __init__(self, level):
+        self._compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+
+    def compress(self, data):
+        return self._compressor.compress(data) + self._compressor.flush()
+
+    def chunk(self, data):
+        return self._compressor.compress(data) + self._compressor.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self):
+        return self._compressor.flush()
+
+
+class BrotliEncoder:
+    encoding = 'br'
+
+    def __init__(self, quality):
+        self._compressor = brotli.Compressor(quality=quality)
+
+    def compress(self, data):
+        return self._compressor.process(data) + self._compressor.finish()
+
+    def chunk(self, data):
+        return self._compressor.process(data) + self._compressor.flush()
+
+    def finish(self):
+        return self._compressor.finish()
+
+
+def negotiate_encoding(accept_encodings):
+    """
+    Pick the encoding to use for a request
+
+    Args:
+        accept_encodings: The request's parsed Accept-Encoding header
+
+    Returns:
+        str: 'br', 'gzip' or None when the client accepts neither
+    """
+    offered = ['br', 'gzip'] if brotli is not None else ['gzip']
+    return accept_encodings.best_match(offered)
+
+
+def new_encoder(encoding, config):
+    if encoding == 'br':
+        return BrotliEncoder(config['BROTLI_QUALITY'])
+    return GzipEncoder(config['GZIP_LEVEL'])
+
+
+def _stream(encoder, chunks):
+    # Each chunk is flushed so streamed pages still arrive piece by piece
+    try:
+        for chunk in chunks:
+            if isinstance(chunk, str):
+                chunk = chunk.encode('utf-8')
+            if chunk:
+                yield encoder.chunk(chunk)
+        yield encoder.finish()
+    finally:
+        if hasattr(chunks, 'close'):
+            chunks.close()
+
+
+def compress_response(response, config):
+    """
+    Compress a response if the client accepts it and it is worth it
+
+    Args:
+        response (Response): Response about to be sent
+        config: Application config
+
+    Returns:
+        Response: The same response, compressed in place when applicable
+    """
+    if (response.status_code < 200 or response.status_code in (204, 206, 304)
+            or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in config['COMPRESS_MIMETYPES']
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    response.vary.add('Accept-Encoding')
+    encoding = negotiate_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    encoder = new_encoder(encoding, config)
+    if response.is_streamed:
+        response.response = _stream(encoder, response.response)
+        response.headers.pop('Content-Length', None)
+    else:
+        data = response.get_data()
+        if len(data) < config['COMPRESS_MIN_SIZE']:
+            return response
+        response.set_data(encoder.compress(data))
+
+    response.headers['Content-Encoding'] = encoding
+    # The bytes differ per encoding, so a strong ETag no longer holds
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
+
+
+def init_compression(app):
+    """
+    Trim template whitespace, optionally minify pages, and compress responses
+
+    Call this before registering other after_request hooks: Flask runs them
+    in reverse order, and compression has to see the final body.
+
+    Args:
+        app (Flask): The application
+    """
+    if app.config['JINJA_TRIM_BLOCKS']:
+        app.jinja_env.trim_blocks = True
+        app.jinja_env.lstrip_blocks = True
+
+    @app.after_request
+    def _compress(response):
+        if (app.config['HTML_MINIFY'] and response.mimetype == 'text/html'
+                and not response.is_streamed and not response.direct_passthrough):
+            response.set_data(minify_html(response.get_data(as_text=True)))
+        if app.config['COMPRESS_RESPONSES']:
+            compress_response(response, app.config)
+        return response
+
@@ -0,0 +1,125 @@
+"""
+Admin Counter Service for SMIICT Institute Course Platform
+Keeps the admin badge and dashboard totals up to date without scanning tables
+"""
+
+from datetime import datetime
+from sqlalchemy import select, update, func
+from sqlalchemy.dialects import postgresql, sqlite
+import logging
+
+from models import db, AdminCounter, ContactMessage, User, Application
+
+logger = logging.getLogger(__name__)
+
+COUNTER_ID = 1
+
+COUNTERS = ('unread_messages', 'pending_admins', 'pending_payments', 'total_revenue')
+
+
+def exact_counts():
+    """Compute every counter from the underlying tables"""
+    return {
+        'unread_messages': db.session.execute(
+            select(func.count()).select_from(ContactMessage).where(ContactMessage.is_read.is_(False))
+        ).scalar(),
+        'pending_admins': db.session.execute(
+            select(func.count()).select_from(User).where(
+                User.role == 'admin', User.admin_approved.is_(False), User.deleted_at.is_(None)
+            )
+        ).scalar(),
+        'pending_payments': db.session.execute(
+            select(func.count()).select_from(Application).where(Application.payment_status == 'pending')
+        ).scalar(),
+        'total_revenue': db.session.execute(
+            select(func.coalesce(func.sum(Application.final_price), 0)).where(Application.payment_status == 'completed')
+        ).scalar(),
+    }
+
+
+def adjust_counters(**deltas):
+    """
+    Add deltas to the admin counters as part of the current transaction
+
+    The increment is done in SQL (``SET x = x + :delta``), so concurrent
+    requests never overwrite each other. Committing is left to the caller,
+    which keeps the counters consistent with the change they describe.
+
+    Args:
+        **deltas: Amount to add per counter, e.g. unread_messages=1
+    """
+    values = {name: getattr(AdminCounter, name) + delta for name, delta in deltas.items() if delta}
+    if not values:
+        return
+    stmt = update(AdminCounter).where(AdminCounter.id == COUNTER_ID).values(values)
+    if db.session.execute(stmt).rowcount == 0 and not _seed():
+        # Another request seeded the row first, from tables without this change
+        db.session.execute(stmt)
+
+
+def _seed(values=None):
+    """
+    Insert the counters row (from the tables unless values are given)
+
+    Two first requests can both find the row missing; the insert is
+    ``ON CONFLICT DO NOTHING`` so the later one doesn't fail, it just
+    doesn't create the row.
+
+    Returns:
+        bool: Whether this call created the row
+    """
+    db.session.flush()
+    values = {'id': COUNTER_ID, 'reconciled_at': datetime.utcnow(), **(values or exact_counts())}
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        insert = postgresql.insert if dialect == 'postgresql' else sqlite.insert
+        return db.session.execute(insert(AdminCounter).values(**values).on_conflict_do_nothing()).rowcount == 1
+    db.session.add(AdminCounter(**values))
+    db.session.flush()
+    return True
+
+
+def get_admin_counters():
+    """Return the counters row (a single primary key read), creating it if needed"""
+    counter = db.session.get(AdminCounter, COUNTER_ID)
+    if counter is None:
+        counter = reconcile_counters()
+    return counter
+
+
+def reconcile_counters():
+    """
+    Correct any drift between the counters and the tables
+
+    Run periodically (the counters.reconcile job). The exact values are
+    computed before the counters row is locked, so increments elsewhere
+    only ever wait for the short update, never for the table scans. An
+    increment committed while the scans run may be overwritten; the next
+    reconcile puts it back.
+
+    Returns:
+        AdminCounter: The corrected counters
+    """
+    try:
+        exact = exact_counts()
+        counter = db.session.execute(
+            select(AdminCounter).where(AdminCounter.id == COUNTER_ID).with_for_update()
+        ).scalar()
+        if counter is None:
+            # If another request seeds it first, its values are just as fresh
+            _seed(exact)
+            db.session.commit()
+            return db.session.get(AdminCounter, COUNTER_ID)
+
+        drift = {name: exact[name] - getattr(counter, name) for name in COUNTERS
+                 if exact[name] != getattr(counter, name)}
+        if drift:
+            logger.info("Admin counters corrected by %s", drift)
+        for name in COUNTERS:
+            setattr(counter, name, exact[name])
+        counter.reconciled_at = datetime.utcnow()
+        db.session.commit()
+        return counter
+    except Exception:
+        db.session.rollback()
+        raise
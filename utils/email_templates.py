@@ -0,0 +1,251 @@
+"""
+Email Template Renderer for SMIICT Institute Course Platform
+Loads and compiles the email templates once, with CSS inlined at compile time
+"""
+
+from collections import namedtuple
+import os
+import re
+from jinja2 import Environment, FileSystemLoader, FileSystemBytecodeCache, select_autoescape
+import logging
+
+logger = logging.getLogger(__name__)
+
+RenderedEmail = namedtuple('RenderedEmail', ['html', 'text'])
+
+VOID_TAGS = {'area', 'base', 'br', 'col', 'embed', 'hr', 'img', 'input',
+             'link', 'meta', 'source', 'track', 'wbr'}
+
+STYLE_BLOCK_RE = re.compile(r'<style[^>]*>(.*?)</style>', re.S | re.I)
+TAG_RE = re.compile(r'<(/?)([a-zA-Z][a-zA-Z0-9]*)((?:[^<>"\']|"[^"]*"|\'[^\']*\')*?)(/?)>')
+ATTR_RE = re.compile(r'([a-zA-Z_:][-a-zA-Z0-9_:.]*)\s*=\s*("[^"]*"|\'[^\']*\')')
+COMPOUND_RE = re.compile(r'^([a-zA-Z][a-zA-Z0-9]*)?((?:[.#][-_a-zA-Z0-9]+)*)$')
+
+
+def _split_css(css):
+    """
+    Split a stylesheet into inlinable rules and leftover CSS
+
+    Only rules made of tag/class/id compounds joined by descendant
+    combinators can be inlined. Pseudo-classes, @media blocks and
+    anything more complex stay in the <style> block.
+
+    Returns:
+        tuple: (list of (specificity, order, selector parts, declarations), leftover css)
+    """
+    css = re.sub(r'/\*.*?\*/', '', css, flags=re.S)
+    rules = []
+    leftover = []
+    pos = 0
+    order = 0
+
+    while pos < len(css):
+        brace = css.find('{', pos)
+        if brace == -1:
+            break
+        prelude = css[pos:brace].strip()
+
+        # Find the matching closing brace (at-rules may nest blocks)
+        depth, end = 1, brace + 1
+        while end < len(css) and depth:
+            if css[end] == '{':
+                depth += 1
+            elif css[end] == '}':
+                depth -= 1
+            end += 1
+        body = css[brace + 1:end - 1].strip()
+        pos = end
+
+        if prelude.startswith('@'):
+            leftover.append(f'{prelude} {{ {body} }}')
+            continue
+
+        kept = []
+        for selector in (s.strip() for s in prelude.split(',')):
+            parts = selector.split()
+            compounds = [COMPOUND_RE.match(part) for part in parts]
+            if not parts or not all(compounds):
+                kept.append(selector)
+                continue
+            parsed = []
+            ids = classes = tags = 0
+            for match in compounds:
+                tag = match.group(1)
+                suffix = match.group(2)
+                id_names = re.findall(r'#([-_a-zA-Z0-9]+)', suffix)
+                class_names = re.findall(r'\.([-_a-zA-Z0-9]+)', suffix)
+                ids += len(id_names)
+                classes += len(class_names)
+                tags += 1 if tag else 0
+                parsed.append((tag.lower() if tag else None, set(id_names), set(class_names)))
+            rules.append(((ids, classes, tags), order, parsed, body))
+            order += 1
+        if kept:
+            leftover.append(f'{", ".join(kept)} {{ {body} }}')
+
+    return rules, '\n'.join(leftover)
+
+
+def _matches(compound, element):
+    tag, ids, classes = compound
+    return ((tag is None or tag == element[0])
+            and ids <= element[1]
+            and classes <= element[2])
+
+
+def _selector_matches(parts, element, ancestors):
+    if not _matches(parts[-1], element):
+        return False
+    index = len(ancestors) - 1
+    for compound in reversed(parts[:-1]):
+        while index >= 0 and not _matches(compound, ancestors[index]):
+            index -= 1
+        if index < 0:
+            return False
+        index -= 1
+    return True
+
+
+def inline_css(html):
+    """
+    Move the rules of an HTML document's <style> blocks onto its elements
+
+    Works on template source, so attributes containing Jinja expressions
+    are left untouched. Existing inline styles win over stylesheet rules.
+
+    Args:
+        html (str): HTML (or HTML template) source
+
+    Returns:
+        str: HTML with inlinable rules moved into style attributes
+    """
+    css = '\n'.join(STYLE_BLOCK_RE.findall(html))
+    if not css.strip():
+        return html
+
+    rules, leftover = _split_css(css)
+    rules.sort(key=lambda rule: (rule[0], rule[1]))
+
+    # Keep only the non-inlinable CSS, in place of the first <style> block
+    replacements = [f'<style>\n{leftover}\n</style>' if leftover else '']
+    html = STYLE_BLOCK_RE.sub(lambda m: replacements.pop() if replacements else '', html)
+
+    ancestors = []
+    output = []
+    last = 0
+    in_head = False
+
+    for match in TAG_RE.finditer(html):
+        closing, tag, attrs, self_closing = match.groups()
+        tag = tag.lower()
+
+        if closing:
+            for index in range(len(ancestors) - 1, -1, -1):
+                if ancestors[index][0] == tag:
+                    del ancestors[index:]
+                    break
+            if tag == 'head':
+                in_head = False
+            continue
+
+        if tag == 'head':
+            in_head = True
+        attributes = {name.lower(): value[1:-1] for name, value in ATTR_RE.findall(attrs)}
+        element = (
+            tag,
+            set() if '{' in attributes.get('id', '') else {attributes.get('id', '')} - {''},
+            set() if '{' in attributes.get('class', '') else set(attributes.get('class', '').split()),
+        )
+
+        if not in_head:
+            declarations = [body for _, _, parts, body in rules
+                            if _selector_matches(parts, element, ancestors)]
+            if declarations:
+                existing = attributes.get('style', '').strip()
+                style = '; '.join(d.strip().rstrip(';') for d in declarations)
+                if existing:
+                    style = f"{style}; {existing.rstrip(';')}"
+                style = re.sub(r'\s*\n\s*', ' ', style)
+                if 'style' in attributes:
+                    new_attrs = re.sub(r'''\sstyle\s*=\s*("[^"]*"|'[^']*')''', f' style="{style}"', attrs, count=1)
+                else:
+                    new_attrs = f'{attrs} style="{style}"'
+                output.append(html[last:match.start()])
+                output.append(f'<{tag}{new_attrs}{self_closing}>')
+                last = match.end()
+
+        if tag not in VOID_TAGS and not self_closing:
+            ancestors.append(element)
+
+    output.append(html[last:])
+    return ''.join(output)
+
+
+class InliningLoader(FileSystemLoader):
+    """File system loader that inlines CSS into HTML templates as they are loaded"""
+
+    def get_source(self, environment, template):
+        source, filename, uptodate = super().get_source(environment, template)
+        if template.endswith('.html'):
+            source = inline_css(source)
+        return source, filename, uptodate
+
+
+class EmailTemplateRenderer:
+    def __init__(self, template_folder, cache_dir=None):
+        bytecode_cache = FileSystemBytecodeCache(cache_dir) if cache_dir else FileSystemBytecodeCache()
+        if cache_dir:
+            os.makedirs(cache_dir, exist_ok=True)
+
+        self.env = Environment(
+            loader=InliningLoader(template_folder),
+            autoescape=select_autoescape(['html']),
+            bytecode_cache=bytecode_cache,
+            auto_reload=False
+        )
+
+        # Compile every template up front so sends never pay for it
+        for name in self.env.list_templates(extensions=['html', 'txt']):
+            self.env.get_template(name)
+        logger.info("Loaded %s email templates from %s", len(self.env.list_templates()), template_folder)
+
+    def render(self, template_name, **context):
+        """
+        Render the HTML and text versions of an email
+
+        Args:
+            template_name (str): Template name without extension, e.g. 'password_reset'
+            **context: Template variables
+
+        Returns:
+            RenderedEmail: (html, text)
+        """
+        return RenderedEmail(
+            html=self.env.get_template(f'{template_name}.html').render(context),
+            text=self.env.get_template(f'{template_name}.txt').render(context)
+        )
+
+    def render_batch(self, template_name, contexts, **shared):
+        """
+        Render one email for many recipients
+
+        Templates are looked up once and the shared variables are merged
+        into each recipient's context, which keeps per-recipient work to
+        the render itself.
+
+        Args:
+            template_name (str): Template name without extension
+            contexts (iterable): Per-recipient template variables
+            **shared: Variables common to every recipient
+
+        Yields:
+            RenderedEmail: One (html, text) pair per context, in order
+        """
+        html_template = self.env.get_template(f'{template_name}.html')
+        text_template = self.env.get_template(f'{template_name}.txt')
+        for context in contexts:
+            variables = {**shared, **context}
+            yield RenderedEmail(
+                html=html_template.render(variables),
+                text=text_template.render(variables)
+            )
@@ -0,0 +1,295 @@
+"""
+Export Service for SMIICT Institute Course Platform
+Streams admin reports as gzipped CSV or XLSX without loading them into memory
+"""
+
+import csv
+import gzip
+import io
+import re
+import zipfile
+from datetime import datetime, timedelta
+from xml.sax.saxutils import escape
+from sqlalchemy import select
+import logging
+
+from models import db, User, Course, Application, Coupon, CouponUsage
+
+logger = logging.getLogger(__name__)
+
+# Rows fetched per round trip from the server-side cursor
+EXPORT_FETCH_SIZE = 1000
+
+# Characters that make spreadsheet apps treat a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+# XML 1.0 forbids most control characters
+INVALID_XML_CHARS = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _applications_select():
+    return (
+        select(
+            Application.id, Application.applied_at, Application.status, Application.payment_status,
+            User.name, User.email, Course.title, Application.original_price, Coupon.code,
+            CouponUsage.discount_amount, Application.discount_amount, Application.final_price,
+            Application.payment_reference, Application.paid_at
+        )
+        .join(User, Application.user_id == User.id)
+        .join(Course, Application.course_id == Course.id)
+        .outerjoin(Coupon, Application.coupon_id == Coupon.id)
+        .outerjoin(CouponUsage, CouponUsage.application_id == Application.id)
+        .order_by(Application.id)
+    )
+
+
+def _payments_select():
+    return (
+        select(
+            Application.id, Application.payment_reference, Application.paid_at, User.name, User.email,
+            Course.title, Application.original_price, Coupon.code, Application.discount_amount,
+            Application.final_price
+        )
+        .join(User, Application.user_id == User.id)
+        .join(Course, Application.course_id == Course.id)
+        .outerjoin(Coupon, Application.coupon_id == Coupon.id)
+        .outerjoin(CouponUsage, CouponUsage.application_id == Application.id)
+        .where(Application.payment_status == 'completed')
+        .order_by(Application.id)
+    )
+
+
+def _users_select():
+    return (
+        select(User.id, User.name, User.email, User.role, User.admin_approved, User.created_at)
+        .where(User.deleted_at.is_(None))
+        .order_by(User.id)
+    )
+
+
+def _coupon_usage_select():
+    return (
+        select(
+            CouponUsage.id, CouponUsage.used_at, Coupon.code, Coupon.discount_type, User.name,
+            User.email, Course.title, Application.id, CouponUsage.discount_amount, Application.final_price
+        )
+        .join(Coupon, CouponUsage.coupon_id == Coupon.id)
+        .join(User, CouponUsage.user_id == User.id)
+        .join(Application, CouponUsage.application_id == Application.id)
+        .join(Course, Application.course_id == Course.id)
+        .order_by(CouponUsage.id)
+    )
+
+
+# Each export: column headers, query builder, the column the date range
+# filters on and the column the status filter applies to (if any)
+EXPORTS = {
+    'applications': {
+        'headers': ['Application ID', 'Applied At', 'Status', 'Payment Status', 'Student', 'Email',
+                    'Course', 'Original Price', 'Coupon', 'Coupon Discount', 'Discount Amount',
+                    'Final Price', 'Payment Reference', 'Paid At'],
+        'select': _applications_select,
+        'date_column': Application.applied_at,
+        'status_column': Application.payment_status,
+    },
+    'payments': {
+        'headers': ['Application ID', 'Payment Reference', 'Paid At', 'Student', 'Email', 'Course',
+                    'Original Price', 'Coupon', 'Discount Amount', 'Final Price'],
+        'select': _payments_select,
+        'date_column': Application.paid_at,
+        'status_column': None,
+    },
+    'users': {
+        'headers': ['User ID', 'Name', 'Email', 'Role', 'Admin Approved', 'Created At'],
+        'select': _users_select,
+        'date_column': User.created_at,
+        'status_column': User.role,
+    },
+    'coupon-usage': {
+        'headers': ['Usage ID', 'Used At', 'Coupon', 'Discount Type', 'Student', 'Email', 'Course',
+                    'Application ID', 'Discount Amount', 'Final Price'],
+        'select': _coupon_usage_select,
+        'date_column': CouponUsage.used_at,
+        'status_column': None,
+    },
+}
+
+
+def build_export_query(kind, start_date=None, end_date=None, status=None):
+    """
+    Build the query for an export
+
+    Args:
+        kind (str): One of EXPORTS
+        start_date (date): Earliest date to include
+        end_date (date): Latest date to include (inclusive)
+        status (str): Status (or role, for users) to filter on
+
+    Returns:
+        Select: Query ready to be streamed
+    """
+    spec = EXPORTS[kind]
+    stmt = spec['select']()
+    if start_date:
+        stmt = stmt.where(spec['date_column'] >= datetime.combine(start_date, datetime.min.time()))
+    if end_date:
+        stmt = stmt.where(spec['date_column'] < datetime.combine(end_date + timedelta(days=1), datetime.min.time()))
+    if status and spec['status_column'] is not None:
+        stmt = stmt.where(spec['status_column'] == status)
+    return stmt
+
+
+def stream_rows(stmt):
+    """Yield result rows through a server-side cursor, EXPORT_FETCH_SIZE at a time"""
+    result = db.session.execute(stmt.execution_options(yield_per=EXPORT_FETCH_SIZE))
+    for partition in result.partitions():
+        yield from partition
+
+
+def _text_cell(value):
+    if value is None:
+        return ''
+    if isinstance(value, datetime):
+        return value.strftime('%Y-%m-%d %H:%M:%S')
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+class _ChunkSink:
+    """Write-only buffer that hands back whatever was written since the last drain"""
+
+    def __init__(self):
+        self.chunks = []
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b''.join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def iter_csv_gzip(headers, rows):
+    """
+    Encode rows as CSV and gzip them on the fly
+
+    Args:
+        headers (list): Column headers
+        rows (iterable): Result rows
+
+    Yields:
+        bytes: Pieces of the gzipped CSV file
+    """
+    sink = _ChunkSink()
+    line = io.StringIO()
+    writer = csv.writer(line)
+
+    with gzip.GzipFile(fileobj=sink, mode='wb') as gz:
+        writer.writerow(headers)
+        for count, row in enumerate(rows, 1):
+            writer.writerow([_text_cell(value) for value in row])
+            if count % EXPORT_FETCH_SIZE == 0:
+                gz.write(line.getvalue().encode('utf-8'))
+                line.seek(0)
+                line.truncate()
+                data = sink.drain()
+                if data:
+                    yield data
+        gz.write(line.getvalue().encode('utf-8'))
+    yield sink.drain()
+
+
+XLSX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '</Types>'
+)
+XLSX_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+XLSX_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="Export" sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+XLSX_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '</Relationships>'
+)
+
+
+def _xlsx_row(values):
+    cells = []
+    for value in values:
+        if isinstance(value, bool):
+            cells.append(f'<c t="b"><v>{int(value)}</v></c>')
+        elif isinstance(value, (int, float)):
+            cells.append(f'<c><v>{value}</v></c>')
+        else:
+            text = INVALID_XML_CHARS.sub('', str(_text_cell(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{escape(text)}</t></is></c>')
+    return f'<row>{"".join(cells)}</row>'
+
+
+def iter_xlsx(headers, rows):
+    """
+    Write rows as a single-sheet XLSX workbook, streamed as it is zipped
+
+    The zip is written to a non-seekable sink, so entries use data
+    descriptors and nothing but the current chunk is held in memory.
+
+    Args:
+        headers (list): Column headers
+        rows (iterable): Result rows
+
+    Yields:
+        bytes: Pieces of the XLSX file
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, mode='w', compression=zipfile.ZIP_DEFLATED) as workbook:
+        workbook.writestr('[Content_Types].xml', XLSX_CONTENT_TYPES)
+        workbook.writestr('_rels/.rels', XLSX_ROOT_RELS)
+        workbook.writestr('xl/workbook.xml', XLSX_WORKBOOK)
+        workbook.writestr('xl/_rels/workbook.xml.rels', XLSX_WORKBOOK_RELS)
+
+        with workbook.open('xl/worksheets/sheet1.xml', mode='w', force_zip64=True) as sheet:
+            sheet.write(
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+                '<sheetData>'.encode('utf-8')
+            )
+            sheet.write(_xlsx_row(headers).encode('utf-8'))
+            pending = []
+            for count, row in enumerate(rows, 1):
+                pending.append(_xlsx_row(row))
+                if count % EXPORT_FETCH_SIZE == 0:
+                    sheet.write(''.join(pending).encode('utf-8'))
+                    pending = []
+                    data = sink.drain()
+                    if data:
+                        yield data
+            sheet.write((''.join(pending) + '</sheetData></worksheet>').encode('utf-8'))
+    yield sink.drain()
@@ -0,0 +1,301 @@
+"""
+Invalidation Bus for SMIICT Institute Course Platform
+Tells every worker process and node which cache entries a commit made stale
+"""
+
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import defaultdict
+from sqlalchemy import text
+import logging
+
+from utils.cache_service import caches, evict, publishers
+
+try:
+    import psycopg
+    from psycopg import sql
+except ImportError:  # psycopg is only needed to listen on Postgres
+    psycopg = None
+
+try:
+    import redis
+except ImportError:  # redis is optional, needed only for CACHE_BUS=redis
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# NOTIFY payloads must stay under 8000 bytes; larger messages clear whole caches instead
+MAX_PAYLOAD = 7900
+
+# Seconds to wait before listening again after the connection is lost
+RECONNECT_DELAY = 1.0
+
+
+class PostgresBackend:
+    """LISTEN/NOTIFY on the application's own database"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.dsn = engine.url.set(drivername='postgresql').render_as_string(hide_password=False)
+
+    def publish(self, channel, payload):
+        with self.engine.connect() as conn:
+            conn.execute(text("SELECT pg_notify(:channel, :payload)"), {'channel': channel, 'payload': payload})
+            conn.commit()
+
+    def listen(self, channel, handle, stopped, on_connect):
+        if psycopg is None:
+            raise RuntimeError("Listening on Postgres needs psycopg (see requirements.txt)")
+        with psycopg.connect(self.dsn, autocommit=True) as conn:
+            conn.execute(sql.SQL("LISTEN {}").format(sql.Identifier(channel)))
+            on_connect()
+            while not stopped.is_set():
+                for notify in conn.notifies(timeout=1.0):
+                    handle(notify.payload)
+
+
+class RedisBackend:
+    """Pub/sub on a Redis-compatible server (Redis, Valkey, KeyDB), for nodes that share no database connection"""
+
+    def __init__(self, url):
+        if redis is None:
+            raise RuntimeError("CACHE_BUS=redis needs the redis package (pip install redis)")
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, payload):
+        self.client.publish(channel, payload)
+
+    def listen(self, channel, handle, stopped, on_connect):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        try:
+            pubsub.subscribe(channel)
+            on_connect()
+            while not stopped.is_set():
+                message = pubsub.get_message(timeout=1.0)
+                if message is not None:
+                    handle(message['data'])
+        finally:
+            pubsub.close()
+
+
+class LocalBackend:
+    """
+    Stand-in for Redis pub/sub within one process
+
+    Delivers each message to every listener in the process, which is all a
+    single-process server (or a test run with several buses) needs.
+    """
+
+    def __init__(self):
+        self._listeners = defaultdict(list)
+        self._lock = threading.Lock()
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def _after_fork(self):
+        # The parent's listeners are gone in the child
+        self._listeners = defaultdict(list)
+        self._lock = threading.Lock()
+
+    def publish(self, channel, payload):
+        with self._lock:
+            listeners = list(self._listeners[channel])
+        for inbox in listeners:
+            inbox.put(payload)
+
+    def listen(self, channel, handle, stopped, on_connect):
+        inbox = queue.Queue()
+        with self._lock:
+            self._listeners[channel].append(inbox)
+        try:
+            on_connect()
+            while not stopped.is_set():
+                try:
+                    handle(inbox.get(timeout=0.5))
+                except queue.Empty:
+                    pass
+        finally:
+            with self._lock:
+                self._listeners[channel].remove(inbox)
+
+
+local_backend = LocalBackend()
+
+
+class InvalidationBus:
+    """
+    Publishes the cache keys each commit invalidates and evicts the keys other processes publish
+
+    The committing process evicts its own entries synchronously (see
+    cache_service); the bus only carries them to the others, on two daemon
+    threads so a commit never waits on the network.
+
+    Every message carries its sender's id and a version that goes up by one
+    per message. A listener that sees a version skipped, or that had to
+    reconnect, may have missed invalidations and clears all its caches
+    rather than serve stale entries.
+    """
+
+    def __init__(self, backend, channel='cache_invalidation'):
+        """
+        Args:
+            backend: PostgresBackend, RedisBackend or LocalBackend
+            channel (str): Channel shared by every process of the app
+        """
+        self.backend = backend
+        self.channel = channel
+        self.node = uuid.uuid4().hex[:12]
+        self.published = 0
+        self.received = 0
+        self._versions = itertools.count(1)
+        self._seen = {}
+        self._outbox = queue.Queue()
+        self._stopped = threading.Event()
+        self._connected = threading.Event()
+        self._threads = []
+        os.register_at_fork(after_in_child=self._after_fork)
+
+    def start(self):
+        """Start publishing and listening; returns once the listener is subscribed (or after 5 seconds)"""
+        self._threads = [
+            threading.Thread(target=self._publish_loop, name='cache-bus-publish', daemon=True),
+            threading.Thread(target=self._listen_loop, name='cache-bus-listen', daemon=True),
+        ]
+        for thread in self._threads:
+            thread.start()
+        self._connected.wait(5)
+
+    def stop(self):
+        self._stopped.set()
+        self._outbox.put(None)
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _after_fork(self):
+        # Threads do not survive fork; a child (e.g. a worker.py process) starts its own
+        self.node = uuid.uuid4().hex[:12]
+        self._versions = itertools.count(1)
+        self._seen = {}
+        self._outbox = queue.Queue()
+        self._connected = threading.Event()
+        if self._threads and not self._stopped.is_set():
+            self.start()
+
+    def publish(self, invalidations):
+        """
+        Queue (cache name, key) pairs to be sent to the other processes
+
+        Args:
+            invalidations (iterable): Pairs as collected by invalidate_after_commit
+        """
+        self._outbox.put(list(invalidations))
+
+    def encode(self, keys):
+        message = {'origin': self.node, 'version': next(self._versions), 'sent': time.time(), 'keys': keys}
+        payload = json.dumps(message)
+        if len(payload) > MAX_PAYLOAD:
+            message['keys'] = [[name, None] for name in sorted({name for name, _ in keys})]
+            payload = json.dumps(message)
+        return payload
+
+    def _publish_loop(self):
+        stopping = False
+        while not stopping:
+            keys = self._outbox.get()
+            if keys is None:
+                return
+            # Send everything committed meanwhile as one message
+            while not self._outbox.empty():
+                more = self._outbox.get()
+                if more is None:
+                    stopping = True
+                    break
+                keys += more
+            try:
+                self.backend.publish(self.channel, self.encode(sorted(set(keys), key=repr)))
+                self.published += 1
+            except Exception as e:
+                # The version was used up, so listeners see the gap and clear their caches
+                logger.error("Could not publish cache invalidations: %s", e)
+
+    def _listen_loop(self):
+        first = True
+        while not self._stopped.is_set():
+            def connected():
+                if not first:
+                    logger.info("Cache bus reconnected, clearing caches")
+                    self.clear_all()
+                self._connected.set()
+            try:
+                self.backend.listen(self.channel, self.receive, self._stopped, connected)
+            except Exception as e:
+                logger.error("Cache bus listener failed: %s", e)
+                self._stopped.wait(RECONNECT_DELAY)
+            first = False
+
+    def receive(self, payload):
+        """Evict the entries named in a message from another process"""
+        try:
+            message = json.loads(payload)
+            origin, version = message['origin'], message['version']
+        except (ValueError, KeyError, TypeError) as e:
+            logger.warning("Ignoring malformed cache invalidation: %s", e)
+            return
+        if origin == self.node:
+            return
+        self.received += 1
+
+        last = self._seen.get(origin)
+        self._seen[origin] = version
+        if last is not None and version != last + 1:
+            logger.warning("Missed cache invalidations %s-%s from %s, clearing caches", last + 1, version - 1, origin)
+            self.clear_all()
+            return
+        for name, key in message['keys']:
+            evict(name, key)
+        logger.debug("Evicted %s cache keys from %s after %.1fms", len(message['keys']), origin,
+                     (time.time() - message['sent']) * 1000)
+
+    @staticmethod
+    def clear_all():
+        for cache in list(caches.values()):
+            cache.clear()
+
+
+def build_backend(app, engine):
+    """Backend named by CACHE_BUS: 'postgres', 'redis', 'local' or 'auto' (postgres on Postgres, else local)"""
+    kind = app.config.get('CACHE_BUS', 'auto')
+    if kind == 'auto':
+        kind = 'postgres' if engine.dialect.name == 'postgresql' else 'local'
+    if kind == 'postgres':
+        return PostgresBackend(engine)
+    if kind == 'redis':
+        return RedisBackend(app.config['CACHE_BUS_REDIS_URL'])
+    if kind == 'local':
+        return local_backend
+    raise ValueError(f"Unknown CACHE_BUS {kind!r}")
+
+
+def init_invalidation_bus(app, engine):
+    """
+    Carry cache invalidations between the app's processes (call inside an app context)
+
+    Args:
+        app (Flask): The application
+        engine: SQLAlchemy engine (db.engine), used by the Postgres backend
+
+    Returns:
+        InvalidationBus: The started bus, or None when CACHE_BUS is 'none'
+    """
+    if app.config.get('CACHE_BUS', 'auto') == 'none':
+        return None
+    bus = InvalidationBus(build_backend(app, engine), app.config.get('CACHE_BUS_CHANNEL', 'cache_invalidation'))
+    publishers.append(bus.publish)
+    bus.start()
+    app.extensions['invalidation_bus'] = bus
+    logger.info("Cache invalidation bus on %s (%s)", type(bus.backend).__name__, bus.channel)
+    return bus
@@ -0,0 +1,567 @@
+"""
+Job Service for SMIICT Institute Course Platform
+Queues background jobs in the database and runs them on worker threads, with retries and cron schedules
+"""
+
+import json
+import os
+import random
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from flask import current_app
+from sqlalchemy import select, update, delete, func
+from sqlalchemy.exc import IntegrityError
+import logging
+
+from models import db, Job, JobSchedule
+from utils.tracing import tracer, current_traceparent, SpanContext
+
+logger = logging.getLogger(__name__)
+
+# Registered jobs by name, filled by the @job decorator
+JOBS = {}
+
+# Statuses a job can no longer leave
+FINISHED_STATUSES = ('succeeded', 'dead')
+
+
+class CronSchedule:
+    """
+    A five-field cron expression: minute hour day-of-month month day-of-week
+
+    Fields take '*', numbers, ranges ('1-5'), lists ('0,30') and steps
+    ('*/15', '8-18/2'). Day of week runs 0-6 from Sunday (7 is also Sunday).
+    As in cron, when both day fields are restricted a day matching either
+    one is used. Times are UTC, like the rest of the app.
+    """
+
+    ALIASES = {
+        '@hourly': '0 * * * *',
+        '@daily': '0 0 * * *',
+        '@weekly': '0 0 * * 0',
+        '@monthly': '0 0 1 * *',
+    }
+    BOUNDS = ((0, 59), (0, 23), (1, 31), (1, 12), (0, 7))
+
+    def __init__(self, expression):
+        self.expression = expression
+        fields = self.ALIASES.get(expression.strip(), expression).split()
+        if len(fields) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(field, low, high) for field, (low, high) in zip(fields, self.BOUNDS)
+        )
+        self.weekdays = {day % 7 for day in weekdays}
+        self.any_day = fields[2] == '*'
+        self.any_weekday = fields[4] == '*'
+
+    @staticmethod
+    def _parse(field, low, high):
+        values = set()
+        for part in field.split(','):
+            span, _, step = part.partition('/')
+            if span == '*':
+                start, end = low, high
+            elif '-' in span:
+                start, end = (int(value) for value in span.split('-', 1))
+            else:
+                start = end = int(span)
+                if step:
+                    end = high
+            if not low <= start <= end <= high:
+                raise ValueError(f"Cron field {field!r} is outside {low}-{high}")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, moment):
+        day = moment.day in self.days
+        weekday = (moment.isoweekday() % 7) in self.weekdays
+        if self.any_day or self.any_weekday:
+            return day and weekday
+        return day or weekday
+
+    def next_after(self, moment):
+        """
+        First time after moment the schedule fires
+
+        Args:
+            moment (datetime): Naive UTC datetime
+
+        Returns:
+            datetime: Next matching minute
+        """
+        moment = moment.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        # Skip whole months, days and hours that cannot match; five years
+        # covers every satisfiable expression (e.g. 29 February)
+        limit = moment + timedelta(days=5 * 366)
+        while moment < limit:
+            if moment.month not in self.months:
+                year, month = divmod(moment.month, 12)
+                moment = moment.replace(year=moment.year + year, month=month + 1, day=1, hour=0, minute=0)
+            elif not self._day_matches(moment):
+                moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            elif moment.hour not in self.hours:
+                moment = (moment + timedelta(hours=1)).replace(minute=0)
+            elif moment.minute not in self.minutes:
+                moment += timedelta(minutes=1)
+            else:
+                return moment
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+    def __repr__(self):
+        return f"CronSchedule({self.expression!r})"
+
+
+class JobDefinition:
+    """A registered job function and how it is retried"""
+
+    def __init__(self, name, fn, max_attempts=None, schedule=None):
+        self.name = name
+        self.fn = fn
+        self.max_attempts = max_attempts
+        self.schedule = CronSchedule(schedule) if schedule else None
+
+
+def job(name, max_attempts=None, schedule=None):
+    """
+    Register a function as a background job
+
+    The function is called with the keyword arguments it was queued with,
+    inside an app context. Anything it leaves in the session is committed
+    together with the job's completion, and rolled back if it raises.
+
+    Example:
+        @job('counters.reconcile', schedule='*/15 * * * *')
+        def reconcile():
+            reconcile_counters()
+
+    Args:
+        name (str): Name the job is queued under
+        max_attempts (int): Runs before the job is given up as dead
+            (defaults to JOB_MAX_ATTEMPTS)
+        schedule (str): Cron expression to also queue the job on
+    """
+    def register(fn):
+        if name in JOBS:
+            raise ValueError(f"Job {name!r} is already registered")
+        JOBS[name] = JobDefinition(name, fn, max_attempts, schedule)
+        return fn
+    return register
+
+
+def enqueue(name, run_at=None, delay=None, max_attempts=None, **kwargs):
+    """
+    Queue a job (the caller commits)
+
+    The job is added to the current session, so it only becomes visible
+    to workers if the transaction that queued it commits.
+
+    Args:
+        name (str): Registered job name
+        run_at (datetime): Earliest time to run it (defaults to now)
+        delay (float): Seconds from now to run it, instead of run_at
+        max_attempts (int): Overrides the job's own limit
+        **kwargs: JSON-serializable arguments for the job function
+
+    Returns:
+        Job: The new, pending row
+    """
+    if delay is not None:
+        run_at = datetime.utcnow() + timedelta(seconds=delay)
+    definition = JOBS.get(name)
+    new_job = Job(
+        name=name,
+        args=json.dumps(kwargs),
+        run_at=run_at or datetime.utcnow(),
+        max_attempts=max_attempts or (definition and definition.max_attempts)
+        or current_app.config.get('JOB_MAX_ATTEMPTS', 5),
+        traceparent=current_traceparent(),
+    )
+    db.session.add(new_job)
+    return new_job
+
+
+def retry_delay(attempts):
+    """
+    Seconds to wait before the next attempt of a job that failed attempts times
+
+    Doubles from JOB_RETRY_BASE_DELAY up to JOB_RETRY_MAX_DELAY, with jitter
+    so jobs that failed together (e.g. while Paystack was down) do not all
+    retry at the same moment.
+    """
+    base = current_app.config.get('JOB_RETRY_BASE_DELAY', 30)
+    cap = current_app.config.get('JOB_RETRY_MAX_DELAY', 3600)
+    delay = min(cap, base * 2 ** max(0, attempts - 1))
+    return delay / 2 + random.uniform(0, delay / 2)
+
+
+def claim_jobs(worker_id, limit):
+    """
+    Lock up to limit due jobs for one worker
+
+    On Postgres the candidates are read with FOR UPDATE SKIP LOCKED, so
+    concurrent workers pass over each other's rows instead of waiting on
+    them. Each row is then only taken if it is still queued, which is what
+    keeps workers apart on SQLite (where FOR UPDATE is not supported).
+
+    Args:
+        worker_id (str): Identifies the worker in locked_by
+        limit (int): Most jobs to claim
+
+    Returns:
+        list: Claimed job ids, oldest first
+    """
+    now = datetime.utcnow()
+    candidates = db.session.execute(
+        select(Job.id)
+        .where(Job.status == 'queued', Job.run_at <= now)
+        .order_by(Job.run_at, Job.id)
+        .limit(limit)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+
+    claimed = []
+    for job_id in candidates:
+        result = db.session.execute(
+            update(Job)
+            .where(Job.id == job_id, Job.status == 'queued')
+            .values(status='running', locked_by=worker_id, locked_at=now, started_at=now,
+                    attempts=Job.attempts + 1)
+        )
+        if result.rowcount:
+            claimed.append(job_id)
+    db.session.commit()
+    return claimed
+
+
+def heartbeat(worker_id):
+    """Refresh locked_at of the jobs a worker is running, so they are not taken for abandoned"""
+    db.session.execute(
+        update(Job)
+        .where(Job.locked_by == worker_id, Job.status == 'running')
+        .values(locked_at=datetime.utcnow())
+    )
+    db.session.commit()
+
+
+def requeue_abandoned(timeout):
+    """
+    Put back jobs whose worker stopped sending heartbeats (e.g. it was killed)
+
+    A job that has used up its attempts is marked dead instead.
+
+    Args:
+        timeout (float): Seconds without a heartbeat after which a job is abandoned
+
+    Returns:
+        int: Jobs requeued or given up
+    """
+    now = datetime.utcnow()
+    abandoned = (Job.status == 'running', Job.locked_at < now - timedelta(seconds=timeout))
+    dead = db.session.execute(
+        update(Job)
+        .where(*abandoned, Job.attempts >= Job.max_attempts)
+        .values(status='dead', locked_by=None, finished_at=now, last_error='Worker stopped responding')
+    ).rowcount
+    requeued = db.session.execute(
+        update(Job)
+        .where(*abandoned)
+        .values(status='queued', locked_by=None, run_at=now, last_error='Worker stopped responding')
+    ).rowcount
+    db.session.commit()
+    if dead or requeued:
+        logger.warning("Recovered abandoned jobs: %s requeued, %s dead", requeued, dead)
+    return dead + requeued
+
+
+def sync_schedules():
+    """Create the schedule row of each periodic job, or reset it when its cron expression changed"""
+    now = datetime.utcnow()
+    for definition in JOBS.values():
+        if definition.schedule is None:
+            continue
+        row = db.session.get(JobSchedule, definition.name)
+        if row is None:
+            db.session.add(JobSchedule(name=definition.name, cron=definition.schedule.expression,
+                                       next_run_at=definition.schedule.next_after(now)))
+        elif row.cron != definition.schedule.expression:
+            row.cron = definition.schedule.expression
+            row.next_run_at = definition.schedule.next_after(now)
+        try:
+            db.session.commit()
+        except IntegrityError:
+            # Another worker created it first
+            db.session.rollback()
+
+
+def enqueue_due_schedules():
+    """
+    Queue one run of every periodic job that is due
+
+    A schedule's next run time is only moved on if it still holds the value
+    read, so when several workers see the same due schedule exactly one of
+    them queues it. Runs missed while no worker was up are not made up.
+
+    Returns:
+        int: Jobs queued
+    """
+    now = datetime.utcnow()
+    due = db.session.execute(
+        select(JobSchedule.name, JobSchedule.next_run_at)
+        .where(JobSchedule.next_run_at <= now)
+        .with_for_update(skip_locked=True)
+    ).all()
+
+    queued = 0
+    for name, next_run_at in due:
+        definition = JOBS.get(name)
+        if definition is None or definition.schedule is None:
+            continue
+        moved = db.session.execute(
+            update(JobSchedule)
+            .where(JobSchedule.name == name, JobSchedule.next_run_at == next_run_at)
+            .values(next_run_at=definition.schedule.next_after(now), last_run_at=next_run_at)
+        ).rowcount
+        if moved:
+            enqueue(name, run_at=next_run_at)
+            queued += 1
+    db.session.commit()
+    return queued
+
+
+def prune_jobs(days):
+    """
+    Delete finished jobs older than days
+
+    Returns:
+        int: Rows deleted
+    """
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    deleted = db.session.execute(
+        delete(Job).where(Job.status.in_(FINISHED_STATUSES), Job.finished_at < cutoff)
+    ).rowcount
+    db.session.commit()
+    return deleted
+
+
+@job('jobs.prune', schedule='30 3 * * *')
+def prune_finished_jobs():
+    deleted = prune_jobs(current_app.config.get('JOB_RETENTION_DAYS', 14))
+    logger.info("Pruned %s finished jobs", deleted)
+
+
+def percentile(values, fraction):
+    """Value at fraction (0-1) of the sorted values (None when empty)"""
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def job_stats(since):
+    """
+    Run counts and timings per job name from the job table
+
+    Args:
+        since (datetime): Only jobs created after this
+
+    Returns:
+        dict: {name: {status: count, ..., 'p50_ms', 'p95_ms', 'max_ms', 'wait_p95_ms'}}
+            where wait is the delay between a job's run_at and its last start
+    """
+    stats = {}
+    counts = db.session.execute(
+        select(Job.name, Job.status, func.count())
+        .where(Job.created_at >= since)
+        .group_by(Job.name, Job.status)
+    ).all()
+    for name, status, count in counts:
+        stats.setdefault(name, {})[status] = count
+
+    timings = {}
+    rows = db.session.execute(
+        select(Job.name, Job.duration_ms, Job.run_at, Job.started_at)
+        .where(Job.created_at >= since, Job.duration_ms.isnot(None))
+    ).all()
+    for name, duration_ms, run_at, started_at in rows:
+        durations, waits = timings.setdefault(name, ([], []))
+        durations.append(duration_ms)
+        if started_at and run_at:
+            waits.append(max(0.0, (started_at - run_at).total_seconds() * 1000))
+    for name, (durations, waits) in timings.items():
+        stats.setdefault(name, {}).update(
+            p50_ms=percentile(durations, 0.5),
+            p95_ms=percentile(durations, 0.95),
+            max_ms=max(durations),
+            wait_p95_ms=percentile(waits, 0.95),
+        )
+    return stats
+
+
+class JobMetrics:
+    """Runs, failures and run time per job name, as seen by one worker process"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def record(self, name, duration_ms, succeeded):
+        with self.lock:
+            totals = self.totals.setdefault(name, {'runs': 0, 'failures': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+            totals['runs'] += 1
+            totals['failures'] += 0 if succeeded else 1
+            totals['total_ms'] += duration_ms
+            totals['max_ms'] = max(totals['max_ms'], duration_ms)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {name: {'runs', 'failures', 'avg_ms', 'max_ms'}}
+        """
+        with self.lock:
+            return {
+                name: {'runs': t['runs'], 'failures': t['failures'],
+                       'avg_ms': t['total_ms'] / t['runs'], 'max_ms': t['max_ms']}
+                for name, t in self.totals.items()
+            }
+
+
+class Worker:
+    """
+    Claims due jobs and runs them on a thread pool
+
+    Each worker also queues due periodic jobs, refreshes the heartbeat of
+    the jobs it runs and requeues the jobs of workers that stopped sending
+    theirs, so any number of them can run side by side (in one process or
+    many, on one host or several).
+    """
+
+    def __init__(self, app, threads=None, poll_interval=None):
+        """
+        Args:
+            app (Flask): The application jobs run in
+            threads (int): Jobs run at once (defaults to JOB_WORKER_THREADS)
+            poll_interval (float): Seconds to wait when no job is due
+                (defaults to JOB_POLL_INTERVAL)
+        """
+        self.app = app
+        self.threads = threads or app.config.get('JOB_WORKER_THREADS', 4)
+        self.poll_interval = app.config.get('JOB_POLL_INTERVAL', 1.0) if poll_interval is None else poll_interval
+        self.lock_timeout = app.config.get('JOB_LOCK_TIMEOUT', 300)
+        self.id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+        self.metrics = JobMetrics()
+        self._running = set()
+        self._lock = threading.Lock()
+        self._stopping = threading.Event()
+
+    def stop(self):
+        """Stop claiming jobs; run() returns once the running ones finish"""
+        self._stopping.set()
+
+    def run(self, burst=False):
+        """
+        Run jobs until stop() is called
+
+        Args:
+            burst (bool): Return instead once no job is due or running
+                (for tests and one-off runs from cron)
+
+        Returns:
+            dict: The worker's JobMetrics snapshot
+        """
+        logger.info("Worker %s started with %s threads", self.id, self.threads)
+        with self.app.app_context():
+            sync_schedules()
+        executor = ThreadPoolExecutor(self.threads, thread_name_prefix='job')
+        housekeeping_at = 0
+        try:
+            while not self._stopping.is_set():
+                with self._lock:
+                    free = self.threads - len(self._running)
+                    # Taken before claiming: a job finishing after the claim may have requeued a retry
+                    idle = not self._running
+                claimed = []
+                with self.app.app_context():
+                    try:
+                        if time.monotonic() >= housekeeping_at:
+                            heartbeat(self.id)
+                            requeue_abandoned(self.lock_timeout)
+                            housekeeping_at = time.monotonic() + self.lock_timeout / 5
+                        enqueue_due_schedules()
+                        if free:
+                            claimed = claim_jobs(self.id, free)
+                    except Exception as e:
+                        db.session.rollback()
+                        logger.error("Worker %s could not claim jobs: %s", self.id, e)
+
+                for job_id in claimed:
+                    with self._lock:
+                        self._running.add(job_id)
+                    executor.submit(self._execute, job_id)
+
+                if burst and idle and not claimed:
+                    break
+                if not claimed:
+                    self._stopping.wait(self.poll_interval)
+        finally:
+            executor.shutdown(wait=True)
+        metrics = self.metrics.snapshot()
+        logger.info("Worker %s stopped: %s", self.id, metrics)
+        return metrics
+
+    def _execute(self, job_id):
+        try:
+            with self.app.app_context():
+                self.execute(job_id)
+        except Exception as e:
+            logger.error("Job %s could not be finished: %s", job_id, e)
+        finally:
+            with self._lock:
+                self._running.discard(job_id)
+
+    def execute(self, job_id):
+        """Run one claimed job and record its outcome (inside an app context)"""
+        claimed = db.session.get(Job, job_id)
+        name, attempt = claimed.name, claimed.attempts
+        parent = SpanContext.from_traceparent(claimed.traceparent)
+        started = time.perf_counter()
+        error = None
+        try:
+            definition = JOBS.get(name)
+            if definition is None:
+                raise LookupError(f"No job registered as {name!r}")
+            kwargs = json.loads(claimed.args or '{}')
+            with tracer.span(f'job {name}', attributes={'job': name, 'job.id': job_id, 'job.attempt': attempt},
+                             parent=parent):
+                definition.fn(**kwargs)
+        except Exception as e:
+            db.session.rollback()
+            error = f"{type(e).__name__}: {e}"
+        duration_ms = (time.perf_counter() - started) * 1000
+        self.metrics.record(name, duration_ms, error is None)
+
+        # The job may have committed or rolled back, so reload it
+        finished = db.session.get(Job, job_id)
+        finished.duration_ms = duration_ms
+        finished.locked_by = None
+        if error is None:
+            finished.status = 'succeeded'
+            finished.finished_at = datetime.utcnow()
+            finished.last_error = None
+            logger.info("Job %s (%s) succeeded in %.1fms", job_id, name, duration_ms)
+        elif attempt >= finished.max_attempts:
+            finished.status = 'dead'
+            finished.finished_at = datetime.utcnow()
+            finished.last_error = error
+            logger.error("Job %s (%s) failed for good after %s attempts: %s", job_id, name, attempt, error)
+        else:
+            delay = retry_delay(attempt)
+            finished.status = 'queued'
+            finished.run_at = datetime.utcnow() + timedelta(seconds=delay)
+            finished.last_error = error
+            logger.warning("Job %s (%s) failed, retrying in %.0fs: %s", job_id, name, delay, error)
+        db.session.commit()
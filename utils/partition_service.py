@@ -0,0 +1,231 @@
+"""
+Partition Service for SMIICT Institute Course Platform
+Maintains monthly Postgres partitions and archives old rows to compressed files
+"""
+
+import gzip
+import json
+import os
+import re
+from datetime import datetime
+from flask import current_app
+from sqlalchemy import select, delete, exists, text
+from sqlalchemy.exc import OperationalError
+import logging
+
+from models import db, Application, ContactMessage, CouponUsage
+from utils.bulk_service import id_filter, chunked
+
+logger = logging.getLogger(__name__)
+
+# Partitioned tables and the column they are partitioned on
+PARTITIONED_TABLES = {
+    'application': 'applied_at',
+    'contact_message': 'created_at',
+}
+
+# Rows that may leave the database once their month is old enough:
+# abandoned (never paid) applications and messages that have been read
+ARCHIVE_RULES = {
+    'application': (
+        Application, Application.applied_at,
+        lambda: (Application.payment_status.in_(('pending', 'failed', 'abandoned')),
+                 ~exists().where(CouponUsage.application_id == Application.id))
+    ),
+    'contact_message': (
+        ContactMessage, ContactMessage.created_at,
+        lambda: (ContactMessage.is_read.is_(True),)
+    ),
+}
+
+UPPER_BOUND_RE = re.compile(r"TO \('([^']+)'\)")
+
+
+def month_start(value):
+    return datetime(value.year, value.month, 1)
+
+
+def add_months(value, months):
+    index = value.year * 12 + value.month - 1 + months
+    return datetime(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table, month):
+    return f"{table}_p{month:%Y%m}"
+
+
+def is_partitioned(table):
+    """Whether a table is a partitioned Postgres table"""
+    if db.engine.dialect.name != 'postgresql':
+        return False
+    return db.session.execute(
+        text("SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(:table)"),
+        {'table': table}
+    ).scalar() is not None
+
+
+def partitions(table):
+    """Map each partition of a table to the upper bound of its range (None for the default partition)"""
+    rows = db.session.execute(text("""
+        SELECT child.relname, pg_get_expr(child.relpartbound, child.oid)
+        FROM pg_inherits
+        JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+        WHERE pg_inherits.inhparent = to_regclass(:table)
+    """), {'table': table})
+    bounds = {}
+    for name, bound in rows:
+        match = UPPER_BOUND_RE.search(bound)
+        bounds[name] = datetime.fromisoformat(match.group(1)) if match else None
+    return bounds
+
+
+def ensure_partitions(table, months_ahead=None):
+    """
+    Create the monthly partitions of a table up to months_ahead months from now
+
+    Months already covered by an existing partition (including the legacy
+    partition created by the migration) are skipped, and new partitions are
+    created while still empty, so this never blocks on a table scan.
+
+    Args:
+        table (str): One of PARTITIONED_TABLES
+        months_ahead (int): Defaults to PARTITION_MONTHS_AHEAD
+
+    Returns:
+        list: Names of the partitions created
+    """
+    if not is_partitioned(table):
+        logger.info("%s is not partitioned, skipping", table)
+        return []
+    if months_ahead is None:
+        months_ahead = current_app.config.get('PARTITION_MONTHS_AHEAD', 3)
+
+    covered = max((bound for bound in partitions(table).values() if bound), default=None)
+    month = month_start(datetime.utcnow())
+    if covered and covered > month:
+        month = month_start(covered)
+    last = add_months(month_start(datetime.utcnow()), months_ahead)
+
+    created = []
+    while month <= last:
+        name = partition_name(table, month)
+        db.session.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF {table} "
+            f"FOR VALUES FROM ('{month:%Y-%m-%d}') TO ('{add_months(month, 1):%Y-%m-%d}')"
+        ))
+        created.append(name)
+        month = add_months(month, 1)
+    db.session.commit()
+    if created:
+        logger.info("Ensured partitions of %s: %s", table, ', '.join(created))
+    return created
+
+
+def archive_month(table, month, archive_dir=None):
+    """
+    Move one month's archivable rows of a table into a gzipped JSON lines file
+
+    The file is written and synced before anything is deleted, and rows are
+    then deleted by id in chunks (re-checking the archive rule, so a row
+    that changed meanwhile stays). A monthly partition left empty is
+    detached and dropped.
+
+    Args:
+        table (str): One of ARCHIVE_RULES
+        month (datetime): Any moment in the month to archive
+        archive_dir (str): Defaults to ARCHIVE_DIR
+
+    Returns:
+        int: Number of rows archived
+    """
+    model, column, rule = ARCHIVE_RULES[table]
+    start = month_start(month)
+    end = add_months(start, 1)
+    archive_dir = os.path.join(archive_dir or current_app.config.get('ARCHIVE_DIR', 'archive'), table)
+    os.makedirs(archive_dir, exist_ok=True)
+    path = os.path.join(archive_dir, f"{partition_name(table, start)}.jsonl.gz")
+    if os.path.exists(path):
+        # Never overwrite an earlier archive of the same month
+        path = path.replace('.jsonl.gz', f"_{datetime.utcnow():%Y%m%d%H%M%S}.jsonl.gz")
+
+    stmt = (
+        select(model.__table__)
+        .where(column >= start, column < end, *rule())
+        .order_by(model.id)
+        .execution_options(yield_per=1000)
+    )
+    ids = []
+    with open(path + '.tmp', 'wb') as raw:
+        with gzip.GzipFile(fileobj=raw, mode='wb') as archive:
+            for row in db.session.execute(stmt):
+                archive.write(json.dumps(dict(row._mapping), default=str).encode('utf-8') + b'\n')
+                ids.append(row.id)
+        raw.flush()
+        os.fsync(raw.fileno())
+    db.session.rollback()
+
+    if not ids:
+        os.remove(path + '.tmp')
+        _drop_if_empty(table, start)
+        return 0
+    os.replace(path + '.tmp', path)
+
+    chunk_size = current_app.config.get('BULK_ACTION_CHUNK_SIZE', 1000)
+    for chunk in chunked(ids, chunk_size):
+        try:
+            db.session.execute(
+                delete(model).where(id_filter(model.id, chunk), column >= start, column < end, *rule())
+                .execution_options(synchronize_session=False)
+            )
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+
+    logger.info("Archived %s %s rows from %s to %s", len(ids), table, start.strftime('%Y-%m'), path)
+    _drop_if_empty(table, start)
+    return len(ids)
+
+
+def _drop_if_empty(table, month):
+    """
+    Detach and drop a monthly partition with no rows left
+
+    DETACH ... CONCURRENTLY is refused while the table has a default
+    partition (which the migration always creates), so this is a plain
+    DETACH. It briefly locks the parent table; the partition is empty, so
+    that is quick once granted, and a short lock_timeout keeps it from
+    queueing behind long queries and stalling everything else. A partition
+    left behind on timeout is dropped by a later run.
+    """
+    if not is_partitioned(table):
+        return
+    name = partition_name(table, month)
+    if name not in partitions(table):
+        return
+    if db.session.execute(text(f"SELECT EXISTS (SELECT 1 FROM {name})")).scalar():
+        return
+    db.session.commit()
+
+    try:
+        db.session.execute(text("SET LOCAL lock_timeout = '2s'"))
+        db.session.execute(text(f"ALTER TABLE {table} DETACH PARTITION {name}"))
+        db.session.execute(text(f"DROP TABLE {name}"))
+        db.session.commit()
+    except OperationalError as e:
+        db.session.rollback()
+        logger.warning("Could not drop empty partition %s, will retry next run: %s", name, e)
+        return
+    logger.info("Dropped empty partition %s", name)
+
+
+def archivable_months(table, before):
+    """Months with rows older than ``before``, oldest first"""
+    model, column, _ = ARCHIVE_RULES[table]
+    oldest = db.session.execute(select(db.func.min(column))).scalar()
+    months = []
+    month = month_start(oldest) if oldest else None
+    while month and month < month_start(before):
+        months.append(month)
+        month = add_months(month, 1)
+    return months
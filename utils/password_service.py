@@ -0,0 +1,159 @@
+"""
+Password Hashing Service for SMIICT Institute Course Platform
+Hashes and verifies passwords with a bounded number of concurrent hashes
+"""
+
+import threading
+from contextlib import contextmanager
+from flask import current_app
+from werkzeug.security import generate_password_hash, check_password_hash
+import logging
+
+try:
+    import argon2
+except ImportError:  # argon2-cffi is optional
+    argon2 = None
+
+logger = logging.getLogger(__name__)
+
+# Werkzeug accepts bare method names, expand them so stored hashes can be
+# compared against the configured parameters when deciding to rehash.
+DEFAULT_METHOD_PARAMS = {
+    'scrypt': 'scrypt:32768:8:1',
+    'pbkdf2': 'pbkdf2:sha256:600000',
+}
+
+
+class PasswordServiceBusy(Exception):
+    """Raised when no hashing slot becomes free within the configured timeout"""
+
+
+class PasswordService:
+    def __init__(self):
+        self.method = current_app.config.get('PASSWORD_HASH_METHOD', 'scrypt')
+        self.timeout = current_app.config.get('PASSWORD_HASH_TIMEOUT', 10)
+        concurrency = current_app.config.get('PASSWORD_HASH_CONCURRENCY', 2)
+        self._slots = threading.BoundedSemaphore(max(1, concurrency))
+        self._argon2 = None
+
+        if self.method.startswith('argon2'):
+            if argon2 is None:
+                logger.warning("argon2-cffi is not installed, falling back to scrypt password hashing")
+                self.method = 'scrypt'
+            else:
+                self._argon2 = self._build_argon2_hasher(self.method)
+
+        self.method = DEFAULT_METHOD_PARAMS.get(self.method, self.method)
+
+    @staticmethod
+    def _build_argon2_hasher(method):
+        """
+        Build an argon2 hasher from a method string
+
+        Args:
+            method (str): 'argon2' or 'argon2:time_cost:memory_cost:parallelism'
+
+        Returns:
+            argon2.PasswordHasher: Configured hasher
+        """
+        params = method.split(':')[1:]
+        if not params:
+            return argon2.PasswordHasher()
+        time_cost, memory_cost, parallelism = (int(p) for p in params)
+        return argon2.PasswordHasher(
+            time_cost=time_cost,
+            memory_cost=memory_cost,
+            parallelism=parallelism
+        )
+
+    @contextmanager
+    def _slot(self):
+        """Hold one hashing slot, waiting at most ``self.timeout`` seconds"""
+        if not self._slots.acquire(timeout=self.timeout):
+            logger.warning("Password hashing slots exhausted, rejecting request")
+            raise PasswordServiceBusy('Password hashing is temporarily unavailable')
+        try:
+            yield
+        finally:
+            self._slots.release()
+
+    def hash_password(self, password):
+        """
+        Hash a password with the configured algorithm and cost
+
+        Args:
+            password (str): Plain text password
+
+        Returns:
+            str: Password hash
+        """
+        with self._slot():
+            if self._argon2 is not None:
+                return self._argon2.hash(password)
+            return generate_password_hash(password, method=self.method)
+
+    def verify_password(self, password_hash, password):
+        """
+        Check a password against a stored hash of any supported algorithm
+
+        Args:
+            password_hash (str): Stored password hash
+            password (str): Plain text password
+
+        Returns:
+            bool: True if the password matches
+        """
+        if not password_hash:
+            return False
+
+        with self._slot():
+            if password_hash.startswith('$argon2'):
+                if argon2 is None:
+                    logger.error("Found an argon2 password hash but argon2-cffi is not installed")
+                    return False
+                try:
+                    return (self._argon2 or argon2.PasswordHasher()).verify(password_hash, password)
+                except (argon2.exceptions.VerificationError, argon2.exceptions.InvalidHashError):
+                    return False
+            return check_password_hash(password_hash, password)
+
+    def needs_rehash(self, password_hash):
+        """
+        Check whether a stored hash was made with a different algorithm or cost
+
+        Args:
+            password_hash (str): Stored password hash
+
+        Returns:
+            bool: True if the hash should be upgraded
+        """
+        if password_hash.startswith('$argon2'):
+            if self._argon2 is None:
+                return True
+            return self._argon2.check_needs_rehash(password_hash)
+
+        if self._argon2 is not None:
+            return True
+        return password_hash.split('$', 1)[0] != self.method
+
+    def verify_and_update(self, user, password):
+        """
+        Verify a user's password and upgrade an outdated hash in place
+
+        The caller is responsible for committing the session so that an
+        upgraded hash is persisted.
+
+        Args:
+            user: User object
+            password (str): Plain text password
+
+        Returns:
+            bool: True if the password matches
+        """
+        if not self.verify_password(user.password_hash, password):
+            return False
+
+        if self.needs_rehash(user.password_hash):
+            user.password_hash = self.hash_password(password)
+            logger.info("Upgraded password hash for user %s to %s", user.id, self.method.split(':')[0])
+        return True
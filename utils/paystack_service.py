@@ -7,6 +7,8 @@ import requests
 from flask import current_app
 import logging
 
+from utils.tracing import tracer
+
 logger = logging.getLogger(__name__)
 
 class PaystackService:
@@ -19,6 +21,16 @@ class PaystackService:
             'Content-Type': 'application/json'
         }
     
+    def _request(self, method, path, **kwargs):
+        """Call the Paystack API inside a client span (path as the span name, without ids)"""
+        url = f"{self.base_url}{path}"
+        operation = '/transaction/verify' if path.startswith('/transaction/verify/') else path
+        with tracer.span(f"paystack {method} {operation}", kind='client',
+                         attributes={'http.method': method, 'http.url': url, 'peer.service': 'paystack'}) as span:
+            response = requests.request(method, url, headers=self.headers, **kwargs)
+            span.set_attribute('http.status_code', response.status_code)
+            return response
+    
     def initialize_transaction(self, email, amount, reference, callback_url=None, metadata=None):
         """
         Initialize a Paystack transaction
@@ -46,33 +58,32 @@ class PaystackService:
                 'metadata': metadata or {}
             }
             
-            url = f"{self.base_url}/transaction/initialize"
-            response = requests.post(url, headers=self.headers, json=transaction_data)
+            response = self._request('POST', '/transaction/initialize', json=transaction_data)
             
             if response.status_code == 200:
                 data = response.json()
                 if data['status']:
-                    logger.info(f"Transaction initialized successfully: {reference}")
+                    logger.info("Transaction initialized successfully: %s", reference)
                     return {
                         'success': True,
                         'data': data['data'],
                         'message': data['message']
                     }
                 else:
-                    logger.error(f"Failed to initialize transaction: {data.get('message', 'Unknown error')}")
+                    logger.error("Failed to initialize transaction: %s", data.get('message', 'Unknown error'))
                     return {
                         'success': False,
                         'message': data.get('message', 'Failed to initialize transaction')
                     }
             else:
-                logger.error(f"HTTP error {response.status_code}: {response.text}")
+                logger.error("HTTP error %s: %s", response.status_code, response.text)
                 return {
                     'success': False,
                     'message': f'HTTP error {response.status_code}: {response.text}'
                 }
                 
         except Exception as e:
-            logger.error(f"Error initializing transaction: {str(e)}")
+            logger.error("Error initializing transaction: %s", e)
             return {
                 'success': False,
                 'message': f'Error initializing transaction: {str(e)}'
@@ -89,33 +100,32 @@ class PaystackService:
             dict: Verification response
         """
         try:
-            url = f"{self.base_url}/transaction/verify/{reference}"
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', f"/transaction/verify/{reference}")
             
             if response.status_code == 200:
                 data = response.json()
                 if data['status'] and data['data']['status'] == 'success':
-                    logger.info(f"Transaction verified successfully: {reference}")
+                    logger.info("Transaction verified successfully: %s", reference)
                     return {
                         'success': True,
                         'data': data['data'],
                         'message': 'Transaction verified successfully'
                     }
                 else:
-                    logger.warning(f"Transaction verification failed: {reference}")
+                    logger.warning("Transaction verification failed: %s", reference)
                     return {
                         'success': False,
                         'message': 'Transaction verification failed'
                     }
             else:
-                logger.error(f"HTTP error {response.status_code}: {response.text}")
+                logger.error("HTTP error %s: %s", response.status_code, response.text)
                 return {
                     'success': False,
                     'message': f'HTTP error {response.status_code}: {response.text}'
                 }
                 
         except Exception as e:
-            logger.error(f"Error verifying transaction: {str(e)}")
+            logger.error("Error verifying transaction: %s", e)
             return {
                 'success': False,
                 'message': f'Error verifying transaction: {str(e)}'
@@ -142,33 +152,32 @@ class PaystackService:
                 'phone': phone or ''
             }
             
-            url = f"{self.base_url}/customer"
-            response = requests.post(url, headers=self.headers, json=customer_data)
+            response = self._request('POST', '/customer', json=customer_data)
             
             if response.status_code == 200:
                 data = response.json()
                 if data['status']:
-                    logger.info(f"Customer created successfully: {email}")
+                    logger.info("Customer created successfully: %s", email)
                     return {
                         'success': True,
                         'data': data['data'],
                         'message': 'Customer created successfully'
                     }
                 else:
-                    logger.error(f"Failed to create customer: {data.get('message', 'Unknown error')}")
+                    logger.error("Failed to create customer: %s", data.get('message', 'Unknown error'))
                     return {
                         'success': False,
                         'message': data.get('message', 'Failed to create customer')
                     }
             else:
-                logger.error(f"HTTP error {response.status_code}: {response.text}")
+                logger.error("HTTP error %s: %s", response.status_code, response.text)
                 return {
                     'success': False,
                     'message': f'HTTP error {response.status_code}: {response.text}'
                 }
                 
         except Exception as e:
-            logger.error(f"Error creating customer: {str(e)}")
+            logger.error("Error creating customer: %s", e)
             return {
                 'success': False,
                 'message': f'Error creating customer: {str(e)}'
@@ -185,8 +194,7 @@ class PaystackService:
             dict: Transaction status
         """
         try:
-            url = f"{self.base_url}/transaction/verify/{reference}"
-            response = requests.get(url, headers=self.headers)
+            response = self._request('GET', f"/transaction/verify/{reference}")
             
             if response.status_code == 200:
                 data = response.json()
@@ -202,14 +210,14 @@ class PaystackService:
                         'message': 'Failed to get transaction status'
                     }
             else:
-                logger.error(f"HTTP error {response.status_code}: {response.text}")
+                logger.error("HTTP error %s: %s", response.status_code, response.text)
                 return {
                     'success': False,
                     'message': f'HTTP error {response.status_code}: {response.text}'
                 }
                 
         except Exception as e:
-            logger.error(f"Error getting transaction status: {str(e)}")
+            logger.error("Error getting transaction status: %s", e)
             return {
                 'success': False,
                 'message': f'Error getting transaction status: {str(e)}'
@@ -0,0 +1,111 @@
+"""
+Purge Service for SMIICT Institute Course Platform
+Removes soft-deleted users and their data in small batches (run by the users.purge job)
+"""
+
+import time
+from flask import current_app
+from sqlalchemy import select, delete, update, or_
+import logging
+
+from models import db, User, Application, Coupon, CouponUsage, Announcement, PaymentReference
+from utils.bulk_service import id_filter
+from utils.counter_service import reconcile_counters
+
+logger = logging.getLogger(__name__)
+
+
+class PurgeService:
+    def __init__(self):
+        self.batch_size = current_app.config.get('USER_PURGE_BATCH_SIZE', 500)
+        self.pause = current_app.config.get('USER_PURGE_PAUSE', 0.05)
+
+    def run(self):
+        """
+        Purge every soft-deleted user
+
+        Returns:
+            int: Number of users removed
+        """
+        purged = 0
+        last_id = 0
+        while True:
+            user_id = db.session.execute(
+                select(User.id)
+                .where(User.deleted_at.isnot(None), User.id > last_id)
+                .order_by(User.id)
+                .limit(1)
+            ).scalar()
+            if user_id is None:
+                break
+            last_id = user_id
+            try:
+                self.purge_user(user_id)
+                purged += 1
+            except Exception as e:
+                logger.error("Error purging user %s: %s", user_id, e)
+                db.session.rollback()
+        if purged:
+            # Purged applications no longer count as pending or revenue
+            reconcile_counters()
+        return purged
+
+    def purge_user(self, user_id):
+        """
+        Remove a soft-deleted user and everything that belongs to them
+
+        Dependent rows go first, batch_size at a time with a commit after
+        each batch, so no single transaction locks a long history. Coupons
+        and announcements the user created are kept and lose their creator.
+        The final user delete finds nothing left to cascade to.
+
+        Args:
+            user_id (int): User to purge
+        """
+        applications = select(Application.id).where(Application.user_id == user_id)
+        usages = self._in_batches(CouponUsage, or_(
+            CouponUsage.user_id == user_id,
+            CouponUsage.application_id.in_(applications)
+        ), lambda ids: delete(CouponUsage).where(ids))
+        # No foreign key to cascade from (application may be partitioned)
+        references = self._in_batches(PaymentReference, PaymentReference.application_id.in_(applications),
+                                      lambda ids: delete(PaymentReference).where(ids))
+        removed = self._in_batches(Application, Application.user_id == user_id,
+                                   lambda ids: delete(Application).where(ids))
+        self._in_batches(Coupon, Coupon.created_by == user_id,
+                         lambda ids: update(Coupon).where(ids).values(created_by=None))
+        self._in_batches(Announcement, Announcement.created_by == user_id,
+                         lambda ids: update(Announcement).where(ids).values(created_by=None))
+
+        # Only purge users that are still marked deleted
+        db.session.execute(delete(User).where(User.id == user_id, User.deleted_at.isnot(None)))
+        db.session.commit()
+        logger.info("Purged user %s: %s applications, %s coupon usages, %s payment references",
+                    user_id, removed, usages, references)
+
+    def _in_batches(self, model, condition, statement):
+        """
+        Apply a statement to the rows matching condition, batch_size rows per transaction
+
+        Args:
+            model: Model whose rows are processed
+            condition: Selects the rows still to process. The statement must
+                make rows stop matching it, or this never finishes.
+            statement (callable): Takes an ``id = ANY(...)`` filter and
+                returns the DELETE or UPDATE to run for that batch
+
+        Returns:
+            int: Number of rows processed
+        """
+        total = 0
+        while True:
+            ids = db.session.execute(
+                select(model.id).where(condition).order_by(model.id).limit(self.batch_size)
+            ).scalars().all()
+            if not ids:
+                return total
+            db.session.execute(statement(id_filter(model.id, ids)).execution_options(synchronize_session=False))
+            db.session.commit()
+            total += len(ids)
+            if self.pause:
+                time.sleep(self.pause)
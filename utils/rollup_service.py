@@ -0,0 +1,201 @@
+"""
+Rollup Service for SMIICT Institute Course Platform
+Maintains daily revenue and enrollment aggregates per course and per coupon
+"""
+
+from datetime import date, datetime, timedelta
+from sqlalchemy import select, delete, update, func
+import logging
+
+from models import db, Course, Coupon, Application, DailyCourseStats, DailyCouponStats
+
+logger = logging.getLogger(__name__)
+
+# Days rebuilt per transaction when backfilling
+BACKFILL_WINDOW_DAYS = 31
+
+
+def _as_date(value):
+    # func.date() returns a string on SQLite
+    return date.fromisoformat(value) if isinstance(value, str) else value
+
+
+def _upsert(model, keys, increments):
+    """
+    Add increments to the row for keys, creating it if it doesn't exist
+
+    One ``INSERT ... ON CONFLICT DO UPDATE SET x = x + excluded.x``
+    statement, so concurrent payments on the same day never lose updates.
+    """
+    dialect = db.engine.dialect.name
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        stmt = insert(model).values(**keys, **increments)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=list(keys),
+            set_={name: getattr(model, name) + stmt.excluded[name] for name in increments}
+        )
+        db.session.execute(stmt)
+        return
+
+    conditions = [getattr(model, name) == value for name, value in keys.items()]
+    result = db.session.execute(
+        update(model).where(*conditions)
+        .values({name: getattr(model, name) + value for name, value in increments.items()})
+    )
+    if result.rowcount == 0:
+        db.session.add(model(**keys, **increments))
+
+
+def record_application(application):
+    """Count a new application in its course's daily stats (the caller commits)"""
+    _upsert(DailyCourseStats,
+            {'day': application.applied_at.date(), 'course_id': application.course_id},
+            {'applications': 1})
+
+
+def record_payment(application, sign=1):
+    """
+    Add a completed payment to the daily stats of its course and coupon (the caller commits)
+
+    Args:
+        application (Application): Application with paid_at set
+        sign (int): -1 to take back a payment that was reversed
+    """
+    totals = {
+        'paid_count': sign,
+        'gross': sign * (application.original_price or 0),
+        'discount': sign * (application.discount_amount or 0),
+        'net': sign * (application.final_price or 0),
+    }
+    day = application.paid_at.date()
+    _upsert(DailyCourseStats, {'day': day, 'course_id': application.course_id}, totals)
+    if application.coupon_id:
+        _upsert(DailyCouponStats, {'day': day, 'coupon_id': application.coupon_id}, totals)
+
+
+def _payment_totals(*group_by):
+    day = func.date(Application.paid_at)
+    return (
+        select(
+            day, *group_by, func.count(),
+            func.coalesce(func.sum(Application.original_price), 0),
+            func.coalesce(func.sum(Application.discount_amount), 0),
+            func.coalesce(func.sum(Application.final_price), 0)
+        )
+        .where(Application.payment_status == 'completed')
+        .group_by(day, *group_by)
+    )
+
+
+def backfill(start=None, end=None):
+    """
+    Rebuild the daily stats from the application table
+
+    Days are rebuilt BACKFILL_WINDOW_DAYS at a time, one transaction per
+    window, so this can run against a live database. Re-running it over a
+    range repairs any drift there.
+
+    Args:
+        start (date): First day to rebuild (defaults to the earliest application)
+        end (date): Last day to rebuild, inclusive (defaults to today)
+
+    Returns:
+        int: Number of days rebuilt
+    """
+    if start is None:
+        first = db.session.execute(select(func.min(Application.applied_at))).scalar()
+        if first is None:
+            return 0
+        start = first.date()
+    end = end or datetime.utcnow().date()
+
+    day = start
+    while day <= end:
+        window_end = min(day + timedelta(days=BACKFILL_WINDOW_DAYS), end + timedelta(days=1))
+        low = datetime.combine(day, datetime.min.time())
+        high = datetime.combine(window_end, datetime.min.time())
+        try:
+            db.session.execute(delete(DailyCourseStats).where(DailyCourseStats.day >= day, DailyCourseStats.day < window_end))
+            db.session.execute(delete(DailyCouponStats).where(DailyCouponStats.day >= day, DailyCouponStats.day < window_end))
+
+            applied = func.date(Application.applied_at)
+            for applied_day, course_id, count in db.session.execute(
+                select(applied, Application.course_id, func.count())
+                .where(Application.applied_at >= low, Application.applied_at < high)
+                .group_by(applied, Application.course_id)
+            ):
+                _upsert(DailyCourseStats, {'day': _as_date(applied_day), 'course_id': course_id},
+                        {'applications': count})
+
+            in_window = (Application.paid_at >= low, Application.paid_at < high)
+            for model, key, stmt in (
+                (DailyCourseStats, 'course_id', _payment_totals(Application.course_id).where(*in_window)),
+                (DailyCouponStats, 'coupon_id', _payment_totals(Application.coupon_id).where(
+                    *in_window, Application.coupon_id.isnot(None))),
+            ):
+                for paid_day, key_id, count, gross, discount, net in db.session.execute(stmt):
+                    _upsert(model, {'day': _as_date(paid_day), key: key_id},
+                            {'paid_count': count, 'gross': gross, 'discount': discount, 'net': net})
+
+            db.session.commit()
+        except Exception:
+            db.session.rollback()
+            raise
+        logger.info("Rebuilt daily stats for %s to %s", day, window_end - timedelta(days=1))
+        day = window_end
+
+    return (end - start).days + 1
+
+
+def course_report(start, end):
+    """Per-course totals between two days (inclusive), highest net revenue first"""
+    return db.session.execute(
+        select(
+            Course.id, Course.title,
+            func.sum(DailyCourseStats.applications).label('applications'),
+            func.sum(DailyCourseStats.paid_count).label('paid_count'),
+            func.sum(DailyCourseStats.gross).label('gross'),
+            func.sum(DailyCourseStats.discount).label('discount'),
+            func.sum(DailyCourseStats.net).label('net')
+        )
+        .join(DailyCourseStats, DailyCourseStats.course_id == Course.id)
+        .where(DailyCourseStats.day >= start, DailyCourseStats.day <= end)
+        .group_by(Course.id, Course.title)
+        .order_by(func.sum(DailyCourseStats.net).desc())
+    ).all()
+
+
+def coupon_report(start, end):
+    """Per-coupon totals between two days (inclusive), most used first"""
+    return db.session.execute(
+        select(
+            Coupon.id, Coupon.code,
+            func.sum(DailyCouponStats.paid_count).label('paid_count'),
+            func.sum(DailyCouponStats.gross).label('gross'),
+            func.sum(DailyCouponStats.discount).label('discount'),
+            func.sum(DailyCouponStats.net).label('net')
+        )
+        .join(DailyCouponStats, DailyCouponStats.coupon_id == Coupon.id)
+        .where(DailyCouponStats.day >= start, DailyCouponStats.day <= end)
+        .group_by(Coupon.id, Coupon.code)
+        .order_by(func.sum(DailyCouponStats.paid_count).desc())
+    ).all()
+
+
+def daily_series(start, end):
+    """Applications, payments and net revenue per day between two days (inclusive)"""
+    return db.session.execute(
+        select(
+            DailyCourseStats.day,
+            func.sum(DailyCourseStats.applications).label('applications'),
+            func.sum(DailyCourseStats.paid_count).label('paid_count'),
+            func.sum(DailyCourseStats.net).label('net')
+        )
+        .where(DailyCourseStats.day >= start, DailyCourseStats.day <= end)
+        .group_by(DailyCourseStats.day)
+        .order_by(DailyCourseStats.day)
+    ).all()
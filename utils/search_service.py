@@ -0,0 +1,237 @@
+"""
+Search Service for SMIICT Institute Course Platform
+Ranked, typo-tolerant search over courses, users and contact messages
+"""
+
+import re
+import threading
+from bisect import bisect_left
+from collections import defaultdict
+from flask import current_app
+from sqlalchemy import select, func, literal, literal_column, or_, event
+from sqlalchemy.orm import Session
+import logging
+
+from models import db, Course, User, ContactMessage
+
+logger = logging.getLogger(__name__)
+
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+# Searchable models: the weighted fields matched by the Python index and
+# the field Postgres matches by trigram similarity to tolerate typos
+SEARCHES = {
+    'courses': {
+        'model': Course,
+        'fields': (('title', 1.0), ('description', 0.4)),
+        'fuzzy': 'title',
+    },
+    'messages': {
+        'model': ContactMessage,
+        'fields': (('subject', 1.0), ('name', 0.6), ('email', 0.6), ('message', 0.4)),
+        'fuzzy': 'subject',
+    },
+    'users': {
+        'model': User,
+        'fields': (('name', 1.0), ('email', 1.0)),
+        'fuzzy': None,
+    },
+}
+
+# Minimum trigram similarity for a misspelled word to match (as pg_trgm's default)
+SIMILARITY_THRESHOLD = 0.3
+
+
+def words(value):
+    return WORD_RE.findall((value or '').lower())
+
+
+def base_query(kind):
+    """Rows of a kind that can be found at all"""
+    model = SEARCHES[kind]['model']
+    query = select(model)
+    if model is User:
+        query = query.where(User.deleted_at.is_(None))
+    return query
+
+
+def search(kind, q, page=1, per_page=None):
+    """
+    Find rows of a kind matching a query, best matches first
+
+    Every word of the query must match, as a word or the start of one
+    ("pyth" finds "Python"); words that match nothing are also tried for
+    close misspellings. On Postgres this uses the search_vector GIN and
+    trigram indexes built by migrate_search_indexes.py, and only the
+    newest SEARCH_MAX_CANDIDATES matches are ranked, which keeps very
+    common words fast on large tables (older matches of such a word are
+    not found). Elsewhere an in-memory index is used.
+
+    Args:
+        kind (str): 'courses', 'users' or 'messages'
+        q (str): Search text
+        page (int): 1-based page number
+        per_page (int): Results per page (defaults to SEARCH_PER_PAGE)
+
+    Returns:
+        dict: items (model instances), page, per_page and has_more
+    """
+    per_page = max(1, min(per_page or current_app.config.get('SEARCH_PER_PAGE', 20), 100))
+    page = max(page, 1)
+    terms = words(q)
+    if not terms:
+        return {'items': [], 'page': page, 'per_page': per_page, 'has_more': False}
+
+    offset = (page - 1) * per_page
+    if db.engine.dialect.name == 'postgresql':
+        ids = _postgres_ids(kind, q, terms, offset, per_page + 1)
+    else:
+        ids = _indexes[kind].search(terms)[offset:offset + per_page + 1]
+
+    has_more = len(ids) > per_page
+    ids = ids[:per_page]
+    model = SEARCHES[kind]['model']
+    rows = {row.id: row for row in db.session.execute(
+        base_query(kind).where(model.id.in_(ids))
+    ).scalars()} if ids else {}
+    return {'items': [rows[id] for id in ids if id in rows], 'page': page,
+            'per_page': per_page, 'has_more': has_more}
+
+
+def _postgres_ids(kind, q, terms, offset, limit):
+    config = SEARCHES[kind]
+    model = config['model']
+    candidates = current_app.config.get('SEARCH_MAX_CANDIDATES', 1000)
+    text_query = literal(q)
+
+    if model is User:
+        # Substring and word-similarity matches, both served by the gin_trgm_ops indexes
+        match = or_(User.name.icontains(q, autoescape=True), User.email.icontains(q, autoescape=True),
+                    text_query.op('<%')(User.name), text_query.op('<%')(User.email))
+        rank = func.greatest(func.word_similarity(text_query, User.name),
+                             func.word_similarity(text_query, User.email))
+    else:
+        vector = literal_column(f"{model.__table__.name}.search_vector")
+        ts_query = func.to_tsquery('english', literal(' & '.join(f"{term}:*" for term in terms)))
+        fuzzy = getattr(model, config['fuzzy'])
+        match = or_(vector.op('@@')(ts_query), text_query.op('<%')(fuzzy))
+        rank = func.ts_rank_cd(vector, ts_query) + func.word_similarity(text_query, fuzzy)
+
+    # Ranking reads every match's search_vector, so a common word on a large
+    # table must not rank them all: only the newest SEARCH_MAX_CANDIDATES
+    # matches are ranked. Ordering by id is cheap, a top-N over the index
+    # match (or a backward primary key scan when most rows match).
+    newest = (
+        base_query(kind).with_only_columns(model.id.label('id'))
+        .where(match)
+        .order_by(model.id.desc())
+        .limit(candidates)
+        .subquery('candidates')
+    )
+    return db.session.execute(
+        select(model.id)
+        .join(newest, newest.c.id == model.id)
+        .order_by(rank.desc(), model.id.desc())
+        .offset(offset).limit(limit)
+    ).scalars().all()
+
+
+def trigrams(word):
+    padded = f"  {word} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def similarity(a, b):
+    ta, tb = trigrams(a), trigrams(b)
+    return len(ta & tb) / len(ta | tb)
+
+
+class SearchIndex:
+    """
+    In-memory inverted index, for databases without full-text search (SQLite test runs)
+
+    Built from the table on first use and rebuilt after any ORM change to
+    the model. Changes made with raw SQL are not noticed.
+    """
+
+    def __init__(self, kind):
+        self.kind = kind
+        self.postings = {}
+        self.words = []
+        self.by_trigram = {}
+        self.stale = True
+        self.lock = threading.Lock()
+
+    def build(self):
+        fields = SEARCHES[self.kind]['fields']
+        model = SEARCHES[self.kind]['model']
+        postings = defaultdict(dict)
+        columns = [model.id] + [getattr(model, name) for name, _ in fields]
+        for row in db.session.execute(base_query(self.kind).with_only_columns(*columns)):
+            for (_, weight), value in zip(fields, row[1:]):
+                for word in words(value):
+                    postings[word][row.id] = postings[word].get(row.id, 0) + weight
+        by_trigram = defaultdict(set)
+        for word in postings:
+            for trigram in trigrams(word):
+                by_trigram[trigram].add(word)
+        self.postings, self.words, self.by_trigram = dict(postings), sorted(postings), by_trigram
+        self.stale = False
+        logger.debug("Built %s search index (%s words)", self.kind, len(self.words))
+
+    def _matches(self, term):
+        """Indexed words a query word matches, with how well they match"""
+        matches = {}
+        start = bisect_left(self.words, term)
+        for word in self.words[start:]:
+            if not word.startswith(term):
+                break
+            matches[word] = 1.0 if word == term else 0.8
+        if not matches:
+            candidates = set().union(*(self.by_trigram.get(t, ()) for t in trigrams(term)))
+            for word in candidates:
+                score = similarity(term, word)
+                if score >= SIMILARITY_THRESHOLD:
+                    matches[word] = score * 0.6
+        return matches
+
+    def search(self, terms):
+        """Ids of rows matching every term, best first"""
+        with self.lock:
+            if self.stale:
+                self.build()
+            scores = None
+            for term in terms:
+                term_scores = defaultdict(float)
+                for word, quality in self._matches(term).items():
+                    for id, weight in self.postings[word].items():
+                        term_scores[id] = max(term_scores[id], quality * weight)
+                if scores is None:
+                    scores = dict(term_scores)
+                else:
+                    scores = {id: score + term_scores[id] for id, score in scores.items() if id in term_scores}
+                if not scores:
+                    return []
+        return sorted(scores, key=lambda id: (-scores[id], -id))
+
+
+_indexes = {kind: SearchIndex(kind) for kind in SEARCHES}
+_kinds_by_model = {config['model']: kind for kind, config in SEARCHES.items()}
+
+
+def _mark_stale(mapper, connection, target):
+    _indexes[_kinds_by_model[type(target)]].stale = True
+
+
+for _model in _kinds_by_model:
+    for _name in ('after_insert', 'after_update', 'after_delete'):
+        event.listen(_model, _name, _mark_stale)
+
+
+@event.listens_for(Session, 'do_orm_execute')
+def _mark_stale_on_bulk(state):
+    # Bulk UPDATE/DELETE statements (e.g. admin bulk actions) skip the mapper events
+    if (state.is_update or state.is_delete) and state.bind_mapper is not None:
+        kind = _kinds_by_model.get(state.bind_mapper.class_)
+        if kind:
+            _indexes[kind].stale = True
@@ -0,0 +1,233 @@
+"""
+Structured Logging for SMIICT Institute Course Platform
+JSON log records written by a background thread, tagged with request and trace ids
+"""
+
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import queue
+import random
+import sys
+import time
+import uuid
+import zlib
+from datetime import datetime, timezone
+from decimal import Decimal
+from flask import g, request, has_request_context
+from flask.logging import default_handler
+
+from utils.tracing import current_span
+
+# Attributes every LogRecord has; anything else was passed with extra={...}
+RECORD_ATTRIBUTES = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Log arguments that are safe to format later on another thread
+PLAIN_TYPES = (str, int, float, bool, Decimal, datetime, type(None))
+
+# Seconds between warnings about records dropped on a full queue
+DROP_REPORT_INTERVAL = 10.0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, ids and any extra fields"""
+
+    def format(self, record):
+        entry = {
+            'ts': datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec='milliseconds'),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in RECORD_ATTRIBUTES and value is not None:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry['exception'] = record.exc_text
+        if record.stack_info:
+            entry['stack'] = self.formatStack(record.stack_info)
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class ContextFilter(logging.Filter):
+    """
+    Tag records with the request id and trace id of the thread logging them
+
+    Runs on the logging thread (before the record is queued), since the
+    listener thread has no request context.
+    """
+
+    def filter(self, record):
+        if has_request_context():
+            record.request_id = g.get('request_id')
+        span = current_span()
+        if span is not None:
+            record.trace_id = span.context.trace_id
+        return True
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keep only a share of INFO and DEBUG records from high-volume loggers
+
+    Warnings and errors are always kept. Within a request the decision is
+    made from its request id, so a sampled request keeps all of its logs.
+    """
+
+    def __init__(self, rate, prefixes):
+        super().__init__()
+        self.rate = rate
+        self.prefixes = tuple(prefixes)
+
+    def filter(self, record):
+        if self.rate >= 1 or record.levelno >= logging.WARNING or not record.name.startswith(self.prefixes):
+            return True
+        request_id = getattr(record, 'request_id', None)
+        if request_id:
+            return zlib.crc32(request_id.encode()) % 10000 < self.rate * 10000
+        return random.random() < self.rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Puts records on a bounded queue for a QueueListener, never waiting
+
+    Messages whose arguments are plain values are not formatted here: the
+    listener thread does that along with the JSON encoding, so a request
+    only pays for the queue put. Other arguments (models, exceptions) are
+    rendered now, while they still describe what was logged. If the writer
+    falls behind and the queue is full, records are dropped and counted
+    instead of blocking the request.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self._exc_formatter = logging.Formatter()
+        self.dropped = 0
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        args = record.args if isinstance(record.args, tuple) else (record.args,)
+        if args and not all(isinstance(arg, PLAIN_TYPES) for arg in args):
+            record.msg = record.getMessage()
+            record.args = None
+        if record.exc_info:
+            # The traceback holds frames the caller is about to leave
+            record.exc_text = record.exc_text or self._exc_formatter.formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+class ReportingQueueListener(logging.handlers.QueueListener):
+    """
+    QueueListener that also writes a warning when its queue handler dropped records
+
+    The count is checked as records are written (at most every interval
+    seconds) and once more on stop. The warning goes straight to the
+    handlers, since the queue it would otherwise be put on may be full.
+    """
+
+    def __init__(self, queue_handler, *handlers, interval=DROP_REPORT_INTERVAL, respect_handler_level=False):
+        super().__init__(queue_handler.queue, *handlers, respect_handler_level=respect_handler_level)
+        self.queue_handler = queue_handler
+        self.interval = interval
+        self.reported = 0
+        self._next_report = time.monotonic() + interval
+
+    def handle(self, record):
+        super().handle(record)
+        if time.monotonic() >= self._next_report:
+            self.report_dropped()
+
+    def report_dropped(self):
+        """Write a warning with the records dropped since the last one, if any"""
+        self._next_report = time.monotonic() + self.interval
+        dropped = self.queue_handler.dropped
+        if dropped > self.reported:
+            record = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                "%s log records were dropped because the log queue was full (%s since start)",
+                (dropped - self.reported, dropped), None
+            )
+            self.reported = dropped
+            super().handle(record)
+
+    def enqueue_sentinel(self):
+        # The stock put_nowait raises if the queue is full; the thread is still draining it
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        super().stop()
+        self.report_dropped()
+
+
+def build_handlers(config):
+    """The handlers that actually write, used by the listener thread"""
+    if config.get('LOG_FORMAT', 'json') == 'json':
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter('%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s',
+                                      defaults={'request_id': '-'})
+    handlers = [logging.StreamHandler(sys.stderr)]
+    if config.get('LOG_FILE'):
+        handlers.append(logging.FileHandler(config['LOG_FILE'], encoding='utf-8'))
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def init_logging(app, handlers=None):
+    """
+    Route all logging through a queue to a background writer thread
+
+    Args:
+        app (Flask): The application (also gets request id handling)
+        handlers (list): Writers for the listener (defaults to build_handlers)
+
+    Returns:
+        ReportingQueueListener: The started listener (stopped at exit), also
+            kept in app.extensions['logging'] with its dropped-record count
+    """
+    config = app.config
+    log_queue = queue.Queue(maxsize=config.get('LOG_QUEUE_SIZE', 10000))
+    queue_handler = NonBlockingQueueHandler(log_queue)
+    queue_handler.addFilter(ContextFilter())
+    prefixes = [name.strip() for name in config.get('LOG_SAMPLED_LOGGERS', '').split(',') if name.strip()]
+    if prefixes:
+        queue_handler.addFilter(SamplingFilter(config.get('LOG_SAMPLE_RATE', 1.0), prefixes))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(config.get('LOG_LEVEL', 'INFO'))
+    app.logger.removeHandler(default_handler)
+
+    listener = ReportingQueueListener(queue_handler, *(handlers or build_handlers(config)),
+                                      respect_handler_level=True)
+    listener.start()
+    atexit.register(listener.stop)
+    app.extensions['logging'] = listener
+
+    @app.before_request
+    def _assign_request_id():
+        # Reuse the id a proxy or client sent, so logs can be matched across hops
+        g.request_id = request.headers.get('X-Request-ID', '')[:64] or uuid.uuid4().hex
+
+    @app.after_request
+    def _return_request_id(response):
+        if g.get('request_id'):
+            response.headers['X-Request-ID'] = g.request_id
+        return response
+
+    return listener
@@ -0,0 +1,479 @@
+"""
+Tracing for SMIICT Institute Course Platform
+OpenTelemetry-style spans around requests, SQL, Paystack and SMTP calls, with pluggable exporters
+"""
+
+import atexit
+import contextvars
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+import requests
+from flask import g, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Span kinds and status codes as numbered by OTLP
+KINDS = {'internal': 1, 'server': 2, 'client': 3}
+STATUS_OK, STATUS_ERROR = 1, 2
+
+# Longest SQL statement recorded on a span
+MAX_STATEMENT_LENGTH = 1000
+
+_current_span = contextvars.ContextVar('current_span', default=None)
+
+
+class SpanContext:
+    """Identifies a span within a trace, as carried by a W3C traceparent header"""
+
+    __slots__ = ('trace_id', 'span_id', 'sampled')
+
+    def __init__(self, trace_id, span_id, sampled):
+        self.trace_id = trace_id
+        self.span_id = span_id
+        self.sampled = sampled
+
+    @classmethod
+    def from_traceparent(cls, header):
+        """Parse ``00-<trace id>-<span id>-<flags>`` (None if missing or malformed)"""
+        parts = (header or '').strip().split('-')
+        if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+            return None
+        try:
+            int(parts[1], 16), int(parts[2], 16)
+            flags = int(parts[3], 16)
+        except ValueError:
+            return None
+        return cls(parts[1], parts[2], bool(flags & 1))
+
+    def traceparent(self):
+        return f"00-{self.trace_id}-{self.span_id}-{'01' if self.sampled else '00'}"
+
+
+class Span:
+    """A timed operation; use Tracer.span() rather than creating these directly"""
+
+    def __init__(self, tracer, name, context, parent_id, kind, attributes):
+        self.tracer = tracer
+        self.name = name
+        self.context = context
+        self.parent_id = parent_id
+        self.kind = kind
+        self.attributes = dict(attributes or {})
+        self.status = None
+        self.error = None
+        self.start_ns = time.time_ns()
+        self.end_ns = None
+
+    @property
+    def recording(self):
+        return True
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exc):
+        self.status = STATUS_ERROR
+        self.error = f"{type(exc).__name__}: {exc}"
+
+    def end(self):
+        if self.end_ns is None:
+            self.end_ns = time.time_ns()
+            self.tracer.processor.on_end(self)
+
+    def to_dict(self):
+        return {
+            'trace_id': self.context.trace_id,
+            'span_id': self.context.span_id,
+            'parent_id': self.parent_id,
+            'name': self.name,
+            'kind': self.kind,
+            'start_ns': self.start_ns,
+            'end_ns': self.end_ns,
+            'duration_ms': (self.end_ns - self.start_ns) / 1e6 if self.end_ns else None,
+            'attributes': self.attributes,
+            'status': 'error' if self.status == STATUS_ERROR else 'ok',
+            'error': self.error,
+        }
+
+
+class NonRecordingSpan:
+    """
+    Stand-in for a span that wasn't sampled
+
+    It only carries the trace context, so sampling decisions still
+    propagate to child spans and downstream services, and everything else
+    is a no-op.
+    """
+
+    recording = False
+
+    def __init__(self, context):
+        self.context = context
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exc):
+        pass
+
+    def end(self):
+        pass
+
+
+class InMemoryExporter:
+    """Keeps finished spans in a list, for tests and benchmarks"""
+
+    def __init__(self):
+        self.spans = []
+
+    def export(self, spans):
+        self.spans.extend(span.to_dict() for span in spans)
+
+    def clear(self):
+        self.spans = []
+
+    def shutdown(self):
+        pass
+
+
+class FileExporter:
+    """Appends finished spans to a file as JSON lines"""
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+
+    def export(self, spans):
+        lines = ''.join(json.dumps(span.to_dict(), default=str) + '\n' for span in spans)
+        with self.lock, open(self.path, 'a', encoding='utf-8') as f:
+            f.write(lines)
+
+    def shutdown(self):
+        pass
+
+
+class OTLPExporter:
+    """Sends spans to an OpenTelemetry collector with OTLP/HTTP (JSON encoding)"""
+
+    def __init__(self, endpoint, service_name, headers=None, timeout=5):
+        self.url = endpoint.rstrip('/') + '/v1/traces'
+        self.service_name = service_name
+        self.headers = {'Content-Type': 'application/json', **(headers or {})}
+        self.timeout = timeout
+
+    @staticmethod
+    def _value(value):
+        if isinstance(value, bool):
+            return {'boolValue': value}
+        if isinstance(value, int):
+            return {'intValue': str(value)}
+        if isinstance(value, float):
+            return {'doubleValue': value}
+        return {'stringValue': str(value)}
+
+    def _span(self, span):
+        data = {
+            'traceId': span.context.trace_id,
+            'spanId': span.context.span_id,
+            'name': span.name,
+            'kind': KINDS.get(span.kind, 1),
+            'startTimeUnixNano': str(span.start_ns),
+            'endTimeUnixNano': str(span.end_ns),
+            'attributes': [{'key': key, 'value': self._value(value)} for key, value in span.attributes.items()],
+            'status': {'code': span.status or STATUS_OK, 'message': span.error or ''},
+        }
+        if span.parent_id:
+            data['parentSpanId'] = span.parent_id
+        return data
+
+    def export(self, spans):
+        payload = {'resourceSpans': [{
+            'resource': {'attributes': [{'key': 'service.name', 'value': {'stringValue': self.service_name}}]},
+            'scopeSpans': [{'scope': {'name': 'smiict'}, 'spans': [self._span(span) for span in spans]}],
+        }]}
+        # Not traced itself: this runs on the processor thread, outside any span
+        response = requests.post(self.url, data=json.dumps(payload), headers=self.headers, timeout=self.timeout)
+        if response.status_code >= 400:
+            logger.warning("OTLP export failed with HTTP %s: %s", response.status_code, response.text[:200])
+
+    def shutdown(self):
+        pass
+
+
+class SimpleSpanProcessor:
+    """Exports each span as it ends, on the calling thread (tests)"""
+
+    def __init__(self, exporter):
+        self.exporter = exporter
+
+    def on_end(self, span):
+        self.exporter.export([span])
+
+    def shutdown(self):
+        self.exporter.shutdown()
+
+
+class BatchSpanProcessor:
+    """
+    Hands finished spans to a background thread that exports them in batches
+
+    Request threads only put the span on a bounded queue. If the exporter
+    falls behind and the queue fills up, spans are dropped (and counted)
+    rather than slowing requests down.
+    """
+
+    def __init__(self, exporter, max_queue=2048, batch_size=256, interval=2.0):
+        self.exporter = exporter
+        self.batch_size = batch_size
+        self.interval = interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self._stopped = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='span-exporter', daemon=True)
+        self._thread.start()
+
+    def on_end(self, span):
+        try:
+            self.queue.put_nowait(span)
+        except queue.Full:
+            self.dropped += 1
+
+    def _drain(self, block):
+        batch = []
+        deadline = time.monotonic() + self.interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            try:
+                if block and timeout > 0:
+                    batch.append(self.queue.get(timeout=timeout))
+                else:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch):
+        try:
+            self.exporter.export(batch)
+        except Exception as e:
+            logger.warning("Exporting %s spans failed: %s", len(batch), e)
+
+    def _run(self):
+        while not self._stopped.is_set():
+            batch = self._drain(block=True)
+            if batch:
+                self._export(batch)
+
+    def shutdown(self):
+        """Stop the thread and export what is still queued"""
+        self._stopped.set()
+        self._thread.join(timeout=self.interval + 1)
+        while True:
+            batch = self._drain(block=False)
+            if not batch:
+                break
+            self._export(batch)
+        if self.dropped:
+            logger.warning("%s spans were dropped because the export queue was full", self.dropped)
+        self.exporter.shutdown()
+
+
+class NoopProcessor:
+    def on_end(self, span):
+        pass
+
+    def shutdown(self):
+        pass
+
+
+class Tracer:
+    """
+    Creates spans and decides which traces are sampled
+
+    A new trace is sampled with probability sample_rate; spans in an
+    existing trace (including one continued from a traceparent header)
+    follow the parent's decision, so a trace is either complete or absent.
+    """
+
+    def __init__(self, processor=None, sample_rate=0.0):
+        self.processor = processor or NoopProcessor()
+        self.sample_rate = sample_rate
+
+    def start_span(self, name, kind='internal', attributes=None, parent=None):
+        """
+        Start a span without making it current (end it with span.end())
+
+        Args:
+            name (str): Operation name, e.g. 'GET /course/<int:course_id>'
+            kind (str): 'internal', 'server' or 'client'
+            attributes (dict): Initial attributes
+            parent (SpanContext): Defaults to the current span's context
+        """
+        if parent is None:
+            current = _current_span.get()
+            parent = current.context if current is not None else None
+        if parent is None:
+            trace_id = f"{random.getrandbits(128):032x}"
+            sampled = random.random() < self.sample_rate
+        else:
+            trace_id, sampled = parent.trace_id, parent.sampled
+
+        context = SpanContext(trace_id, f"{random.getrandbits(64):016x}", sampled)
+        if not sampled:
+            return NonRecordingSpan(context)
+        return Span(self, name, context, parent.span_id if parent else None, kind, attributes)
+
+    @contextmanager
+    def span(self, name, kind='internal', attributes=None, parent=None):
+        """Context manager running its block in a new current span"""
+        span = self.start_span(name, kind, attributes, parent)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except BaseException as e:
+            span.record_exception(e)
+            raise
+        finally:
+            _current_span.reset(token)
+            span.end()
+
+    def shutdown(self):
+        self.processor.shutdown()
+
+
+tracer = Tracer()
+
+
+def current_span():
+    """The active span (None outside any span)"""
+    return _current_span.get()
+
+
+def current_traceparent():
+    """traceparent header value of the active span, to hand to another process or job"""
+    span = _current_span.get()
+    return span.context.traceparent() if span is not None else None
+
+
+def carry_context(fn):
+    """
+    Wrap fn so it runs with the caller's trace context (e.g. as a thread target)
+
+    New threads start with an empty context otherwise. Wrap once per thread.
+    """
+    context = contextvars.copy_context()
+    return lambda *args, **kwargs: context.run(fn, *args, **kwargs)
+
+
+def build_exporter(config):
+    """Exporter named by TRACING_EXPORTER: 'memory', 'file', 'otlp' or 'none'"""
+    kind = config.get('TRACING_EXPORTER', 'none')
+    if kind == 'memory':
+        return InMemoryExporter()
+    if kind == 'file':
+        return FileExporter(config.get('TRACING_FILE', 'traces.jsonl'))
+    if kind == 'otlp':
+        headers = dict(
+            item.split('=', 1) for item in config.get('OTEL_EXPORTER_OTLP_HEADERS', '').split(',') if '=' in item
+        )
+        return OTLPExporter(config.get('OTEL_EXPORTER_OTLP_ENDPOINT', 'http://localhost:4318'),
+                            config.get('OTEL_SERVICE_NAME', 'smiict-web'), headers)
+    return None
+
+
+def init_tracing(app, exporter=None):
+    """
+    Configure the tracer from the app config and instrument Flask and SQLAlchemy
+
+    Args:
+        app (Flask): The application
+        exporter: Overrides TRACING_EXPORTER (e.g. an InMemoryExporter in tests)
+
+    Returns:
+        The exporter in use, or None when tracing is off
+    """
+    exporter = exporter or build_exporter(app.config)
+    if exporter is None:
+        tracer.processor, tracer.sample_rate = NoopProcessor(), 0.0
+        return None
+
+    if isinstance(exporter, InMemoryExporter):
+        tracer.processor = SimpleSpanProcessor(exporter)
+    else:
+        tracer.processor = BatchSpanProcessor(exporter)
+        atexit.register(tracer.shutdown)
+    tracer.sample_rate = app.config.get('TRACING_SAMPLE_RATE', 0.05)
+
+    @app.before_request
+    def _start_request_span():
+        route = request.url_rule.rule if request.url_rule else request.path
+        span = tracer.start_span(
+            f"{request.method} {route}", kind='server',
+            parent=SpanContext.from_traceparent(request.headers.get('traceparent')),
+            attributes={'http.method': request.method, 'http.route': route, 'http.target': request.full_path}
+        )
+        g._trace_span = span
+        g._trace_token = _current_span.set(span)
+
+    @app.after_request
+    def _record_response(response):
+        span = g.get('_trace_span')
+        if span is not None:
+            span.set_attribute('http.status_code', response.status_code)
+            if response.status_code >= 500:
+                span.status = STATUS_ERROR
+            response.headers['traceparent'] = span.context.traceparent()
+        return response
+
+    @app.teardown_request
+    def _end_request_span(exc):
+        span = g.pop('_trace_span', None)
+        if span is None:
+            return
+        if exc is not None:
+            span.record_exception(exc)
+        _current_span.reset(g.pop('_trace_token'))
+        span.end()
+
+    logger.info("Tracing enabled (%s, sample rate %s)", type(exporter).__name__, tracer.sample_rate)
+    return exporter
+
+
+# SQL statements become client spans of whatever span is current. Unsampled
+# requests pay for one context variable lookup per statement.
+@event.listens_for(Engine, 'before_cursor_execute')
+def _start_sql_span(conn, cursor, statement, parameters, context, executemany):
+    current = _current_span.get()
+    if current is None or not current.recording:
+        return
+    context._trace_span = tracer.start_span(
+        statement.split(None, 1)[0].upper() if statement else 'SQL', kind='client',
+        attributes={'db.system': conn.dialect.name, 'db.statement': statement[:MAX_STATEMENT_LENGTH]}
+    )
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def _end_sql_span(conn, cursor, statement, parameters, context, executemany):
+    span = getattr(context, '_trace_span', None)
+    if span is not None:
+        if cursor.rowcount is not None and cursor.rowcount >= 0:
+            span.set_attribute('db.rowcount', cursor.rowcount)
+        span.end()
+        context._trace_span = None
+
+
+@event.listens_for(Engine, 'handle_error')
+def _fail_sql_span(exception_context):
+    context = exception_context.execution_context
+    span = getattr(context, '_trace_span', None) if context is not None else None
+    if span is not None:
+        span.record_exception(exception_context.original_exception)
+        span.end()
+        context._trace_span = None
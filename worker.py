@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Background Worker
+Runs the jobs defined in jobs.py, including their periodic schedules.
+
+Usage:
+    python worker.py run [--threads 4] [--processes 1] [--burst]
+    python worker.py enqueue users.purge [key=value ...]
+    python worker.py stats [--hours 24]
+    python worker.py schedules
+
+Run it under a process supervisor (systemd, supervisord) next to the web
+server; any number of workers can share the database. SIGTERM or Ctrl+C
+stops claiming jobs and waits for the running ones to finish.
+"""
+
+import argparse
+import multiprocessing
+import signal
+from datetime import datetime, timedelta
+
+from app import app, db
+from models import JobSchedule
+from utils.job_service import JOBS, Worker, enqueue, job_stats
+import jobs  # noqa: F401  (registers the jobs)
+
+def run_worker(threads, burst=False):
+    """Run one worker in this process until it is stopped"""
+    with app.app_context():
+        # A forked process must not reuse the parent's database connections
+        db.engine.dispose(close=False)
+    worker = Worker(app, threads=threads)
+    signal.signal(signal.SIGTERM, lambda *_: worker.stop())
+    signal.signal(signal.SIGINT, lambda *_: worker.stop())
+    metrics = worker.run(burst=burst)
+    for name, totals in sorted(metrics.items()):
+        print(f"✅ {name}: {totals['runs']} runs, {totals['failures']} failed, "
+              f"avg {totals['avg_ms']:.1f}ms, max {totals['max_ms']:.1f}ms")
+
+def run(threads, processes, burst):
+    """Run the worker, in several processes if asked (each with its own thread pool)"""
+    if processes <= 1:
+        run_worker(threads, burst)
+        return
+    children = [multiprocessing.Process(target=run_worker, args=(threads, burst)) for _ in range(processes)]
+    for child in children:
+        child.start()
+
+    def stop(*_):
+        for child in children:
+            if child.is_alive():
+                child.terminate()  # Sends SIGTERM, which each worker handles gracefully
+    signal.signal(signal.SIGTERM, stop)
+    signal.signal(signal.SIGINT, stop)
+    for child in children:
+        child.join()
+    print(f"🎉 {processes} worker processes stopped")
+
+def enqueue_job(name, pairs):
+    """Queue a job by hand, with string arguments given as key=value"""
+    if name not in JOBS:
+        raise SystemExit(f"❌ Unknown job {name!r}, registered: {', '.join(sorted(JOBS))}")
+    kwargs = dict(pair.split('=', 1) for pair in pairs)
+    with app.app_context():
+        queued = enqueue(name, **kwargs)
+        db.session.commit()
+        print(f"✅ Queued {name} as job {queued.id}")
+
+def show_stats(hours):
+    """Print run counts and timings per job for the last hours"""
+    with app.app_context():
+        stats = job_stats(datetime.utcnow() - timedelta(hours=hours))
+    print(f"{'job':<24} {'ok':>6} {'queued':>7} {'running':>8} {'dead':>6} {'p50 ms':>9} {'p95 ms':>9} {'max ms':>9} {'wait p95':>9}")
+    for name, row in sorted(stats.items()):
+        timings = ''.join(f"{row[key]:>10.1f}" if row.get(key) is not None else f"{'-':>10}"
+                          for key in ('p50_ms', 'p95_ms', 'max_ms', 'wait_p95_ms'))
+        print(f"{name:<24} {row.get('succeeded', 0):>6} {row.get('queued', 0):>7} {row.get('running', 0):>8} "
+              f"{row.get('dead', 0):>6}{timings}")
+
+def show_schedules():
+    """Print every periodic job and when it runs next"""
+    with app.app_context():
+        rows = {row.name: row for row in JobSchedule.query.all()}
+    for name, definition in sorted(JOBS.items()):
+        if definition.schedule is None:
+            continue
+        row = rows.get(name)
+        next_run = f"{row.next_run_at:%Y-%m-%d %H:%M}" if row else 'not synced yet'
+        print(f"{name:<24} {definition.schedule.expression:<16} next {next_run}")
+
+def main():
+    parser = argparse.ArgumentParser(description='SMIICT background worker')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help='Run jobs until stopped')
+    run_parser.add_argument('--threads', type=int, default=app.config['JOB_WORKER_THREADS'], help='Jobs run at once per process')
+    run_parser.add_argument('--processes', type=int, default=1, help='Worker processes to start')
+    run_parser.add_argument('--burst', action='store_true', help='Exit once no job is due')
+
+    enqueue_parser = commands.add_parser('enqueue', help='Queue a job now')
+    enqueue_parser.add_argument('name', help='Registered job name')
+    enqueue_parser.add_argument('args', nargs='*', metavar='key=value', help='Job arguments')
+
+    stats_parser = commands.add_parser('stats', help='Show job counts and timings')
+    stats_parser.add_argument('--hours', type=float, default=24, help='Window to report on')
+
+    commands.add_parser('schedules', help='List periodic jobs')
+
+    args = parser.parse_args()
+    if args.command == 'run':
+        run(args.threads, args.processes, args.burst)
+    elif args.command == 'enqueue':
+        enqueue_job(args.name, args.args)
+    elif args.command == 'stats':
+        show_stats(args.hours)
+    else:
+        show_schedules()
+
+if __name__ == '__main__':
+    main()